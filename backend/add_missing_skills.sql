@@ -6,3 +6,6 @@ INSERT INTO skills_master (skill_name, skill_category, difficulty_level, descrip
 ('DevOps', 'Engineering', 'Advanced', 'DevOps practices, CI/CD, containerization, orchestration, and cloud infrastructure'),
 ('System Design', 'Engineering', 'Advanced', 'System architecture, scalability, distributed systems, and design patterns'),
 ('SQL', 'Data_Science', 'Intermediate', 'Structured Query Language for database management and data manipulation');
+
+-- Let running API workers reload their skill catalog (migrations/skill_catalog_version.sql)
+SELECT bump_skill_catalog_version();
@@ -158,6 +158,13 @@ def batch_import_all():
             successful_imports += 1
             total_questions += imported
     
+    if successful_imports > 0:
+        # Running API workers reload their skill catalog on the next check
+        try:
+            db.rpc("bump_skill_catalog_version").execute()
+        except Exception as e:
+            print(f"\n⚠️  Could not bump the skill catalog version: {e}")
+    
     # Summary
     print("\n" + "=" * 70)
     print("📊 IMPORT SUMMARY")
@@ -0,0 +1,66 @@
+"""
+Auth Benchmark - per-request cost of access token authentication
+
+Drives utils.security.decode_access_token in-process (no server, no
+database) the way the protected endpoints do, for each JWT backend:
+
+- cold: every call verifies the signature and builds TokenData
+- cached: the verified token cache answers repeat tokens
+
+--tokens distinct tokens are decoded round-robin, like that many clients
+polling at once.
+
+Run from backend/ with the same .env as the server (config is loaded).
+
+Usage:
+    python benchmarks/bench_auth.py
+    python benchmarks/bench_auth.py --requests 200000 --tokens 1000
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import utils.security as security  # noqa: E402
+from utils.jwt_backends import BACKENDS  # noqa: E402
+from utils.token_cache import verified_tokens  # noqa: E402
+
+
+def run(cached: bool, tokens: list, requests: int) -> float:
+    """Microseconds per decode"""
+    verified_tokens.clear()
+    start = time.perf_counter()
+    for i in range(requests):
+        if not cached:
+            verified_tokens.clear()
+        security.decode_access_token(tokens[i % len(tokens)])
+    return (time.perf_counter() - start) / requests * 1_000_000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark access token authentication")
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--tokens", type=int, default=100, help="Distinct tokens in rotation")
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print(f"decode_access_token x {args.requests} ({args.tokens} distinct tokens)")
+    print("=" * 60)
+    for name, backend_class in BACKENDS.items():
+        try:
+            security.jwt_backend = backend_class()
+        except ImportError:
+            print(f"{name:8s} not installed")
+            continue
+        
+        tokens = [
+            security.create_access_token({"sub": str(uuid.uuid4()), "email": f"bench{i}@test.com", "role": "Student"})
+            for i in range(args.tokens)
+        ]
+        cold = run(False, tokens, args.requests)
+        warm = run(True, tokens, args.requests)
+        print(f"{name:8s} cold: {cold:7.1f} us/request   cached: {warm:5.1f} us/request   ({cold / warm:.0f}x)")
+    print("=" * 60)
@@ -0,0 +1,105 @@
+"""
+Face Engine Benchmark - micro-batched verification in worker processes
+
+Drives utils.face_engine in-process (no server, no database) with the
+deterministic reference backend by default, so it runs on any CPU. Frames
+from --sessions concurrent sessions are submitted in rounds; half the
+sessions send their own reference image (match), the other half a
+different image (mismatch), and the results are checked.
+
+Run from backend/ with the same .env as the server (config is loaded).
+
+Usage:
+    python benchmarks/bench_face_engine.py
+    python benchmarks/bench_face_engine.py --sessions 200 --rounds 10 --workers 4
+    python benchmarks/bench_face_engine.py --backend deepface --image face.jpg --frame face.jpg
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from utils.face_engine import FaceVerificationEngine  # noqa: E402
+from utils.reference_faces import ReferenceFace  # noqa: E402
+
+
+async def run(args) -> dict:
+    engine = FaceVerificationEngine(
+        backend=args.backend,
+        workers=args.workers,
+        max_batch_size=args.batch_size,
+        batch_window_ms=args.window_ms,
+        max_queue=args.sessions * 2,
+        threshold=0.4
+    )
+    engine.start()
+    
+    rng = random.Random(42)
+    if args.image:
+        with open(args.image, "rb") as f:
+            reference_bytes = [f.read()] * args.sessions
+    else:
+        reference_bytes = [rng.randbytes(args.image_bytes) for _ in range(args.sessions)]
+    references = [ReferenceFace(f"bench://{i}", image) for i, image in enumerate(reference_bytes)]
+    
+    if args.frame:
+        with open(args.frame, "rb") as f:
+            frames = [base64.b64encode(f.read()).decode()] * args.sessions
+    else:
+        frames = [
+            base64.b64encode(image if i % 2 == 0 else rng.randbytes(args.image_bytes)).decode()
+            for i, image in enumerate(reference_bytes)
+        ]
+    
+    wrong = 0
+    start = time.perf_counter()
+    try:
+        for _ in range(args.rounds):
+            results = await asyncio.gather(*(
+                engine.verify(reference, frame) for reference, frame in zip(references, frames)
+            ))
+            if not args.frame:
+                wrong += sum(result["verified"] != (i % 2 == 0) for i, result in enumerate(results))
+        elapsed = time.perf_counter() - start
+        stats = engine.stats()
+    finally:
+        await engine.stop()
+    
+    stats["elapsed"] = elapsed
+    stats["wrong"] = wrong
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the face verification engine")
+    parser.add_argument("--backend", default="reference")
+    parser.add_argument("--sessions", type=int, default=100, help="Concurrent sessions sending a frame per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--window-ms", type=float, default=10)
+    parser.add_argument("--image-bytes", type=int, default=40_000, help="Size of generated images")
+    parser.add_argument("--image", help="Reference image file (default: generated bytes)")
+    parser.add_argument("--frame", help="Frame image file (default: generated bytes)")
+    args = parser.parse_args()
+    
+    stats = asyncio.run(run(args))
+    frames = args.sessions * args.rounds
+    
+    print("=" * 60)
+    print(f"Face engine ({stats['backend']}, {args.workers} workers) x {frames} frames")
+    print("=" * 60)
+    print(f"Elapsed:          {stats['elapsed']:.2f}s")
+    print(f"Throughput:       {frames / stats['elapsed']:.1f} frames/s")
+    print(f"Mean batch size:  {stats['mean_batch_size']}")
+    print(f"Latency p50:      {stats['latency_ms']['p50']} ms")
+    print(f"Latency p99:      {stats['latency_ms']['p99']} ms")
+    print(f"Failed batches:   {stats['failed_batches']}")
+    if not args.frame:
+        print(f"Wrong results:    {stats['wrong']}")
+    print("=" * 60)
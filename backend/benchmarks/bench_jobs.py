@@ -0,0 +1,114 @@
+"""
+Job Catalog Benchmark - feed indexing and recommendation latency
+
+Drives utils.job_catalog in-process (no server, no database). A synthetic
+feed of --postings jobs is written to a temporary file: each posting copies
+the requirements of a job from jobs/jobs.json and adds --extra-skills
+skills drawn from a generated vocabulary of --vocabulary names, written the
+way feeds write them ("Experience with X", "X/Y", "Strong X skills").
+
+Reported:
+- load: parsing the file and building the index (done off the event loop
+  by the running server)
+- recommend: per call, for users with 2 and 8 skills, with the match and
+  recommendation caches cleared before every call (cold) and kept (warm)
+
+Run from backend/ with the same .env as the server (config is loaded).
+
+Usage:
+    python benchmarks/bench_jobs.py
+    python benchmarks/bench_jobs.py --postings 100000 --vocabulary 5000 --calls 200
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from utils.job_catalog import JOBS_FILE_PATH, JobCatalog, skill_tokens  # noqa: E402
+
+USER_SKILLS = ["Python", "SQL", "React", "JavaScript", "Docker", "Machine Learning", "Agile", "AWS"]
+
+FORMS = ("{}", "{}", "Experience with {}", "Strong {} skills", "{} experience", "{}/{}", "{} or {}")
+
+
+def make_feed(postings: int, vocabulary: int, extra_skills: int, rng: random.Random) -> list:
+    with open(JOBS_FILE_PATH, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    words = [f"tech{i}" for i in range(vocabulary)]
+    
+    def extra() -> str:
+        form = rng.choice(FORMS)
+        return form.format(*(rng.choice(words) for _ in range(form.count("{}"))))
+    
+    feed = []
+    for i in range(postings):
+        job = dict(base[i % len(base)])
+        requirements = dict(job.get("requirements", {}))
+        requirements["required_skills"] = list(requirements.get("required_skills") or []) + [
+            extra() for _ in range(extra_skills)
+        ]
+        job["requirements"] = requirements
+        job["id"] = f"BENCH-{i}"
+        feed.append(job)
+    return feed
+
+
+def timed(fn, calls: int) -> list:
+    """Milliseconds per call"""
+    times = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def report(label: str, times: list):
+    times = sorted(times)
+    print(f"{label:<28} p50 {statistics.median(times):8.3f} ms   p99 {times[min(len(times) - 1, int(0.99 * len(times)))]:8.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the job catalog")
+    parser.add_argument("--postings", type=int, default=100_000)
+    parser.add_argument("--vocabulary", type=int, default=5000, help="Generated skill names")
+    parser.add_argument("--extra-skills", type=int, default=3, help="Generated skills per posting")
+    parser.add_argument("--calls", type=int, default=200, help="Recommendations per measurement")
+    args = parser.parse_args()
+    
+    rng = random.Random(42)
+    feed = make_feed(args.postings, args.vocabulary, args.extra_skills, rng)
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as f:
+        json.dump(feed, f)
+        path = f.name
+    
+    try:
+        catalog = JobCatalog(path)
+        print("=" * 60)
+        print(f"Job catalog x {args.postings} postings")
+        print("=" * 60)
+        
+        start = time.perf_counter()
+        catalog.load()
+        print(f"{'load':<28} {time.perf_counter() - start:8.3f} s")
+        
+        for count in (2, 8):
+            skills = USER_SKILLS[:count]
+            
+            def cold():
+                catalog.clear_cache()
+                catalog.recommend(skills)
+            
+            report(f"recommend {count} skills cold", timed(cold, args.calls))
+            report(f"recommend {count} skills warm", timed(lambda: catalog.recommend(skills), args.calls))
+        
+        print(f"{'skill_tokens cache':<28} {skill_tokens.cache_info().hits} hits, {skill_tokens.cache_info().misses} misses")
+        print("=" * 60)
+    finally:
+        os.unlink(path)
@@ -0,0 +1,30 @@
+"""
+Load Benchmark - GET /leaderboard/all
+
+Measures latency of the cross-skill leaderboard. Seed a test project with
+benchmarks/seed_leaderboard.sql (50 skills, 100k sessions) first, then run
+this against the server before and after a change to compare.
+
+Usage:
+    python benchmarks/bench_leaderboard_all.py
+    python benchmarks/bench_leaderboard_all.py --requests 200 --concurrency 10 --limit 100
+"""
+
+import argparse
+import asyncio
+
+from common import BASE_URL, run_load, print_report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the cross-skill leaderboard")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--limit", type=int, default=100, help="Results per technology")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    url = f"{args.base_url}/leaderboard/all?role=Student&limit={args.limit}"
+
+    result = asyncio.run(run_load("GET", url, args.requests, args.concurrency))
+    print_report(f"GET {url}", result)
@@ -0,0 +1,57 @@
+"""
+Login Isolation Benchmark - unrelated endpoint latency while logins are hammered
+
+Floods POST /auth/login with one account's credentials and, at the same time,
+measures a cheap unrelated endpoint (GET /health by default). With bcrypt on
+the event loop the probe's p99 climbs to hundreds of milliseconds; with the
+bounded hashing pool it should stay near its idle value. Logins rejected with
+503 (queue full) are reported separately from other errors.
+
+Create the account first (POST /auth/register/student).
+
+Usage:
+    python benchmarks/bench_login_isolation.py --email bench@test.com --password secret123
+    python benchmarks/bench_login_isolation.py --email bench@test.com --password secret123 --logins 500 --login-concurrency 100
+"""
+
+import argparse
+import asyncio
+
+from common import BASE_URL, run_load, print_report
+
+
+async def main(args):
+    # Idle baseline for the probe
+    baseline = await run_load("GET", f"{args.base_url}{args.probe_path}", args.probes, args.probe_concurrency)
+    
+    login = run_load(
+        "POST", f"{args.base_url}/auth/login",
+        args.logins, args.login_concurrency,
+        json_factory=lambda i: {"email": args.email, "password": args.password}
+    )
+    
+    async def probe():
+        # Let the login flood build up before probing
+        await asyncio.sleep(0.5)
+        return await run_load("GET", f"{args.base_url}{args.probe_path}", args.probes, args.probe_concurrency)
+    
+    login_result, probe_result = await asyncio.gather(login, probe())
+    return baseline, login_result, probe_result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark unrelated endpoint latency during a login flood")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=300)
+    parser.add_argument("--login-concurrency", type=int, default=50)
+    parser.add_argument("--probe-path", default="/health")
+    parser.add_argument("--probes", type=int, default=500)
+    parser.add_argument("--probe-concurrency", type=int, default=5)
+    args = parser.parse_args()
+    
+    baseline, login_result, probe_result = asyncio.run(main(args))
+    print_report(f"GET {args.probe_path} (idle)", baseline)
+    print_report(f"POST /auth/login x {args.logins} (errors include 503 shed)", login_result)
+    print_report(f"GET {args.probe_path} during login flood", probe_result)
@@ -0,0 +1,51 @@
+"""
+Load Benchmark - POST /test/sessions/{session_id}/answers
+
+Fires concurrent answer submissions at a running API server and reports
+throughput (requests/sec) and latency percentiles. Run it once against the
+server before a change and once after to compare.
+
+Requires an access token for a student with an InProgress test session.
+Pass several --question-id values to spread submissions across questions, so
+both the first-answer (insert) and changed-answer (update) paths are hit.
+Use --concurrency 1 to measure per-click latency without queueing.
+
+Usage:
+    python benchmarks/bench_submit_answer.py --token TOKEN --session-id SESSION_ID --question-id QUESTION_ID
+    python benchmarks/bench_submit_answer.py ... --question-id Q1 --question-id Q2 --requests 300 --concurrency 1
+    python benchmarks/bench_submit_answer.py ... --requests 2000 --concurrency 100
+"""
+
+import argparse
+import asyncio
+
+from common import BASE_URL, run_load, print_report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark answer submission throughput")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--token", required=True, help="Student access token")
+    parser.add_argument("--session-id", required=True, help="InProgress test session id")
+    parser.add_argument("--question-id", required=True, action="append", help="Question id belonging to the session (repeatable)")
+    parser.add_argument("--answer", default="A")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    
+    url = f"{args.base_url}/test/sessions/{args.session_id}/answers"
+    question_ids = args.question_id
+    
+    def payload(i):
+        return {
+            "question_id": question_ids[i % len(question_ids)],
+            "answer": args.answer,
+            "time_taken_seconds": 5
+        }
+    
+    result = asyncio.run(run_load(
+        "POST", url, args.requests, args.concurrency,
+        headers={"Authorization": f"Bearer {args.token}"},
+        json_factory=payload
+    ))
+    print_report(f"POST {url}", result)
@@ -0,0 +1,51 @@
+"""
+Burst Benchmark - POST /test/sessions/{session_id}/submit at the deadline
+
+Simulates a cohort hitting the 45-minute deadline together: every seeded
+session is submitted at once, each with its own student's token. Seed with
+benchmarks/seed_submit_burst.sql and export the sessions to CSV first. Reset
+the sessions (see the seed file) between runs.
+
+Tokens are minted with the backend's SECRET_KEY, so run from backend/ with
+the same .env as the server.
+
+Usage:
+    python benchmarks/bench_submit_burst.py --sessions-file burst_sessions.csv
+    python benchmarks/bench_submit_burst.py --sessions-file burst_sessions.csv --concurrency 100
+"""
+
+import argparse
+import asyncio
+import csv
+import os
+import sys
+
+from common import BASE_URL, run_load, print_report
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from utils.security import create_access_token  # noqa: E402
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark a burst of test submissions")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--sessions-file", required=True, help="CSV with user_id,session_id columns")
+    parser.add_argument("--concurrency", type=int, default=0, help="Max in flight (default: all at once)")
+    args = parser.parse_args()
+    
+    with open(args.sessions_file, newline="") as f:
+        sessions = [(row["user_id"], row["session_id"]) for row in csv.DictReader(f)]
+    
+    tokens = [
+        create_access_token({"sub": user_id, "email": f"{user_id}@bench.test", "role": "Student"})
+        for user_id, _ in sessions
+    ]
+    
+    result = asyncio.run(run_load(
+        "POST", f"{args.base_url}/test/sessions/{{session_id}}/submit",
+        len(sessions), args.concurrency or len(sessions),
+        json_factory=lambda i: {"force_submit": True},
+        url_factory=lambda i: f"{args.base_url}/test/sessions/{sessions[i][1]}/submit",
+        headers_factory=lambda i: {"Authorization": f"Bearer {tokens[i]}"}
+    ))
+    print_report(f"POST /test/sessions/{{session_id}}/submit x {len(sessions)}", result)
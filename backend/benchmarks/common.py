@@ -0,0 +1,78 @@
+"""
+Shared helpers for the HTTP load benchmarks in this folder.
+"""
+
+import asyncio
+import statistics
+import time
+from typing import Callable, Optional
+
+import httpx
+
+BASE_URL = "http://localhost:8000"
+
+
+async def run_load(
+    method: str,
+    url: str,
+    total_requests: int,
+    concurrency: int,
+    headers: Optional[dict] = None,
+    json_factory: Optional[Callable[[int], dict]] = None,
+    expected_status: int = 200,
+    url_factory: Optional[Callable[[int], str]] = None,
+    headers_factory: Optional[Callable[[int], dict]] = None
+) -> dict:
+    """
+    Fire total_requests at url with at most concurrency in flight.
+    url_factory/headers_factory override the url and add headers per request.
+    Returns throughput and latency percentiles.
+    """
+    latencies = []
+    errors = []
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency)
+    
+    async with httpx.AsyncClient(headers=headers, limits=limits, timeout=120) as client:
+        async def one(i: int):
+            async with semaphore:
+                payload = json_factory(i) if json_factory else None
+                request_url = url_factory(i) if url_factory else url
+                request_headers = headers_factory(i) if headers_factory else None
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, request_url, json=payload, headers=request_headers)
+                    if response.status_code != expected_status:
+                        errors.append(response.status_code)
+                except httpx.HTTPError as e:
+                    errors.append(type(e).__name__)
+                latencies.append(time.perf_counter() - start)
+        
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total_requests)))
+        elapsed = time.perf_counter() - start
+    
+    latencies.sort()
+    return {
+        "requests": total_requests,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "elapsed": elapsed,
+        "throughput": total_requests / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000
+    }
+
+
+def print_report(title: str, result: dict):
+    """Pretty print a run_load result"""
+    print("=" * 60)
+    print(title)
+    print("=" * 60)
+    print(f"Requests:     {result['requests']} (concurrency {result['concurrency']})")
+    print(f"Errors:       {result['errors']}")
+    print(f"Elapsed:      {result['elapsed']:.2f}s")
+    print(f"Throughput:   {result['throughput']:.1f} req/s")
+    print(f"Latency p50:  {result['p50_ms']:.1f} ms")
+    print(f"Latency p99:  {result['p99_ms']:.1f} ms")
+    print("=" * 60)
@@ -0,0 +1,53 @@
+-- Benchmark seed: 50 skills, 5,000 students, 100,000 completed test sessions
+-- Run in the Supabase SQL Editor against a NON-production project, after
+-- migrations/materialize_student_leaderboard.sql and migrations/leaderboard_all_rpc.sql.
+-- Then run: python benchmarks/bench_leaderboard_all.py
+
+INSERT INTO skills_master (skill_name, skill_category, difficulty_level, description)
+SELECT 'Bench Skill ' || lpad(g::TEXT, 2, '0'), 'Programming', 'Intermediate', 'Benchmark skill'
+FROM generate_series(1, 50) g
+ON CONFLICT (skill_name) DO NOTHING;
+
+INSERT INTO users (email, password_hash, user_role, account_status)
+SELECT 'bench.student' || g || '@bench.test', 'not-a-real-hash', 'Student', 'Active'
+FROM generate_series(1, 5000) g
+ON CONFLICT (email) DO NOTHING;
+
+INSERT INTO student_profiles (student_id, first_name, last_name, address)
+SELECT user_id, 'Bench', 'Student' || split_part(split_part(email, '@', 1), 'student', 2),
+       '{"country": "India"}'::JSONB
+FROM users WHERE email LIKE 'bench.student%@bench.test'
+ON CONFLICT (student_id) DO NOTHING;
+
+WITH bench_users AS (
+    SELECT user_id, ROW_NUMBER() OVER (ORDER BY user_id) AS n FROM users
+    WHERE email LIKE 'bench.student%@bench.test'
+), bench_skills AS (
+    SELECT skill_id, ROW_NUMBER() OVER (ORDER BY skill_id) AS n FROM skills_master
+    WHERE skill_name LIKE 'Bench Skill %'
+), attempts AS (
+    SELECT (g % 5000) + 1 AS user_n, (g % 50) + 1 AS skill_n,
+           floor(random() * 31)::INTEGER AS obtained
+    FROM generate_series(1, 100000) g
+)
+INSERT INTO test_sessions (user_id, skill_id, is_proctored, status, started_at, completed_at,
+                           total_questions, total_score, obtained_score, percentage, verification_status)
+SELECT bu.user_id, bs.skill_id, FALSE, 'Completed',
+       NOW() - INTERVAL '1 hour', NOW() - (random() * INTERVAL '45 minutes'),
+       30, 30, a.obtained, ROUND(a.obtained / 30.0 * 100, 2),
+       CASE WHEN a.obtained / 30.0 * 100 >= 70 THEN 'Verified' ELSE 'Failed' END
+FROM attempts a
+JOIN bench_users bu ON bu.n = a.user_n
+JOIN bench_skills bs ON bs.n = a.skill_n;
+
+-- Materialize best scores, exactly as submit_test would have done one at a time
+SELECT upsert_student_leaderboard(ts.user_id, ts.skill_id, ts.session_id, ts.percentage,
+                                  ts.obtained_score, ts.verification_status, ts.completed_at)
+FROM test_sessions ts
+JOIN users u ON u.user_id = ts.user_id
+WHERE u.email LIKE 'bench.student%@bench.test'
+ORDER BY ts.completed_at;
+
+-- Cleanup (run when finished):
+-- DELETE FROM users WHERE email LIKE 'bench.student%@bench.test';
+-- DELETE FROM skills_master WHERE skill_name LIKE 'Bench Skill %';
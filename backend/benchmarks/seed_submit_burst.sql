@@ -0,0 +1,77 @@
+-- Benchmark seed: 500 students with an InProgress test at the 45-minute deadline
+-- Run in the Supabase SQL Editor against a NON-production project, after
+-- migrations/finalize_test_session_rpc.sql. Each session has 30 answers and a
+-- few proctoring violations. Then export the sessions (last query below) as
+-- CSV and run: python benchmarks/bench_submit_burst.py --sessions-file burst_sessions.csv
+
+INSERT INTO skills_master (skill_name, skill_category, difficulty_level, description)
+VALUES ('Bench Submit Skill', 'Programming', 'Intermediate', 'Benchmark skill')
+ON CONFLICT (skill_name) DO NOTHING;
+
+INSERT INTO users (email, password_hash, user_role, account_status)
+SELECT 'bench.student' || g || '@bench.test', 'not-a-real-hash', 'Student', 'Active'
+FROM generate_series(1, 500) g
+ON CONFLICT (email) DO NOTHING;
+
+INSERT INTO student_profiles (student_id, first_name, last_name, address)
+SELECT user_id, 'Bench', 'Student' || split_part(split_part(email, '@', 1), 'student', 2),
+       '{"country": "India"}'::JSONB
+FROM users WHERE email LIKE 'bench.student%@bench.test'
+ON CONFLICT (student_id) DO NOTHING;
+
+INSERT INTO user_skills (user_id, skill_id, proficiency_level)
+SELECT u.user_id, sm.skill_id, 'Intermediate'
+FROM users u, skills_master sm
+WHERE u.email LIKE 'bench.student%@bench.test' AND sm.skill_name = 'Bench Submit Skill'
+ON CONFLICT (user_id, skill_id) DO NOTHING;
+
+INSERT INTO test_questions (skill_id, question_type, difficulty_level, question_text, options, correct_answer, points)
+SELECT sm.skill_id, 'MCQ', (ARRAY['Easy', 'Medium', 'Hard'])[(g % 3) + 1],
+       'Bench question ' || g, '[{"option_id": "A", "option_text": "A"}, {"option_id": "B", "option_text": "B"}]'::JSONB,
+       'A', 1
+FROM skills_master sm, generate_series(1, 30) g
+WHERE sm.skill_name = 'Bench Submit Skill'
+  AND NOT EXISTS (SELECT 1 FROM test_questions tq WHERE tq.skill_id = sm.skill_id);
+
+INSERT INTO test_sessions (user_id, skill_id, is_proctored, status, started_at, total_questions, total_score)
+SELECT us.user_id, us.skill_id, TRUE, 'InProgress', NOW() - INTERVAL '45 minutes', 30, 30
+FROM user_skills us
+JOIN users u ON u.user_id = us.user_id
+JOIN skills_master sm ON sm.skill_id = us.skill_id
+WHERE u.email LIKE 'bench.student%@bench.test' AND sm.skill_name = 'Bench Submit Skill'
+  AND NOT EXISTS (SELECT 1 FROM test_sessions ts WHERE ts.user_id = us.user_id AND ts.skill_id = us.skill_id);
+
+INSERT INTO test_answers (session_id, question_id, user_id, answer, is_correct, points_earned, time_taken_seconds)
+SELECT a.session_id, a.question_id, a.user_id, a.answer, a.answer = 'A',
+       CASE WHEN a.answer = 'A' THEN 1 ELSE 0 END, 60
+FROM (
+    SELECT ts.session_id, tq.question_id, ts.user_id,
+           CASE WHEN random() < 0.75 THEN 'A' ELSE 'B' END AS answer
+    FROM test_sessions ts
+    JOIN skills_master sm ON sm.skill_id = ts.skill_id AND sm.skill_name = 'Bench Submit Skill'
+    JOIN test_questions tq ON tq.skill_id = ts.skill_id
+    WHERE ts.status = 'InProgress'
+) a
+ON CONFLICT (session_id, question_id) DO NOTHING;
+
+INSERT INTO proctoring_violations (session_id, user_id, violation_type, severity)
+SELECT ts.session_id, ts.user_id, 'TabSwitch', 'Low'
+FROM test_sessions ts
+JOIN skills_master sm ON sm.skill_id = ts.skill_id AND sm.skill_name = 'Bench Submit Skill',
+generate_series(1, 3)
+WHERE ts.status = 'InProgress';
+
+-- Export as burst_sessions.csv (header: user_id,session_id)
+SELECT ts.user_id, ts.session_id
+FROM test_sessions ts
+JOIN skills_master sm ON sm.skill_id = ts.skill_id
+WHERE sm.skill_name = 'Bench Submit Skill' AND ts.status = 'InProgress';
+
+-- Reset between runs:
+-- UPDATE test_sessions ts SET status = 'InProgress', completed_at = NULL, obtained_score = NULL,
+--        percentage = NULL, verification_status = 'Unverified'
+-- FROM skills_master sm WHERE sm.skill_id = ts.skill_id AND sm.skill_name = 'Bench Submit Skill';
+
+-- Cleanup (run when finished):
+-- DELETE FROM users WHERE email LIKE 'bench.student%@bench.test';
+-- DELETE FROM skills_master WHERE skill_name = 'Bench Submit Skill';
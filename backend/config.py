@@ -12,13 +12,64 @@ class Settings(BaseSettings):
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    refresh_token_expire_days: int = 14
+    refresh_token_grace_seconds: int = 30  # A just-rotated token still yields its successor
+    jwt_backend: str = "jose"  # jose (python-jose) or pyjwt
+    token_cache_max_entries: int = 50000  # Verified tokens kept per worker
+    
+    # Password Hashing Configuration
+    bcrypt_rounds: int = 12  # Changing it re-hashes passwords on their next login
+    password_hash_workers: int = 4
+    password_hash_max_queue: int = 64  # Waiting operations before auth requests get 503
+    password_hash_bulk_workers: int = 0  # Bulk registration hashing threads; 0 = one per CPU core
     
     # Google AI Configuration
     google_api_key: Optional[str] = None
     
+    # Cache Configuration
+    skill_catalog_ttl_seconds: int = 300
+    skill_catalog_check_interval_seconds: int = 30  # How often skill_catalog_version is read
+    answer_key_cache_ttl_seconds: int = 7200
+    answer_key_cache_max_sessions: int = 10000
+    question_pool_check_interval_seconds: int = 30
+    user_info_cache_ttl_seconds: int = 300
+    user_info_cache_max_users: int = 10000
+    redis_url: Optional[str] = None  # Shared cache backend; in-process cache when unset
+    
+    # Test Deadline Configuration
+    test_deadline_grace_seconds: int = 60  # Allowance for in-flight submits after the time limit
+    test_deadline_batch_size: int = 200
+    test_deadline_sweep_interval_seconds: int = 300
+    
+    # Proctoring Event Configuration
+    proctoring_flush_interval_ms: int = 500
+    proctoring_flush_max_events: int = 500
+    proctoring_rate_limit_per_second: float = 2.0
+    proctoring_rate_limit_burst: int = 20
+    proctoring_session_check_seconds: int = 30
+    proctoring_ws_frame_queue_size: int = 2  # Frames waiting for verification before the oldest is dropped
+    proctoring_ws_idle_timeout_seconds: int = 60
+    reference_face_cache_max_users: int = 5000
+    reference_face_cache_ttl_seconds: int = 3600
+    
+    # Face Verification Engine Configuration
+    face_verification_backend: str = "disabled"  # disabled, reference or deepface
+    face_verification_workers: int = 2
+    face_verification_max_batch_size: int = 16
+    face_verification_batch_window_ms: int = 10
+    face_verification_max_queue: int = 256
+    face_check_policy: str = "adaptive"  # adaptive or fixed
+    face_check_base_seconds: int = 30
+    face_check_min_seconds: int = 5
+    face_check_max_seconds: int = 600
+    
+    # Candidate Matching Configuration
+    candidate_match_top_k: int = 50
+    
     # Application Configuration
     app_name: str = "Technicia Platform"
     debug: bool = True
+    ops_api_key: Optional[str] = None  # X-Ops-Key for the internal */stats endpoints; they 404 when unset
     
     model_config = SettingsConfigDict(
         env_file=".env",
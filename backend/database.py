@@ -1,4 +1,4 @@
-from supabase import create_client, Client
+from supabase import create_client, Client, AsyncClient
 from config import settings
 
 # Initialize Supabase client
@@ -7,6 +7,10 @@ supabase: Client = create_client(settings.supabase_url, settings.supabase_key)
 # Service role client for admin operations (bypasses RLS)
 supabase_admin: Client = create_client(settings.supabase_url, settings.supabase_service_key)
 
+# Async service role client for use inside async route handlers.
+# Queries are awaited on the event loop instead of blocking it on network I/O.
+async_supabase_admin: AsyncClient = AsyncClient(settings.supabase_url, settings.supabase_service_key)
+
 
 def get_supabase() -> Client:
     """Dependency to get Supabase client"""
@@ -16,3 +20,8 @@ def get_supabase() -> Client:
 def get_supabase_admin() -> Client:
     """Dependency to get Supabase admin client"""
     return supabase_admin
+
+
+def get_async_supabase_admin() -> AsyncClient:
+    """Dependency to get async Supabase admin client"""
+    return async_supabase_admin
@@ -1,13 +1,49 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from config import settings
 from routes import auth_router, student_router, skills_router, profile_router, proctoring_router, test_router, leaderboard_router, jobs_router
+from routes.test import TEST_DURATION_MINUTES, PASSING_PERCENTAGE, MAX_PROCTORING_VIOLATIONS
+from database import async_supabase_admin
+from utils.job_catalog import job_catalog
+from utils.deadline_scheduler import deadline_scheduler
+from utils.proctoring_events import proctoring_events
+from utils.reference_faces import reference_faces
+from utils.face_engine import face_engine
+from utils.password_hashing import password_hasher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: parse the job feed once, then reload it in the background when it changes
+    job_catalog.load()
+    job_catalog.start()
+    # Write-behind buffer for proctoring violations
+    proctoring_events.start(async_supabase_admin)
+    # Face verification worker processes (no-op when the backend is disabled)
+    face_engine.start()
+    # Auto-submit or abandon sessions that run past the time limit
+    deadline_scheduler.start(
+        async_supabase_admin,
+        duration_minutes=TEST_DURATION_MINUTES,
+        passing_percentage=PASSING_PERCENTAGE,
+        max_violations=MAX_PROCTORING_VIOLATIONS
+    )
+    yield
+    await deadline_scheduler.stop()
+    await job_catalog.stop()
+    await proctoring_events.stop()
+    await reference_faces.close()
+    await face_engine.stop()
+    password_hasher.shutdown()
+
 
 app = FastAPI(
     title=settings.app_name,
     description="AI-Powered Education & Career Readiness Platform API",
     version="1.0.0",
-    debug=settings.debug
+    debug=settings.debug,
+    lifespan=lifespan
 )
 
 # CORS Configuration
@@ -0,0 +1,53 @@
+"""
+Batch Candidate Matching
+
+Ranks every student with verified skills against open job postings and saves
+the top candidates per posting into recommended_candidates. Intended to run
+on a schedule (e.g. nightly cron) and after bulk skill verification.
+
+Usage:
+    python match_candidates.py
+    python match_candidates.py --job-id <uuid> --job-id <uuid> --top-k 100
+    python match_candidates.py --include-unverified --weight-verification --dry-run
+"""
+
+import argparse
+import asyncio
+
+from config import settings
+from database import async_supabase_admin
+from utils.candidate_matching import run_candidate_matching
+
+
+async def main(args: argparse.Namespace):
+    result = await run_candidate_matching(
+        async_supabase_admin,
+        job_ids=args.job_id,
+        top_k=args.top_k,
+        verified_only=not args.include_unverified,
+        weight_by_proficiency=args.weight_proficiency,
+        weight_by_verification=args.weight_verification,
+        save=not args.dry_run
+    )
+    
+    print(f"Jobs matched:          {result['jobs_matched']}")
+    print(f"Students considered:   {result['students_considered']}")
+    print(f"Recommendations saved: {result['recommendations_saved']}")
+    print(f"Elapsed:               {result['elapsed_ms']} ms")
+    
+    if args.dry_run:
+        for job_id, candidates in result["rankings"].items():
+            print(f"\n{job_id}")
+            for rank, candidate in enumerate(candidates[:10], start=1):
+                print(f"  {rank:>3}. {candidate['student_id']}  {candidate['match_score']:>6}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank students against open job postings")
+    parser.add_argument("--job-id", action="append", help="Only match this posting (repeatable)")
+    parser.add_argument("--top-k", type=int, default=settings.candidate_match_top_k, help="Candidates kept per posting")
+    parser.add_argument("--include-unverified", action="store_true", help="Also use unverified skills")
+    parser.add_argument("--weight-proficiency", action="store_true", help="Weight skills by proficiency level")
+    parser.add_argument("--weight-verification", action="store_true", help="Weight skills by verification status")
+    parser.add_argument("--dry-run", action="store_true", help="Print rankings without saving them")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,45 @@
+-- Migration: Batch expiry of timed-out test sessions
+-- Date: 2026-10-17
+-- Description: expire_test_sessions() closes a batch of sessions whose deadline
+--              passed, in one call. Sessions with at least one answer are scored
+--              exactly like a submit (finalize_test_session); sessions without
+--              answers are marked Abandoned. Sessions that are no longer
+--              InProgress are skipped. Returns the new status of each expired
+--              session. Requires finalize_test_session_rpc.sql.
+
+CREATE OR REPLACE FUNCTION expire_test_sessions(
+    p_session_ids UUID[],
+    p_passing_percentage NUMERIC DEFAULT 70,
+    p_max_violations INTEGER DEFAULT 5
+)
+RETURNS TABLE (
+    session_id UUID,
+    status VARCHAR
+) AS $$
+DECLARE
+    v_session_id UUID;
+BEGIN
+    -- Lock in a fixed order so concurrent expiries of overlapping batches cannot deadlock
+    FOR v_session_id IN
+        SELECT ts.session_id
+        FROM test_sessions ts
+        WHERE ts.session_id = ANY(p_session_ids) AND ts.status = 'InProgress'
+        ORDER BY ts.session_id
+        FOR UPDATE
+    LOOP
+        IF EXISTS (SELECT 1 FROM test_answers ta WHERE ta.session_id = v_session_id) THEN
+            PERFORM finalize_test_session(v_session_id, NULL, p_passing_percentage, p_max_violations);
+            status := 'Completed';
+        ELSE
+            UPDATE test_sessions ts SET
+                status = 'Abandoned',
+                completed_at = NOW()
+            WHERE ts.session_id = v_session_id;
+            status := 'Abandoned';
+        END IF;
+
+        session_id := v_session_id;
+        RETURN NEXT;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,117 @@
+-- Migration: Transactional test submission
+-- Date: 2026-10-17
+-- Description: finalize_test_session() scores a session from its answers, counts
+--              proctoring violations, completes the session, verifies the user's
+--              skill on a pass and updates the materialized leaderboard, all in one
+--              transaction, and returns the result row. Replaces the five to six
+--              separate reads and writes submit_test used to make.
+--              p_user_id NULL skips the ownership check (server-side auto-submit).
+--              On a failed check it returns a single row with only `error` set:
+--              'session_not_found', 'already_submitted' (Completed) or
+--              'not_in_progress' (NotStarted or Abandoned; nothing is written).
+--              Requires materialize_student_leaderboard.sql.
+
+CREATE OR REPLACE FUNCTION finalize_test_session(
+    p_session_id UUID,
+    p_user_id UUID DEFAULT NULL,
+    p_passing_percentage NUMERIC DEFAULT 70,
+    p_max_violations INTEGER DEFAULT 5
+)
+RETURNS TABLE (
+    session_id UUID,
+    user_id UUID,
+    skill_id UUID,
+    total_questions INTEGER,
+    correct_answers INTEGER,
+    obtained_score INTEGER,
+    total_score INTEGER,
+    percentage NUMERIC,
+    status VARCHAR,
+    verification_status VARCHAR,
+    started_at TIMESTAMP WITH TIME ZONE,
+    completed_at TIMESTAMP WITH TIME ZONE,
+    proctoring_violations INTEGER,
+    error TEXT
+) AS $$
+DECLARE
+    v_session test_sessions%ROWTYPE;
+    v_obtained INTEGER;
+    v_correct INTEGER;
+    v_violations INTEGER;
+    v_percentage NUMERIC;
+    v_verification VARCHAR(20);
+    v_completed_at TIMESTAMP WITH TIME ZONE := NOW();
+BEGIN
+    -- Row lock: a concurrent submit of the same session waits, then sees Completed
+    SELECT ts.* INTO v_session
+    FROM test_sessions ts
+    WHERE ts.session_id = p_session_id
+      AND (p_user_id IS NULL OR ts.user_id = p_user_id)
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT NULL::UUID, NULL::UUID, NULL::UUID, NULL::INTEGER, NULL::INTEGER,
+            NULL::INTEGER, NULL::INTEGER, NULL::NUMERIC, NULL::VARCHAR, NULL::VARCHAR,
+            NULL::TIMESTAMPTZ, NULL::TIMESTAMPTZ, NULL::INTEGER, 'session_not_found'::TEXT;
+        RETURN;
+    END IF;
+
+    IF v_session.status = 'Completed' THEN
+        RETURN QUERY SELECT NULL::UUID, NULL::UUID, NULL::UUID, NULL::INTEGER, NULL::INTEGER,
+            NULL::INTEGER, NULL::INTEGER, NULL::NUMERIC, NULL::VARCHAR, NULL::VARCHAR,
+            NULL::TIMESTAMPTZ, NULL::TIMESTAMPTZ, NULL::INTEGER, 'already_submitted'::TEXT;
+        RETURN;
+    END IF;
+
+    -- Only a started, still open session can be scored: a NotStarted one has no
+    -- started_at, and an Abandoned one already ran past its deadline
+    IF v_session.status IS DISTINCT FROM 'InProgress' THEN
+        RETURN QUERY SELECT NULL::UUID, NULL::UUID, NULL::UUID, NULL::INTEGER, NULL::INTEGER,
+            NULL::INTEGER, NULL::INTEGER, NULL::NUMERIC, NULL::VARCHAR, NULL::VARCHAR,
+            NULL::TIMESTAMPTZ, NULL::TIMESTAMPTZ, NULL::INTEGER, 'not_in_progress'::TEXT;
+        RETURN;
+    END IF;
+
+    SELECT COALESCE(SUM(ta.points_earned), 0), COUNT(*) FILTER (WHERE ta.is_correct)
+    INTO v_obtained, v_correct
+    FROM test_answers ta
+    WHERE ta.session_id = p_session_id;
+
+    SELECT COUNT(*) INTO v_violations
+    FROM proctoring_violations pv
+    WHERE pv.session_id = p_session_id;
+
+    v_percentage := CASE WHEN v_session.total_score > 0
+        THEN v_obtained::NUMERIC / v_session.total_score * 100
+        ELSE 0 END;
+
+    v_verification := CASE WHEN v_percentage >= p_passing_percentage THEN 'Verified' ELSE 'Failed' END;
+    IF v_session.is_proctored AND v_violations > p_max_violations THEN
+        v_verification := 'Failed';
+    END IF;
+
+    UPDATE test_sessions ts SET
+        status = 'Completed',
+        completed_at = v_completed_at,
+        obtained_score = v_obtained,
+        percentage = v_percentage,
+        verification_status = v_verification
+    WHERE ts.session_id = p_session_id;
+
+    IF v_verification = 'Verified' THEN
+        UPDATE user_skills us SET verification_status = 'Verified'
+        WHERE us.user_id = v_session.user_id AND us.skill_id = v_session.skill_id;
+    END IF;
+
+    PERFORM upsert_student_leaderboard(
+        v_session.user_id, v_session.skill_id, p_session_id, ROUND(v_percentage, 2),
+        v_obtained, v_verification, v_completed_at
+    );
+
+    RETURN QUERY SELECT p_session_id, v_session.user_id, v_session.skill_id,
+        v_session.total_questions, v_correct, v_obtained, v_session.total_score,
+        ROUND(v_percentage, 2), 'Completed'::VARCHAR, v_verification,
+        COALESCE(v_session.started_at, v_session.created_at), v_completed_at,
+        v_violations, NULL::TEXT;
+END;
+$$ LANGUAGE plpgsql;
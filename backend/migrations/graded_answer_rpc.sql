@@ -0,0 +1,63 @@
+-- Migration: Save answers graded by the API
+-- Date: 2026-10-17
+-- Description: save_graded_test_answer() is submit_test_answer() without the
+--              question lookup: the API grades from its cached session answer key
+--              and passes is_correct/points_earned in. It still validates session
+--              ownership and status, and upserts on (session_id, question_id).
+--              Requires submit_answer_rpc.sql (used when the answer key is not cached).
+
+CREATE OR REPLACE FUNCTION save_graded_test_answer(
+    p_session_id UUID,
+    p_user_id UUID,
+    p_question_id UUID,
+    p_answer TEXT,
+    p_is_correct BOOLEAN,
+    p_points_earned INTEGER,
+    p_time_taken_seconds INTEGER DEFAULT NULL
+)
+RETURNS TABLE (
+    answer_id UUID,
+    is_correct BOOLEAN,
+    points_earned INTEGER,
+    error TEXT
+) AS $$
+DECLARE
+    v_status VARCHAR(20);
+    v_answer_id UUID;
+BEGIN
+    -- Share lock: concurrent answers proceed, submit/abandon waits for them
+    SELECT ts.status INTO v_status
+    FROM test_sessions ts
+    WHERE ts.session_id = p_session_id AND ts.user_id = p_user_id
+    FOR SHARE;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT NULL::UUID, NULL::BOOLEAN, NULL::INTEGER, 'session_not_found'::TEXT;
+        RETURN;
+    END IF;
+
+    IF v_status <> 'InProgress' THEN
+        RETURN QUERY SELECT NULL::UUID, NULL::BOOLEAN, NULL::INTEGER, 'session_not_in_progress'::TEXT;
+        RETURN;
+    END IF;
+
+    INSERT INTO test_answers AS ta (
+        session_id, question_id, user_id, answer, is_correct,
+        points_earned, time_taken_seconds, submitted_at
+    )
+    VALUES (
+        p_session_id, p_question_id, p_user_id, p_answer, p_is_correct,
+        COALESCE(p_points_earned, 0), p_time_taken_seconds, NOW()
+    )
+    ON CONFLICT (session_id, question_id) DO UPDATE SET
+        user_id = EXCLUDED.user_id,
+        answer = EXCLUDED.answer,
+        is_correct = EXCLUDED.is_correct,
+        points_earned = EXCLUDED.points_earned,
+        time_taken_seconds = EXCLUDED.time_taken_seconds,
+        submitted_at = EXCLUDED.submitted_at
+    RETURNING ta.answer_id INTO v_answer_id;
+
+    RETURN QUERY SELECT v_answer_id, p_is_correct, COALESCE(p_points_earned, 0), NULL::TEXT;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,57 @@
+-- Migration: Cross-skill leaderboard in a single round-trip
+-- Date: 2026-10-17
+-- Description: get_all_leaderboards() returns the top p_limit students per skill,
+--              ranked by their best score, with profile and user columns joined in.
+--              Requires materialize_student_leaderboard.sql.
+
+CREATE OR REPLACE FUNCTION get_all_leaderboards(
+    p_role TEXT DEFAULT 'Student',
+    p_limit INTEGER DEFAULT 100
+)
+RETURNS TABLE (
+    student_id UUID,
+    skill_id UUID,
+    skill_name TEXT,
+    skill_score NUMERIC,
+    best_obtained_score INTEGER,
+    best_verification_status TEXT,
+    best_completed_at TIMESTAMP WITH TIME ZONE,
+    first_name TEXT,
+    last_name TEXT,
+    address JSONB,
+    profile_picture_url TEXT,
+    email TEXT,
+    user_role TEXT
+) AS $$
+    SELECT
+        top.student_id,
+        sm.skill_id,
+        sm.skill_name::TEXT,
+        top.skill_score,
+        top.best_obtained_score,
+        top.best_verification_status::TEXT,
+        top.best_completed_at,
+        top.first_name::TEXT,
+        top.last_name::TEXT,
+        top.address,
+        top.profile_picture_url::TEXT,
+        top.email::TEXT,
+        top.user_role::TEXT
+    FROM skills_master sm
+    -- Walks idx_student_leaderboard_keyset once per skill, stopping after p_limit rows
+    CROSS JOIN LATERAL (
+        SELECT
+            sl.student_id, sl.skill_score, sl.best_obtained_score,
+            sl.best_verification_status, sl.best_completed_at,
+            sp.first_name, sp.last_name, sp.address, sp.profile_picture_url,
+            u.email, u.user_role
+        FROM student_leaderboard sl
+        JOIN users u ON u.user_id = sl.student_id
+        JOIN student_profiles sp ON sp.student_id = sl.student_id
+        WHERE sl.skill_id = sm.skill_id
+          AND u.user_role::TEXT = p_role
+        ORDER BY sl.skill_score DESC, sl.student_id
+        LIMIT p_limit
+    ) top
+    ORDER BY top.skill_score DESC, top.student_id;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,99 @@
+-- Migration: Materialize per-skill student leaderboard
+-- Date: 2026-10-17
+-- Description: Store each student's best test result per skill in student_leaderboard
+--              so leaderboard reads no longer scan test_sessions. submit_test keeps
+--              the table current through upsert_student_leaderboard().
+
+-- Columns needed to serve a leaderboard row without touching test_sessions
+ALTER TABLE student_leaderboard ADD COLUMN IF NOT EXISTS best_session_id UUID;
+ALTER TABLE student_leaderboard ADD COLUMN IF NOT EXISTS best_obtained_score INTEGER DEFAULT 0;
+ALTER TABLE student_leaderboard ADD COLUMN IF NOT EXISTS best_verification_status VARCHAR(20) DEFAULT 'Unverified';
+ALTER TABLE student_leaderboard ADD COLUMN IF NOT EXISTS best_completed_at TIMESTAMP WITH TIME ZONE;
+
+-- Keyset pagination index: (skill_score DESC, student_id) is the leaderboard order
+CREATE INDEX IF NOT EXISTS idx_student_leaderboard_keyset
+    ON student_leaderboard(skill_id, skill_score DESC, student_id);
+
+-- Record a completed test session; keeps the best percentage per (student, skill).
+-- skill_score holds the best percentage. Ties keep the earlier result.
+CREATE OR REPLACE FUNCTION upsert_student_leaderboard(
+    p_student_id UUID,
+    p_skill_id UUID,
+    p_session_id UUID,
+    p_percentage NUMERIC,
+    p_obtained_score INTEGER,
+    p_verification_status VARCHAR,
+    p_completed_at TIMESTAMP WITH TIME ZONE
+)
+RETURNS void AS $$
+BEGIN
+    INSERT INTO student_leaderboard (
+        student_id, skill_id, skill_score, total_assessments_taken, average_score,
+        best_session_id, best_obtained_score, best_verification_status, best_completed_at,
+        last_updated
+    )
+    VALUES (
+        p_student_id, p_skill_id, p_percentage, 1, p_percentage,
+        p_session_id, p_obtained_score, p_verification_status, p_completed_at,
+        CURRENT_TIMESTAMP
+    )
+    ON CONFLICT (student_id, skill_id) DO UPDATE SET
+        best_session_id = CASE WHEN EXCLUDED.skill_score > student_leaderboard.skill_score
+            THEN EXCLUDED.best_session_id ELSE student_leaderboard.best_session_id END,
+        best_obtained_score = CASE WHEN EXCLUDED.skill_score > student_leaderboard.skill_score
+            THEN EXCLUDED.best_obtained_score ELSE student_leaderboard.best_obtained_score END,
+        best_verification_status = CASE WHEN EXCLUDED.skill_score > student_leaderboard.skill_score
+            THEN EXCLUDED.best_verification_status ELSE student_leaderboard.best_verification_status END,
+        best_completed_at = CASE WHEN EXCLUDED.skill_score > student_leaderboard.skill_score
+            THEN EXCLUDED.best_completed_at ELSE student_leaderboard.best_completed_at END,
+        skill_score = GREATEST(student_leaderboard.skill_score, EXCLUDED.skill_score),
+        average_score = (
+            COALESCE(student_leaderboard.average_score, 0) * student_leaderboard.total_assessments_taken
+            + EXCLUDED.skill_score
+        ) / (student_leaderboard.total_assessments_taken + 1),
+        total_assessments_taken = student_leaderboard.total_assessments_taken + 1,
+        last_updated = CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Backfill from existing completed sessions
+INSERT INTO student_leaderboard (
+    student_id, skill_id, skill_score, total_assessments_taken, average_score,
+    best_session_id, best_obtained_score, best_verification_status, best_completed_at,
+    last_updated
+)
+SELECT
+    best.user_id,
+    best.skill_id,
+    COALESCE(best.percentage, 0),
+    agg.attempts,
+    agg.avg_percentage,
+    best.session_id,
+    COALESCE(best.obtained_score, 0),
+    best.verification_status,
+    best.completed_at,
+    CURRENT_TIMESTAMP
+FROM (
+    SELECT DISTINCT ON (ts.user_id, ts.skill_id)
+        ts.user_id, ts.skill_id, ts.session_id, ts.percentage,
+        ts.obtained_score, ts.verification_status, ts.completed_at
+    FROM test_sessions ts
+    JOIN student_profiles sp ON sp.student_id = ts.user_id
+    WHERE ts.status = 'Completed'
+    ORDER BY ts.user_id, ts.skill_id, ts.percentage DESC NULLS LAST, ts.completed_at
+) best
+JOIN (
+    SELECT user_id, skill_id, COUNT(*) AS attempts, AVG(percentage) AS avg_percentage
+    FROM test_sessions
+    WHERE status = 'Completed'
+    GROUP BY user_id, skill_id
+) agg ON agg.user_id = best.user_id AND agg.skill_id = best.skill_id
+ON CONFLICT (student_id, skill_id) DO UPDATE SET
+    skill_score = EXCLUDED.skill_score,
+    total_assessments_taken = EXCLUDED.total_assessments_taken,
+    average_score = EXCLUDED.average_score,
+    best_session_id = EXCLUDED.best_session_id,
+    best_obtained_score = EXCLUDED.best_obtained_score,
+    best_verification_status = EXCLUDED.best_verification_status,
+    best_completed_at = EXCLUDED.best_completed_at,
+    last_updated = CURRENT_TIMESTAMP;
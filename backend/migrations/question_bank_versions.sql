@@ -0,0 +1,43 @@
+-- Migration: Question bank version per skill
+-- Date: 2026-10-17
+-- Description: The API keeps an in-memory question pool per skill. Any write to
+--              test_questions (batch_import_questions.py, import_questions.py, manual
+--              edits) bumps the skill's version here, and the API rebuilds a pool
+--              only when its version changed.
+
+CREATE TABLE IF NOT EXISTS question_bank_versions (
+    skill_id UUID PRIMARY KEY REFERENCES skills_master(skill_id) ON DELETE CASCADE,
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION bump_question_bank_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO question_bank_versions (skill_id) VALUES (NEW.skill_id)
+        ON CONFLICT (skill_id) DO UPDATE SET
+            version = question_bank_versions.version + 1,
+            updated_at = NOW();
+    END IF;
+
+    IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.skill_id IS DISTINCT FROM NEW.skill_id) THEN
+        INSERT INTO question_bank_versions (skill_id) VALUES (OLD.skill_id)
+        ON CONFLICT (skill_id) DO UPDATE SET
+            version = question_bank_versions.version + 1,
+            updated_at = NOW();
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bump_question_bank_version ON test_questions;
+CREATE TRIGGER bump_question_bank_version
+    AFTER INSERT OR UPDATE OR DELETE ON test_questions
+    FOR EACH ROW EXECUTE FUNCTION bump_question_bank_version();
+
+-- Backfill for skills that already have questions
+INSERT INTO question_bank_versions (skill_id)
+SELECT DISTINCT skill_id FROM test_questions
+ON CONFLICT (skill_id) DO NOTHING;
@@ -0,0 +1,132 @@
+-- Migration: Refresh tokens
+-- Date: 2026-10-17
+-- Description: Long-lived opaque refresh tokens let clients get a new access token
+--              without a password login (no bcrypt, no users scan). Only the
+--              SHA-256 of a token is stored. rotate_refresh_token() swaps a token
+--              for a new one of the same family in one statement; presenting an
+--              already rotated token revokes the whole family, since it means
+--              the token was copied. Suspended accounts cannot refresh.
+--
+--              Two browser tabs sharing one refresh token can both present it
+--              before either stores the successor. A successor is derived from
+--              its predecessor (HMAC with the server secret, see
+--              utils/refresh_tokens.py), so the second request sends the same
+--              p_new_token_hash. Within p_grace_seconds of the rotation, and while
+--              the successor is still live, that request gets 'rotated' again and
+--              both tabs end up holding the same token. Anything else is reuse.
+
+CREATE TABLE IF NOT EXISTS refresh_tokens (
+    token_hash CHAR(64) PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES users(user_id) ON DELETE CASCADE,
+    family_id UUID NOT NULL,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    revoked_at TIMESTAMP WITH TIME ZONE,
+    replaced_by CHAR(64)
+);
+
+-- For databases that ran this migration before replaced_by existed
+ALTER TABLE refresh_tokens ADD COLUMN IF NOT EXISTS replaced_by CHAR(64);
+
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_family ON refresh_tokens(family_id);
+CREATE INDEX IF NOT EXISTS idx_refresh_tokens_user ON refresh_tokens(user_id);
+
+-- Only the API (service role, which bypasses RLS) may touch token hashes;
+-- with no policies the anon and authenticated REST roles see no rows
+ALTER TABLE refresh_tokens ENABLE ROW LEVEL SECURITY;
+
+DROP FUNCTION IF EXISTS rotate_refresh_token(CHAR(64), CHAR(64), TIMESTAMP WITH TIME ZONE);
+
+CREATE OR REPLACE FUNCTION rotate_refresh_token(
+    p_token_hash CHAR(64),
+    p_new_token_hash CHAR(64),
+    p_expires_at TIMESTAMP WITH TIME ZONE,
+    p_grace_seconds INTEGER DEFAULT 0
+)
+RETURNS TABLE (
+    status VARCHAR,
+    user_id UUID,
+    email VARCHAR,
+    user_role user_role_enum
+) AS $$
+DECLARE
+    v_token refresh_tokens%ROWTYPE;
+    v_account_status account_status_enum;
+    v_concurrent BOOLEAN := FALSE;
+BEGIN
+    SELECT * INTO v_token
+    FROM refresh_tokens rt
+    WHERE rt.token_hash = p_token_hash
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        status := 'invalid';
+        RETURN NEXT;
+        RETURN;
+    END IF;
+
+    IF v_token.revoked_at IS NOT NULL
+       AND v_token.replaced_by = p_new_token_hash
+       AND v_token.revoked_at > NOW() - make_interval(secs => p_grace_seconds) THEN
+        -- Same token rotated moments ago (another tab): hand out the same successor
+        v_concurrent := EXISTS (
+            SELECT 1 FROM refresh_tokens rt
+            WHERE rt.token_hash = p_new_token_hash AND rt.revoked_at IS NULL
+        );
+    END IF;
+
+    IF v_token.revoked_at IS NOT NULL AND NOT v_concurrent THEN
+        -- Reuse of a rotated token: revoke every token of the family
+        UPDATE refresh_tokens rt SET revoked_at = NOW()
+        WHERE rt.family_id = v_token.family_id AND rt.revoked_at IS NULL;
+        status := 'reused';
+        RETURN NEXT;
+        RETURN;
+    END IF;
+
+    IF v_token.expires_at <= NOW() AND NOT v_concurrent THEN
+        status := 'expired';
+        RETURN NEXT;
+        RETURN;
+    END IF;
+
+    SELECT u.email, u.user_role, u.account_status INTO email, user_role, v_account_status
+    FROM users u
+    WHERE u.user_id = v_token.user_id;
+
+    IF v_account_status = 'Suspended' THEN
+        UPDATE refresh_tokens rt SET revoked_at = NOW()
+        WHERE rt.family_id = v_token.family_id AND rt.revoked_at IS NULL;
+        status := 'suspended';
+        email := NULL;
+        user_role := NULL;
+        RETURN NEXT;
+        RETURN;
+    END IF;
+
+    IF NOT v_concurrent THEN
+        UPDATE refresh_tokens rt SET revoked_at = NOW(), replaced_by = p_new_token_hash
+        WHERE rt.token_hash = p_token_hash;
+
+        INSERT INTO refresh_tokens (token_hash, user_id, family_id, expires_at)
+        VALUES (p_new_token_hash, v_token.user_id, v_token.family_id, p_expires_at);
+    END IF;
+
+    status := 'rotated';
+    user_id := v_token.user_id;
+    RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Logout: revoke the family of a token
+CREATE OR REPLACE FUNCTION revoke_refresh_token(p_token_hash CHAR(64))
+RETURNS VOID AS $$
+BEGIN
+    UPDATE refresh_tokens rt SET revoked_at = NOW()
+    WHERE rt.family_id = (SELECT r.family_id FROM refresh_tokens r WHERE r.token_hash = p_token_hash)
+      AND rt.revoked_at IS NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Housekeeping (optional, e.g. daily with pg_cron): drop tokens expired for a week
+-- DELETE FROM refresh_tokens WHERE expires_at < NOW() - INTERVAL '7 days';
@@ -0,0 +1,94 @@
+-- Migration: Atomic user registration
+-- Date: 2026-10-17
+-- Description: register_user() creates the users row and the role's profile row in
+--              one transaction, replacing the email pre-check, the two inserts and
+--              the compensating delete the register endpoints used to issue.
+--              Duplicate emails are caught from the UNIQUE constraint on
+--              users.email (no pre-check, so no race between check and insert).
+--              On a duplicate it returns a single row with only `error` set to
+--              'email_taken'.
+--
+--              register_students() does the same for a whole cohort of students
+--              (bulk registration). Each student is its own subtransaction, so a
+--              duplicate skips that student only; every input row gets a result.
+
+CREATE OR REPLACE FUNCTION register_user(
+    p_email VARCHAR,
+    p_password_hash VARCHAR,
+    p_user_role user_role_enum,
+    p_profile JSONB
+)
+RETURNS TABLE (
+    user_id UUID,
+    email VARCHAR,
+    user_role user_role_enum,
+    error TEXT
+) AS $$
+DECLARE
+    v_user_id UUID;
+BEGIN
+    BEGIN
+        INSERT INTO users (email, password_hash, user_role, account_status, profile_completion_percentage)
+        VALUES (p_email, p_password_hash, p_user_role, 'Pending_Verification', 25)
+        RETURNING users.user_id INTO v_user_id;
+    EXCEPTION WHEN unique_violation THEN
+        error := 'email_taken';
+        RETURN NEXT;
+        RETURN;
+    END;
+
+    IF p_user_role = 'Student' THEN
+        INSERT INTO student_profiles (student_id, first_name, last_name)
+        VALUES (v_user_id, p_profile->>'first_name', p_profile->>'last_name');
+    ELSIF p_user_role = 'Educator' THEN
+        INSERT INTO educator_profiles (educator_id, first_name, last_name, verification_status)
+        VALUES (v_user_id, p_profile->>'first_name', p_profile->>'last_name', 'Pending');
+    ELSE
+        INSERT INTO company_profiles (company_id, company_name, recruiter_contact_name, verification_status)
+        VALUES (v_user_id, p_profile->>'company_name', p_profile->>'recruiter_contact_name', 'Pending');
+    END IF;
+
+    user_id := v_user_id;
+    email := p_email;
+    user_role := p_user_role;
+    RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql;
+
+-- p_students: [{"email", "password_hash", "first_name", "last_name"}, ...]
+CREATE OR REPLACE FUNCTION register_students(p_students JSONB)
+RETURNS TABLE (
+    email VARCHAR,
+    user_id UUID,
+    error TEXT
+) AS $$
+DECLARE
+    v_student JSONB;
+    v_user_id UUID;
+BEGIN
+    FOR v_student IN SELECT * FROM jsonb_array_elements(p_students)
+    LOOP
+        email := v_student->>'email';
+        user_id := NULL;
+        error := NULL;
+
+        BEGIN
+            INSERT INTO users (email, password_hash, user_role, account_status, profile_completion_percentage)
+            VALUES (v_student->>'email', v_student->>'password_hash', 'Student', 'Pending_Verification', 25)
+            RETURNING users.user_id INTO v_user_id;
+
+            INSERT INTO student_profiles (student_id, first_name, last_name)
+            VALUES (v_user_id, v_student->>'first_name', v_student->>'last_name');
+
+            user_id := v_user_id;
+        EXCEPTION
+            WHEN unique_violation THEN
+                error := 'email_taken';
+            WHEN check_violation OR not_null_violation THEN
+                error := 'invalid';
+        END;
+
+        RETURN NEXT;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
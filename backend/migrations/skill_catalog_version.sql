@@ -0,0 +1,39 @@
+-- Migration: Skill catalog version
+-- Date: 2026-10-17
+-- Description: Every API worker caches skills_master in memory (utils/skill_catalog.py).
+--              This single-row table carries a version that any write to
+--              skills_master bumps (statement trigger), and that imports bump
+--              explicitly with bump_skill_catalog_version() (add_missing_skills.sql,
+--              batch_import_questions.py). Workers compare it with the version they
+--              loaded and reload when it changed, so an import shows up within the
+--              check interval instead of after the catalog TTL.
+
+CREATE TABLE IF NOT EXISTS skill_catalog_version (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+INSERT INTO skill_catalog_version (id) VALUES (TRUE)
+ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_skill_catalog_version()
+RETURNS BIGINT AS $$
+    UPDATE skill_catalog_version
+    SET version = version + 1, updated_at = NOW()
+    WHERE id
+    RETURNING version;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION bump_skill_catalog_version_trigger()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM bump_skill_catalog_version();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS bump_skill_catalog_version ON skills_master;
+CREATE TRIGGER bump_skill_catalog_version
+    AFTER INSERT OR UPDATE OR DELETE ON skills_master
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_skill_catalog_version_trigger();
@@ -0,0 +1,86 @@
+-- Migration: Single round-trip answer submission
+-- Date: 2026-10-17
+-- Description: submit_test_answer() validates session ownership and status, grades
+--              MCQ answers and upserts on (session_id, question_id) in one call,
+--              replacing the status check, existing-answer lookup, question fetch
+--              and insert/update that submit_answer used to issue separately.
+--              On a failed check it returns a single row with only `error` set:
+--              'session_not_found', 'session_not_in_progress' or 'question_not_found'.
+
+CREATE OR REPLACE FUNCTION submit_test_answer(
+    p_session_id UUID,
+    p_user_id UUID,
+    p_question_id UUID,
+    p_answer TEXT,
+    p_time_taken_seconds INTEGER DEFAULT NULL
+)
+RETURNS TABLE (
+    answer_id UUID,
+    is_correct BOOLEAN,
+    points_earned INTEGER,
+    error TEXT
+) AS $$
+DECLARE
+    v_status VARCHAR(20);
+    v_question_type VARCHAR(20);
+    v_correct_answer TEXT;
+    v_points INTEGER;
+    v_is_correct BOOLEAN;
+    v_points_earned INTEGER;
+    v_answer_id UUID;
+BEGIN
+    -- Share lock: concurrent answers proceed, submit/abandon waits for them
+    SELECT ts.status INTO v_status
+    FROM test_sessions ts
+    WHERE ts.session_id = p_session_id AND ts.user_id = p_user_id
+    FOR SHARE;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT NULL::UUID, NULL::BOOLEAN, NULL::INTEGER, 'session_not_found'::TEXT;
+        RETURN;
+    END IF;
+
+    IF v_status <> 'InProgress' THEN
+        RETURN QUERY SELECT NULL::UUID, NULL::BOOLEAN, NULL::INTEGER, 'session_not_in_progress'::TEXT;
+        RETURN;
+    END IF;
+
+    SELECT tq.question_type, tq.correct_answer, tq.points
+    INTO v_question_type, v_correct_answer, v_points
+    FROM test_questions tq
+    WHERE tq.question_id = p_question_id;
+
+    IF NOT FOUND THEN
+        RETURN QUERY SELECT NULL::UUID, NULL::BOOLEAN, NULL::INTEGER, 'question_not_found'::TEXT;
+        RETURN;
+    END IF;
+
+    -- Only MCQs are graded automatically; other types stay NULL for manual review
+    IF v_question_type = 'MCQ' THEN
+        v_is_correct := COALESCE(TRIM(p_answer) = TRIM(v_correct_answer), FALSE);
+    ELSE
+        v_is_correct := NULL;
+    END IF;
+
+    v_points_earned := CASE WHEN v_is_correct THEN COALESCE(v_points, 1) ELSE 0 END;
+
+    INSERT INTO test_answers AS ta (
+        session_id, question_id, user_id, answer, is_correct,
+        points_earned, time_taken_seconds, submitted_at
+    )
+    VALUES (
+        p_session_id, p_question_id, p_user_id, p_answer, v_is_correct,
+        v_points_earned, p_time_taken_seconds, NOW()
+    )
+    ON CONFLICT (session_id, question_id) DO UPDATE SET
+        user_id = EXCLUDED.user_id,
+        answer = EXCLUDED.answer,
+        is_correct = EXCLUDED.is_correct,
+        points_earned = EXCLUDED.points_earned,
+        time_taken_seconds = EXCLUDED.time_taken_seconds,
+        submitted_at = EXCLUDED.submitted_at
+    RETURNING ta.answer_id INTO v_answer_id;
+
+    RETURN QUERY SELECT v_answer_id, v_is_correct, v_points_earned, NULL::TEXT;
+END;
+$$ LANGUAGE plpgsql;
@@ -3,12 +3,14 @@ from .user import (
     UserLogin,
     UserResponse,
     StudentRegistration,
+    BulkStudentRegistration,
     EducatorRegistration,
     CompanyRegistration,
     StudentProfileCreate,
     EducatorProfileCreate,
     CompanyProfileCreate,
     Token,
+    RefreshTokenRequest,
     TokenData
 )
 
@@ -17,11 +19,13 @@ __all__ = [
     "UserLogin",
     "UserResponse",
     "StudentRegistration",
+    "BulkStudentRegistration",
     "EducatorRegistration",
     "CompanyRegistration",
     "StudentProfileCreate",
     "EducatorProfileCreate",
     "CompanyProfileCreate",
     "Token",
+    "RefreshTokenRequest",
     "TokenData"
 ]
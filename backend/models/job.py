@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from uuid import UUID
+
+
+# Candidate Matching Models
+class CandidateMatchRequest(BaseModel):
+    job_ids: Optional[List[UUID]] = None  # Defaults to all of the company's open postings
+    top_k: Optional[int] = Field(None, ge=1, le=1000)
+    verified_only: bool = True
+    weight_by_proficiency: bool = False
+    weight_by_verification: bool = False
+    save: bool = True
@@ -109,6 +109,11 @@ class TabSwitchLog(BaseModel):
     switched_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+class ProctoringEventBatch(BaseModel):
+    violations: List[ViolationLog] = Field(default_factory=list, max_length=100)
+    tab_switches: List[TabSwitchLog] = Field(default_factory=list, max_length=100)
+
+
 # Test Results Models
 class TestResult(BaseModel):
     session_id: UUID
@@ -126,6 +131,7 @@ class TestResult(BaseModel):
     completed_at: Optional[datetime]
     duration_minutes: Optional[int]
     proctoring_violations: int = 0
+    created_at: Optional[datetime] = None  # Pagination cursor for /test/history
 
 
 class TestSubmit(BaseModel):
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, field_validator
-from typing import Optional, Literal
+from typing import List, Optional, Literal
 from datetime import datetime
 from uuid import UUID
 
@@ -134,6 +134,10 @@ class EducatorRegistration(BaseModel):
     last_name: str = Field(..., min_length=1, max_length=100)
 
 
+class BulkStudentRegistration(BaseModel):
+    students: List[StudentRegistration] = Field(..., min_length=1, max_length=1000)
+
+
 class CompanyRegistration(BaseModel):
     email: EmailStr
     password: str = Field(..., min_length=8)
@@ -145,6 +149,12 @@ class CompanyRegistration(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None  # Access token lifetime in seconds
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str = Field(..., min_length=1, max_length=200)
 
 
 class TokenData(BaseModel):
@@ -1,76 +1,117 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from database import get_supabase_admin
-from supabase import Client
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Response
+from fastapi.security import HTTPAuthorizationCredentials
+from database import get_async_supabase_admin
+from supabase import AsyncClient
 from models.user import (
     StudentRegistration,
+    BulkStudentRegistration,
     EducatorRegistration,
     CompanyRegistration,
     UserLogin,
     Token,
+    RefreshTokenRequest,
     TokenData,
     UserResponse
 )
 from utils.security import (
-    get_password_hash,
-    verify_password,
+    security,
     create_access_token,
-    get_current_active_user
+    get_current_active_user,
+    require_operator
 )
+from utils.token_cache import VerifiedTokenCache, get_verified_tokens
+from utils.refresh_tokens import RefreshTokenStore, RefreshTokenError, get_refresh_tokens
+from utils.password_hashing import PasswordHasher, PasswordHasherBusy, get_password_hasher
+from utils.user_info_cache import UserInfoCache, get_user_info_cache
 from datetime import timedelta
+from typing import Optional
 from config import settings
+import json
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+# /auth/me: users columns and the role's profile table (embedded) with its columns
+USER_INFO_COLUMNS = "user_id, email, user_role, account_status, profile_completion_percentage, created_at"
+PROFILE_COLUMNS = {
+    "Student": (
+        "student_profiles",
+        "student_id, first_name, last_name, date_of_birth, gender, phone_number, address, bio, "
+        "profile_picture_url, current_education_level, career_goals, preferred_industries, resume_url, "
+        "linkedin_profile, github_profile, portfolio_url, created_at, updated_at"
+    ),
+    "Educator": (
+        "educator_profiles",
+        "educator_id, first_name, last_name, date_of_birth, phone_number, address, bio, "
+        "profile_picture_url, years_of_experience, specialization, teaching_certifications, "
+        "linkedin_profile, verification_status, approval_date, created_at, updated_at"
+    ),
+    "Company": (
+        "company_profiles",
+        "company_id, company_name, industry, company_size, founded_year, headquarters_location, "
+        "company_website, company_description, logo_url, profile_picture_url, recruiter_contact_name, "
+        "recruiter_contact_email, recruiter_contact_phone, verification_status, verification_document_url, "
+        "created_at, updated_at"
+    )
+}
+
+
+async def _create_user(db: AsyncClient, email: str, password_hash: str, user_role: str, profile: dict) -> dict:
+    """Insert a user and its profile in one transaction (register_user RPC)"""
+    response = await db.rpc("register_user", {
+        "p_email": email,
+        "p_password_hash": password_hash,
+        "p_user_role": user_role,
+        "p_profile": profile
+    }).execute()
+    
+    if not response.data:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to create user"
+        )
+    
+    user = response.data[0]
+    if user.get("error") == "email_taken":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    
+    return user
+
+
+async def _issue_refresh_token(refresh_store: RefreshTokenStore, db: AsyncClient, user_id) -> Optional[str]:
+    """New refresh token for a login; None (access token only) if it cannot be stored"""
+    try:
+        return await refresh_store.issue(db, user_id)
+    except Exception as e:
+        print(f"Warning: Failed to issue refresh token: {str(e)}")
+        return None
+
 
 @router.post("/register/student", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def register_student(
     student_data: StudentRegistration,
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    hasher: PasswordHasher = Depends(get_password_hasher),
+    refresh_store: RefreshTokenStore = Depends(get_refresh_tokens)
 ):
     """Register a new student user"""
     try:
-        # Check if user already exists
-        existing_user = db.table("users").select("email").eq("email", student_data.email).execute()
-        if existing_user.data:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered"
-            )
-        
-        # Hash the password
-        hashed_password = get_password_hash(student_data.password)
-        
-        # Create user
-        user_response = db.table("users").insert({
-            "email": student_data.email,
-            "password_hash": hashed_password,
-            "user_role": "Student",
-            "account_status": "Pending_Verification",
-            "profile_completion_percentage": 25
-        }).execute()
-        
-        if not user_response.data:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to create user"
-            )
-        
-        user = user_response.data[0]
-        
-        # Create student profile
-        profile_response = db.table("student_profiles").insert({
-            "student_id": user["user_id"],
-            "first_name": student_data.first_name,
-            "last_name": student_data.last_name
-        }).execute()
-        
-        if not profile_response.data:
-            # Rollback user creation
-            db.table("users").delete().eq("user_id", user["user_id"]).execute()
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to create student profile"
-            )
+        # Hash the password off the event loop
+        hashed_password = await hasher.hash(student_data.password)
+        
+        # Create user and profile atomically; a taken email fails on the unique constraint
+        user = await _create_user(
+            db,
+            student_data.email,
+            hashed_password,
+            "Student",
+            {
+                "first_name": student_data.first_name,
+                "last_name": student_data.last_name
+            }
+        )
         
         # Create access token
         access_token = create_access_token(
@@ -80,17 +121,25 @@ async def register_student(
                 "role": user["user_role"]
             }
         )
+        refresh_token = await _issue_refresh_token(refresh_store, db, user["user_id"])
         
         return {
             "message": "Student registered successfully",
             "user_id": user["user_id"],
             "email": user["email"],
             "access_token": access_token,
+            "refresh_token": refresh_token,
             "token_type": "bearer"
         }
         
     except HTTPException:
         raise
+    except PasswordHasherBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -101,53 +150,26 @@ async def register_student(
 @router.post("/register/educator", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def register_educator(
     educator_data: EducatorRegistration,
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    hasher: PasswordHasher = Depends(get_password_hasher),
+    refresh_store: RefreshTokenStore = Depends(get_refresh_tokens)
 ):
     """Register a new educator user"""
     try:
-        # Check if user already exists
-        existing_user = db.table("users").select("email").eq("email", educator_data.email).execute()
-        if existing_user.data:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered"
-            )
-        
-        # Hash the password
-        hashed_password = get_password_hash(educator_data.password)
-        
-        # Create user
-        user_response = db.table("users").insert({
-            "email": educator_data.email,
-            "password_hash": hashed_password,
-            "user_role": "Educator",
-            "account_status": "Pending_Verification",
-            "profile_completion_percentage": 25
-        }).execute()
-        
-        if not user_response.data:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to create user"
-            )
-        
-        user = user_response.data[0]
-        
-        # Create educator profile
-        profile_response = db.table("educator_profiles").insert({
-            "educator_id": user["user_id"],
-            "first_name": educator_data.first_name,
-            "last_name": educator_data.last_name,
-            "verification_status": "Pending"
-        }).execute()
-        
-        if not profile_response.data:
-            # Rollback user creation
-            db.table("users").delete().eq("user_id", user["user_id"]).execute()
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to create educator profile"
-            )
+        # Hash the password off the event loop
+        hashed_password = await hasher.hash(educator_data.password)
+        
+        # Create user and profile atomically; a taken email fails on the unique constraint
+        user = await _create_user(
+            db,
+            educator_data.email,
+            hashed_password,
+            "Educator",
+            {
+                "first_name": educator_data.first_name,
+                "last_name": educator_data.last_name
+            }
+        )
         
         # Create access token
         access_token = create_access_token(
@@ -157,17 +179,25 @@ async def register_educator(
                 "role": user["user_role"]
             }
         )
+        refresh_token = await _issue_refresh_token(refresh_store, db, user["user_id"])
         
         return {
             "message": "Educator registered successfully",
             "user_id": user["user_id"],
             "email": user["email"],
             "access_token": access_token,
+            "refresh_token": refresh_token,
             "token_type": "bearer"
         }
         
     except HTTPException:
         raise
+    except PasswordHasherBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -178,53 +208,26 @@ async def register_educator(
 @router.post("/register/company", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def register_company(
     company_data: CompanyRegistration,
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    hasher: PasswordHasher = Depends(get_password_hasher),
+    refresh_store: RefreshTokenStore = Depends(get_refresh_tokens)
 ):
     """Register a new company user"""
     try:
-        # Check if user already exists
-        existing_user = db.table("users").select("email").eq("email", company_data.email).execute()
-        if existing_user.data:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered"
-            )
-        
-        # Hash the password
-        hashed_password = get_password_hash(company_data.password)
-        
-        # Create user
-        user_response = db.table("users").insert({
-            "email": company_data.email,
-            "password_hash": hashed_password,
-            "user_role": "Company",
-            "account_status": "Pending_Verification",
-            "profile_completion_percentage": 25
-        }).execute()
-        
-        if not user_response.data:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to create user"
-            )
-        
-        user = user_response.data[0]
-        
-        # Create company profile
-        profile_response = db.table("company_profiles").insert({
-            "company_id": user["user_id"],
-            "company_name": company_data.company_name,
-            "recruiter_contact_name": company_data.recruiter_contact_name,
-            "verification_status": "Pending"
-        }).execute()
-        
-        if not profile_response.data:
-            # Rollback user creation
-            db.table("users").delete().eq("user_id", user["user_id"]).execute()
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to create company profile"
-            )
+        # Hash the password off the event loop
+        hashed_password = await hasher.hash(company_data.password)
+        
+        # Create user and profile atomically; a taken email fails on the unique constraint
+        user = await _create_user(
+            db,
+            company_data.email,
+            hashed_password,
+            "Company",
+            {
+                "company_name": company_data.company_name,
+                "recruiter_contact_name": company_data.recruiter_contact_name
+            }
+        )
         
         # Create access token
         access_token = create_access_token(
@@ -234,17 +237,25 @@ async def register_company(
                 "role": user["user_role"]
             }
         )
+        refresh_token = await _issue_refresh_token(refresh_store, db, user["user_id"])
         
         return {
             "message": "Company registered successfully",
             "user_id": user["user_id"],
             "email": user["email"],
             "access_token": access_token,
+            "refresh_token": refresh_token,
             "token_type": "bearer"
         }
         
     except HTTPException:
         raise
+    except PasswordHasherBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -252,15 +263,75 @@ async def register_company(
         )
 
 
+@router.post("/register/students/bulk", response_model=dict, status_code=status.HTTP_201_CREATED)
+async def register_students_bulk(
+    cohort: BulkStudentRegistration,
+    current_user: TokenData = Depends(get_current_active_user),
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    hasher: PasswordHasher = Depends(get_password_hasher)
+):
+    """
+    Register a cohort of students at once (institution onboarding)
+    Passwords are hashed in parallel on every core and all accounts are
+    created in one call. Emails already registered are reported per student.
+    """
+    try:
+        if current_user.user_role != "Educator":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only educators can register students in bulk"
+            )
+        
+        hashes = await hasher.hash_many([student.password for student in cohort.students])
+        
+        response = await db.rpc("register_students", {
+            "p_students": [
+                {
+                    "email": student.email,
+                    "password_hash": password_hash,
+                    "first_name": student.first_name,
+                    "last_name": student.last_name
+                }
+                for student, password_hash in zip(cohort.students, hashes)
+            ]
+        }).execute()
+        
+        results = response.data or []
+        created = sum(1 for result in results if result.get("user_id"))
+        
+        return {
+            "message": f"Registered {created} of {len(cohort.students)} students",
+            "created": created,
+            "failed": len(cohort.students) - created,
+            "results": results
+        }
+        
+    except HTTPException:
+        raise
+    except PasswordHasherBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"}
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Bulk registration failed: {str(e)}"
+        )
+
+
 @router.post("/login", response_model=Token)
 async def login(
     credentials: UserLogin,
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    hasher: PasswordHasher = Depends(get_password_hasher),
+    refresh_store: RefreshTokenStore = Depends(get_refresh_tokens)
 ):
     """Login endpoint for all user types"""
     try:
         # Get user by email
-        user_response = db.table("users").select("*").eq("email", credentials.email).execute()
+        user_response = await db.table("users").select("*").eq("email", credentials.email).execute()
         
         if not user_response.data:
             raise HTTPException(
@@ -271,18 +342,26 @@ async def login(
         
         user = user_response.data[0]
         
-        # Verify password
-        if not verify_password(credentials.password, user["password_hash"]):
+        # Verify password off the event loop
+        if not await hasher.verify(credentials.password, user["password_hash"]):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
+        update_data = {"last_login_at": "now()"}
+        
+        # Upgrade hashes made with an old cost factor while we know the password
+        if hasher.needs_rehash(user["password_hash"]):
+            try:
+                update_data["password_hash"] = await hasher.hash(credentials.password)
+                hasher.rehashed += 1
+            except PasswordHasherBusy:
+                pass  # Retried on a later login
+        
         # Update last login
-        db.table("users").update({
-            "last_login_at": "now()"
-        }).eq("user_id", user["user_id"]).execute()
+        await db.table("users").update(update_data).eq("user_id", user["user_id"]).execute()
         
         # Create access token
         access_token = create_access_token(
@@ -293,10 +372,23 @@ async def login(
             }
         )
         
-        return Token(access_token=access_token, token_type="bearer")
+        refresh_token = await _issue_refresh_token(refresh_store, db, user["user_id"])
+        
+        return Token(
+            access_token=access_token,
+            token_type="bearer",
+            refresh_token=refresh_token,
+            expires_in=settings.access_token_expire_minutes * 60
+        )
         
     except HTTPException:
         raise
+    except PasswordHasherBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -304,52 +396,126 @@ async def login(
         )
 
 
-@router.get("/me", response_model=dict)
-async def get_current_user_info(
-    current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+@router.get("/password-hashing/stats", response_model=dict, dependencies=[Depends(require_operator)])
+async def get_password_hashing_stats(
+    hasher: PasswordHasher = Depends(get_password_hasher)
+):
+    """Get password hashing queue depth and latency"""
+    return hasher.stats()
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(
+    request: RefreshTokenRequest,
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    refresh_store: RefreshTokenStore = Depends(get_refresh_tokens)
 ):
-    """Get current user information"""
+    """Exchange a refresh token for a new access token and a new refresh token (no password check)"""
     try:
-        # Get user details
-        user_response = db.table("users").select("*").eq("user_id", str(current_user.user_id)).execute()
-        
-        if not user_response.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
+        refresh_token, user = await refresh_store.rotate(db, request.refresh_token)
         
-        user = user_response.data[0]
+        access_token = create_access_token(
+            data={
+                "sub": str(user["user_id"]),
+                "email": user["email"],
+                "role": user["user_role"]
+            }
+        )
         
-        # Get profile based on user role
-        profile = None
-        if user["user_role"] == "Student":
-            profile_response = db.table("student_profiles").select("*").eq("student_id", user["user_id"]).execute()
-            if profile_response.data:
-                profile = profile_response.data[0]
-                
-        elif user["user_role"] == "Educator":
-            profile_response = db.table("educator_profiles").select("*").eq("educator_id", user["user_id"]).execute()
-            if profile_response.data:
-                profile = profile_response.data[0]
-                
-        elif user["user_role"] == "Company":
-            profile_response = db.table("company_profiles").select("*").eq("company_id", user["user_id"]).execute()
-            if profile_response.data:
-                profile = profile_response.data[0]
+        return Token(
+            access_token=access_token,
+            token_type="bearer",
+            refresh_token=refresh_token,
+            expires_in=settings.access_token_expire_minutes * 60
+        )
         
-        return {
-            "user": {
-                "user_id": user["user_id"],
-                "email": user["email"],
-                "user_role": user["user_role"],
-                "account_status": user["account_status"],
-                "profile_completion_percentage": user["profile_completion_percentage"],
-                "created_at": user["created_at"]
-            },
-            "profile": profile
-        }
+    except RefreshTokenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Token refresh failed: {str(e)}"
+        )
+
+
+@router.post("/logout", response_model=dict)
+async def logout(
+    request: Optional[RefreshTokenRequest] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: TokenData = Depends(get_current_active_user),
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    tokens: VerifiedTokenCache = Depends(get_verified_tokens),
+    refresh_store: RefreshTokenStore = Depends(get_refresh_tokens)
+):
+    """Revoke the presented access token until it expires, and the refresh token if given"""
+    await tokens.revoke_token(credentials.credentials)
+    
+    if request is not None:
+        try:
+            await refresh_store.revoke(db, request.refresh_token)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to revoke refresh token: {str(e)}"
+            )
+    
+    return {"message": "Logged out"}
+
+
+@router.get("/tokens/stats", response_model=dict, dependencies=[Depends(require_operator)])
+async def get_token_cache_stats(
+    tokens: VerifiedTokenCache = Depends(get_verified_tokens),
+    refresh_store: RefreshTokenStore = Depends(get_refresh_tokens)
+):
+    """Get verified token cache size and hit rate, and refresh token counters"""
+    return {**tokens.stats(), "refresh_tokens": refresh_store.stats()}
+
+
+@router.get("/me", response_model=dict)
+async def get_current_user_info(
+    request: Request,
+    current_user: TokenData = Depends(get_current_active_user),
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    cache: UserInfoCache = Depends(get_user_info_cache)
+):
+    """Get current user information (cached per user; supports If-None-Match)"""
+    try:
+        cached = await cache.get(current_user.user_id)
+        if cached is not None:
+            etag, body = cached
+        else:
+            # User row and role profile in one embedded select
+            columns = USER_INFO_COLUMNS
+            profile_table = PROFILE_COLUMNS.get(current_user.user_role)
+            if profile_table:
+                columns += f", {profile_table[0]}({profile_table[1]})"
+            
+            user_response = await db.table("users").select(columns).eq("user_id", str(current_user.user_id)).execute()
+            
+            if not user_response.data:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="User not found"
+                )
+            
+            user = user_response.data[0]
+            
+            # One-to-one embeds come back as an object, or a list on older PostgREST
+            profile = user.pop(profile_table[0], None) if profile_table else None
+            if isinstance(profile, list):
+                profile = profile[0] if profile else None
+            
+            body = json.dumps({"user": user, "profile": profile}, default=str)
+            etag = await cache.store(current_user.user_id, body)
+        
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
         
     except HTTPException:
         raise
@@ -358,3 +524,11 @@ async def get_current_user_info(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch user info: {str(e)}"
         )
+
+
+@router.get("/me/cache/stats", response_model=dict, dependencies=[Depends(require_operator)])
+async def get_user_info_cache_stats(
+    cache: UserInfoCache = Depends(get_user_info_cache)
+):
+    """Get /auth/me cache hit rate"""
+    return cache.stats()
@@ -1,84 +1,25 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from database import get_supabase_admin
-from supabase import Client
+from fastapi import APIRouter, HTTPException, status, Depends, Response
+from database import get_async_supabase_admin
+from supabase import AsyncClient
+from config import settings
 from models.user import TokenData
+from models.job import CandidateMatchRequest
 from utils.security import get_current_active_user
+from utils.job_catalog import JobCatalog, get_job_catalog
+from utils.candidate_matching import run_candidate_matching
 from typing import Dict, Any, List
-import json
-import os
 
 router = APIRouter(prefix="/jobs", tags=["Jobs"])
 
-# Path to jobs.json file
-JOBS_FILE_PATH = os.path.join(os.path.dirname(__file__), "..", "jobs", "jobs.json")
-
-
-def load_jobs():
-    """Load jobs from jobs.json file"""
-    try:
-        with open(JOBS_FILE_PATH, 'r', encoding='utf-8') as f:
-            jobs = json.load(f)
-        return jobs
-    except FileNotFoundError:
-        print(f"Jobs file not found at: {JOBS_FILE_PATH}")
-        return []
-    except json.JSONDecodeError as e:
-        print(f"Error decoding jobs JSON: {e}")
-        return []
-
-
-def calculate_match_score(user_skills: List[str], job_required_skills: List[str], job_preferred_skills: List[str]) -> tuple:
-    """
-    Calculate how well user skills match job requirements
-    Returns: (match_score, matched_skills_list)
-    
-    Algorithm:
-    - Required skills are weighted at 70%
-    - Preferred skills are weighted at 30%
-    """
-    user_skills_lower = [skill.lower().strip() for skill in user_skills]
-    
-    # Check required skills match
-    required_matches = 0
-    required_total = len(job_required_skills)
-    matched_skills = []
-    
-    for req_skill in job_required_skills:
-        req_skill_lower = req_skill.lower().strip()
-        # Check for exact match or partial match
-        if any(req_skill_lower in user_skill or user_skill in req_skill_lower 
-               for user_skill in user_skills_lower):
-            required_matches += 1
-            matched_skills.append(req_skill)
-    
-    # Check preferred skills match
-    preferred_matches = 0
-    preferred_total = len(job_preferred_skills) if job_preferred_skills else 0
-    
-    for pref_skill in job_preferred_skills:
-        pref_skill_lower = pref_skill.lower().strip()
-        if any(pref_skill_lower in user_skill or user_skill in pref_skill_lower 
-               for user_skill in user_skills_lower):
-            preferred_matches += 1
-            matched_skills.append(pref_skill)
-    
-    # Calculate weighted score
-    required_score = (required_matches / required_total * 70) if required_total > 0 else 0
-    preferred_score = (preferred_matches / preferred_total * 30) if preferred_total > 0 else 0
-    
-    total_score = required_score + preferred_score
-    
-    return round(total_score, 2), matched_skills
-
 
 @router.get("/all", response_model=List[Dict[str, Any]])
-async def get_all_jobs():
+async def get_all_jobs(catalog: JobCatalog = Depends(get_job_catalog)):
     """
     Get all available jobs from jobs.json
     """
     try:
-        jobs = load_jobs()
-        return jobs
+        # Serve the pre-serialized body; no per-request encoding
+        return Response(content=catalog.all_body(), media_type="application/json")
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -89,7 +30,8 @@ async def get_all_jobs():
 @router.get("/recommended", response_model=Dict[str, Any])
 async def get_recommended_jobs(
     current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    catalog: JobCatalog = Depends(get_job_catalog)
 ):
     """
     Get job recommendations based on user's skills
@@ -104,7 +46,7 @@ async def get_recommended_jobs(
             )
         
         # Get user's skills from database
-        user_skills_response = db.table("user_skills").select(
+        user_skills_response = await db.table("user_skills").select(
             "skill_id, proficiency_level, verification_status, skills_master(skill_name)"
         ).eq("user_id", str(current_user.user_id)).execute()
         
@@ -129,7 +71,7 @@ async def get_recommended_jobs(
             }
         
         # Load all jobs
-        all_jobs = load_jobs()
+        all_jobs = catalog.all()
         
         if not all_jobs:
             return {
@@ -138,41 +80,15 @@ async def get_recommended_jobs(
                 "recommended_jobs": []
             }
         
-        # Calculate match scores for each job
-        job_matches = []
-        
-        for job in all_jobs:
-            # Get job requirements
-            requirements = job.get("requirements", {})
-            required_skills = requirements.get("required_skills", [])
-            preferred_skills = requirements.get("preferred_skills", [])
-            
-            # Calculate match score
-            match_score, matched_skills = calculate_match_score(
-                user_skills, 
-                required_skills, 
-                preferred_skills
-            )
-            
-            # Only include jobs with at least some match
-            if match_score > 0:
-                job_with_match = job.copy()
-                job_with_match["match_score"] = match_score
-                job_with_match["matched_skills"] = matched_skills
-                job_matches.append(job_with_match)
-        
-        # Sort by match score (descending)
-        job_matches.sort(key=lambda x: x["match_score"], reverse=True)
-        
-        # Limit to top 20 recommendations
-        top_recommendations = job_matches[:20]
+        # Score only the jobs that share a skill with the user, keep the top 20
+        top_recommendations, total_matches = catalog.recommend(user_skills, limit=20)
         
         return {
             "message": f"Found {len(top_recommendations)} job recommendations matching your skills" if top_recommendations else "No matching jobs found. Try adding more skills to your profile.",
             "user_skills": user_skills,
             "recommended_jobs": top_recommendations,
             "total_jobs_available": len(all_jobs),
-            "total_matches": len(job_matches)
+            "total_matches": total_matches
         }
         
     except HTTPException:
@@ -185,20 +101,67 @@ async def get_recommended_jobs(
         )
 
 
+@router.post("/candidates/match", response_model=Dict[str, Any])
+async def match_candidates(
+    request: CandidateMatchRequest,
+    current_user: TokenData = Depends(get_current_active_user),
+    db: AsyncClient = Depends(get_async_supabase_admin)
+):
+    """
+    Rank students against the company's open job postings
+    Only companies can access this endpoint; the top candidates per posting
+    are saved to recommended_candidates unless save is false
+    """
+    try:
+        if current_user.user_role != "Company":
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only companies can match candidates"
+            )
+        
+        result = await run_candidate_matching(
+            db,
+            job_ids=[str(job_id) for job_id in request.job_ids] if request.job_ids else None,
+            company_id=str(current_user.user_id),
+            top_k=request.top_k or settings.candidate_match_top_k,
+            verified_only=request.verified_only,
+            weight_by_proficiency=request.weight_by_proficiency,
+            weight_by_verification=request.weight_by_verification,
+            save=request.save
+        )
+        
+        if request.job_ids and result["jobs_matched"] == 0:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No open job postings found for this company"
+            )
+        
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error matching candidates: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to match candidates: {str(e)}"
+        )
+
+
 @router.get("/{job_id}", response_model=Dict[str, Any])
 async def get_job_by_id(
     job_id: str,
-    current_user: TokenData = Depends(get_current_active_user)
+    current_user: TokenData = Depends(get_current_active_user),
+    catalog: JobCatalog = Depends(get_job_catalog)
 ):
     """
     Get a specific job by ID
     """
     try:
-        jobs = load_jobs()
+        job = catalog.get(job_id)
         
-        for job in jobs:
-            if job.get("id") == job_id:
-                return job
+        if job:
+            return job
         
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,125 +1,131 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Query
-from database import get_supabase_admin
-from supabase import Client
+from database import get_async_supabase_admin
+from supabase import AsyncClient
 from models.user import TokenData
 from utils.security import get_current_active_user
+from utils.skill_catalog import SkillCatalog, get_skill_catalog
 from typing import Dict, Any, List, Optional
 from uuid import UUID
 
 router = APIRouter(prefix="/leaderboard", tags=["Leaderboard"])
 
 
+# Columns needed to render a leaderboard row from the materialized table
+LEADERBOARD_SELECT = (
+    "student_id, skill_score, best_obtained_score, best_verification_status, best_completed_at, "
+    "student_profiles(first_name, last_name, address, profile_picture_url, users(email, user_role))"
+)
+
+
+def _build_leaderboard_entry(
+    row: Dict[str, Any],
+    profile: Dict[str, Any],
+    user: Dict[str, Any],
+    skill_name: str
+) -> Dict[str, Any]:
+    """Format a student_leaderboard row and its student's profile and user for the API"""
+    # Build full name from first_name and last_name
+    full_name = ""
+    if profile.get("first_name") and profile.get("last_name"):
+        full_name = f"{profile['first_name']} {profile['last_name']}"
+    elif profile.get("first_name"):
+        full_name = profile["first_name"]
+    else:
+        full_name = (user.get("email") or "").split("@")[0]
+    
+    # Extract country from address JSONB
+    country = "Unknown"
+    if profile.get("address") and isinstance(profile["address"], dict):
+        country = profile["address"].get("country", "Unknown")
+    
+    return {
+        "user_id": row["student_id"],
+        "name": full_name,
+        "email": user.get("email"),
+        "role": user.get("user_role"),
+        "country": country,
+        "profile_picture_url": profile.get("profile_picture_url"),
+        "technology": skill_name,
+        "score": row.get("best_obtained_score") or 0,
+        "percentage": round(float(row.get("skill_score") or 0), 2),
+        "verification_status": row.get("best_verification_status") or "Unverified",
+        "completed_at": row.get("best_completed_at")
+    }
+
+
+def _build_ranked_entry(row: Dict[str, Any], skill_name: str, rank: int) -> Dict[str, Any]:
+    """Format a row from LEADERBOARD_SELECT with its rank and pagination cursor"""
+    profile = row.get("student_profiles") or {}
+    entry = _build_leaderboard_entry(row, profile, profile.get("users") or {}, skill_name)
+    entry["rank"] = rank
+    # Pass as ?after= to fetch the page following this row
+    entry["cursor"] = f"{rank}:{float(row.get('skill_score') or 0)}:{row['student_id']}"
+    return entry
+
+
+def _parse_leaderboard_cursor(cursor: str) -> tuple:
+    """Split a leaderboard cursor into (rank, percentage, user_id)"""
+    try:
+        rank, percentage, user_id = cursor.split(":")
+        return int(rank), float(percentage), str(UUID(user_id))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid leaderboard cursor"
+        )
+
+
 @router.get("/technology/{technology_name}", response_model=List[Dict[str, Any]])
 async def get_leaderboard_by_technology(
     technology_name: str,
     role: str = Query("Student", description="Filter by role: Student or Teacher"),
-    db: Client = Depends(get_supabase_admin)
+    limit: int = Query(100, ge=1, le=500, description="Maximum entries to return"),
+    after: Optional[str] = Query(None, description="Cursor of the last entry from the previous page"),
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    catalog: SkillCatalog = Depends(get_skill_catalog)
 ):
     """
     Get leaderboard for a specific technology, showing all students who attempted tests
     Students are ranked by their best score for that technology
+    
+    Reads from the materialized student_leaderboard table, paginated by keyset
+    on (skill_score DESC, student_id).
     """
     try:
         # First, get the skill_id for the technology
-        skill_response = db.table("skills_master").select("skill_id, skill_name").ilike(
-            "skill_name", f"%{technology_name}%"
-        ).execute()
+        skill = await catalog.search(db, technology_name)
         
-        if not skill_response.data:
+        if not skill:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Technology '{technology_name}' not found"
             )
         
-        skill_id = skill_response.data[0]["skill_id"]
-        skill_name = skill_response.data[0]["skill_name"]
+        skill_id = skill.skill_id
+        skill_name = skill.skill_name
         
-        # Get all completed test sessions for this skill
-        sessions_response = db.table("test_sessions").select(
-            "session_id, user_id, obtained_score, percentage, completed_at, verification_status"
-        ).eq("skill_id", skill_id).eq("status", "Completed").execute()
-        
-        if not sessions_response.data:
-            return []
-        
-        # Group by user and get their best score
-        user_best_scores = {}
-        for session in sessions_response.data:
-            user_id = session["user_id"]
-            score = session.get("obtained_score", 0)
-            percentage = session.get("percentage", 0)
-            
-            if user_id not in user_best_scores or percentage > user_best_scores[user_id]["percentage"]:
-                user_best_scores[user_id] = {
-                    "user_id": user_id,
-                    "score": score,
-                    "percentage": percentage,
-                    "completed_at": session["completed_at"],
-                    "verification_status": session.get("verification_status", "Unverified")
-                }
-        
-        # Get user details for all users
-        user_ids = list(user_best_scores.keys())
-        if not user_ids:
-            return []
-        
-        # Fetch user profiles with role filter
-        users_response = db.table("users").select(
-            "user_id, email, user_role"
-        ).in_("user_id", user_ids).eq("user_role", role).execute()
-        
-        if not users_response.data:
+        # Only students take tests, so the student leaderboard is the only one populated
+        if role != "Student":
             return []
         
-        # Get student profiles for additional info
-        student_ids = [u["user_id"] for u in users_response.data]
-        profiles_response = db.table("student_profiles").select(
-            "student_id, first_name, last_name, address, profile_picture_url"
-        ).in_("student_id", student_ids).execute()
-        
-        profiles_dict = {p["student_id"]: p for p in (profiles_response.data or [])}
+        query = db.table("student_leaderboard").select(LEADERBOARD_SELECT).eq("skill_id", skill_id)
         
-        # Combine data
-        leaderboard_data = []
-        for user in users_response.data:
-            user_id = user["user_id"]
-            best_score = user_best_scores[user_id]
-            profile = profiles_dict.get(user_id, {})
-            
-            # Build full name from first_name and last_name
-            full_name = ""
-            if profile.get("first_name") and profile.get("last_name"):
-                full_name = f"{profile['first_name']} {profile['last_name']}"
-            elif profile.get("first_name"):
-                full_name = profile["first_name"]
-            else:
-                full_name = user.get("email", "").split("@")[0]
-            
-            # Extract country from address JSONB
-            country = "Unknown"
-            if profile.get("address") and isinstance(profile["address"], dict):
-                country = profile["address"].get("country", "Unknown")
-            
-            leaderboard_data.append({
-                "user_id": user_id,
-                "name": full_name,
-                "email": user.get("email"),
-                "role": user.get("user_role"),
-                "country": country,
-                "profile_picture_url": profile.get("profile_picture_url"),
-                "technology": skill_name,
-                "score": best_score["score"],
-                "percentage": round(best_score["percentage"], 2),
-                "verification_status": best_score["verification_status"],
-                "completed_at": best_score["completed_at"]
-            })
+        last_rank = 0
+        if after:
+            last_rank, last_score, last_user_id = _parse_leaderboard_cursor(after)
+            query = query.or_(
+                f"skill_score.lt.{last_score},"
+                f"and(skill_score.eq.{last_score},student_id.gt.{last_user_id})"
+            )
         
-        # Sort by percentage (descending) and assign ranks
-        leaderboard_data.sort(key=lambda x: x["percentage"], reverse=True)
-        for idx, entry in enumerate(leaderboard_data, start=1):
-            entry["rank"] = idx
+        leaderboard_response = await query.order("skill_score", desc=True).order(
+            "student_id"
+        ).limit(limit).execute()
         
-        return leaderboard_data
+        return [
+            _build_ranked_entry(row, skill_name, rank)
+            for rank, row in enumerate(leaderboard_response.data or [], start=last_rank + 1)
+        ]
         
     except HTTPException:
         raise
@@ -134,106 +140,26 @@ async def get_leaderboard_by_technology(
 @router.get("/all", response_model=List[Dict[str, Any]])
 async def get_all_leaderboards(
     role: str = Query("Student", description="Filter by role: Student or Teacher"),
-    limit: int = Query(100, description="Limit results per technology"),
-    db: Client = Depends(get_supabase_admin)
+    limit: int = Query(100, ge=1, le=1000, description="Limit results per technology"),
+    db: AsyncClient = Depends(get_async_supabase_admin)
 ):
     """
     Get leaderboard data for all technologies combined
+    
+    Ranking is aggregated server-side by get_all_leaderboards() in one round-trip:
+    each user's best score per technology, top `limit` users per technology.
     """
     try:
-        # Get all skills
-        skills_response = db.table("skills_master").select("skill_id, skill_name").execute()
-        
-        if not skills_response.data:
-            return []
+        response = await db.rpc("get_all_leaderboards", {
+            "p_role": role,
+            "p_limit": limit
+        }).execute()
         
-        all_leaderboard_data = []
-        
-        for skill in skills_response.data:
-            skill_id = skill["skill_id"]
-            skill_name = skill["skill_name"]
-            
-            # Get completed test sessions for this skill
-            sessions_response = db.table("test_sessions").select(
-                "session_id, user_id, obtained_score, percentage, completed_at, verification_status"
-            ).eq("skill_id", skill_id).eq("status", "Completed").limit(limit).execute()
-            
-            if not sessions_response.data:
-                continue
-            
-            # Group by user and get their best score
-            user_best_scores = {}
-            for session in sessions_response.data:
-                user_id = session["user_id"]
-                percentage = session.get("percentage", 0)
-                
-                if user_id not in user_best_scores or percentage > user_best_scores[user_id]["percentage"]:
-                    user_best_scores[user_id] = {
-                        "user_id": user_id,
-                        "score": session.get("obtained_score", 0),
-                        "percentage": percentage,
-                        "completed_at": session["completed_at"],
-                        "verification_status": session.get("verification_status", "Unverified")
-                    }
-            
-            # Get user details
-            user_ids = list(user_best_scores.keys())
-            if not user_ids:
-                continue
-            
-            users_response = db.table("users").select(
-                "user_id, email, user_role"
-            ).in_("user_id", user_ids).eq("user_role", role).execute()
-            
-            if not users_response.data:
-                continue
-            
-            # Get student profiles
-            student_ids = [u["user_id"] for u in users_response.data]
-            profiles_response = db.table("student_profiles").select(
-                "student_id, first_name, last_name, address, profile_picture_url"
-            ).in_("student_id", student_ids).execute()
-            
-            profiles_dict = {p["student_id"]: p for p in (profiles_response.data or [])}
-            
-            # Combine data
-            for user in users_response.data:
-                user_id = user["user_id"]
-                best_score = user_best_scores[user_id]
-                profile = profiles_dict.get(user_id, {})
-                
-                # Build full name from first_name and last_name
-                full_name = ""
-                if profile.get("first_name") and profile.get("last_name"):
-                    full_name = f"{profile['first_name']} {profile['last_name']}"
-                elif profile.get("first_name"):
-                    full_name = profile["first_name"]
-                else:
-                    full_name = user.get("email", "").split("@")[0]
-                
-                # Extract country from address JSONB
-                country = "Unknown"
-                if profile.get("address") and isinstance(profile["address"], dict):
-                    country = profile["address"].get("country", "Unknown")
-                
-                all_leaderboard_data.append({
-                    "user_id": user_id,
-                    "name": full_name,
-                    "email": user.get("email"),
-                    "role": user.get("user_role"),
-                    "country": country,
-                    "profile_picture_url": profile.get("profile_picture_url"),
-                    "technology": skill_name,
-                    "score": best_score["score"],
-                    "percentage": round(best_score["percentage"], 2),
-                    "verification_status": best_score["verification_status"],
-                    "completed_at": best_score["completed_at"]
-                })
-        
-        # Sort by percentage (descending)
-        all_leaderboard_data.sort(key=lambda x: x["percentage"], reverse=True)
-        
-        return all_leaderboard_data
+        # Rows arrive sorted by percentage (descending)
+        return [
+            _build_leaderboard_entry(row, row, row, row["skill_name"])
+            for row in (response.data or [])
+        ]
         
     except Exception as e:
         print(f"Error fetching all leaderboards: {str(e)}")
@@ -245,21 +171,22 @@ async def get_all_leaderboards(
 
 @router.get("/technologies", response_model=List[Dict[str, Any]])
 async def get_available_technologies(
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    catalog: SkillCatalog = Depends(get_skill_catalog)
 ):
     """
     Get list of all available technologies/skills with test data
     """
     try:
-        skills_response = db.table("skills_master").select("skill_id, skill_name, skill_category").execute()
+        skills = await catalog.list_rows(db)
         
-        if not skills_response.data:
+        if not skills:
             return []
         
         technologies = []
-        for skill in skills_response.data:
+        for skill in skills:
             # Count how many students have attempted this skill
-            sessions_count = db.table("test_sessions").select(
+            sessions_count = await db.table("test_sessions").select(
                 "session_id", count="exact"
             ).eq("skill_id", skill["skill_id"]).eq("status", "Completed").execute()
             
@@ -290,32 +217,53 @@ async def get_user_leaderboard_position(
     user_id: UUID,
     technology_name: str = Query(..., description="Technology to check position for"),
     current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    catalog: SkillCatalog = Depends(get_skill_catalog)
 ):
     """
     Get a specific user's position on the leaderboard for a technology
     """
     try:
-        # Get the full leaderboard
-        leaderboard = await get_leaderboard_by_technology(technology_name, "Student", db)
+        # Top of the leaderboard (also resolves the technology name)
+        top_10 = await get_leaderboard_by_technology(
+            technology_name, role="Student", limit=10, after=None, db=db, catalog=catalog
+        )
+        
+        skill = await catalog.search(db, technology_name)
+        skill_id = skill.skill_id
+        skill_name = skill.skill_name
         
-        # Find user's position
-        user_position = None
-        for entry in leaderboard:
-            if entry["user_id"] == str(user_id):
-                user_position = entry
-                break
+        # Find user's entry
+        entry_response = await db.table("student_leaderboard").select(LEADERBOARD_SELECT).eq(
+            "skill_id", skill_id
+        ).eq("student_id", str(user_id)).execute()
         
-        if not user_position:
+        if not entry_response.data:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found on leaderboard"
             )
         
+        entry = entry_response.data[0]
+        score = entry["skill_score"]
+        
+        # Rank = number of entries ordered ahead of this one + 1
+        ahead_response = await db.table("student_leaderboard").select(
+            "student_id", count="exact", head=True
+        ).eq("skill_id", skill_id).or_(
+            f"skill_score.gt.{score},and(skill_score.eq.{score},student_id.lt.{user_id})"
+        ).execute()
+        
+        total_response = await db.table("student_leaderboard").select(
+            "student_id", count="exact", head=True
+        ).eq("skill_id", skill_id).execute()
+        
+        rank = (ahead_response.count or 0) + 1
+        
         return {
-            "user_position": user_position,
-            "total_participants": len(leaderboard),
-            "top_10": leaderboard[:10]
+            "user_position": _build_ranked_entry(entry, skill_name, rank),
+            "total_participants": total_response.count or 0,
+            "top_10": top_10
         }
         
     except HTTPException:
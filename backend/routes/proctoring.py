@@ -1,121 +1,168 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from database import get_supabase_admin
-from supabase import Client
+from fastapi import APIRouter, HTTPException, status, Depends, WebSocket, WebSocketDisconnect, WebSocketException
+from pydantic import ValidationError
+from database import get_async_supabase_admin
+from supabase import AsyncClient
 from models.user import TokenData
-from models.test import FaceCaptureSubmit, ViolationLog, TabSwitchLog
-from utils.security import get_current_active_user
-from utils.face_verification import FaceVerification
-from typing import Dict, Any, List
+from models.test import FaceCaptureSubmit, ViolationLog, TabSwitchLog, ProctoringEventBatch
+from config import settings
+from utils.security import get_current_active_user, verify_access_token, require_operator
+from utils.face_engine import FaceVerificationEngine, FaceEngineBusy, get_face_engine
+from utils.face_check_policy import FaceCheckTracker, get_face_checks
+from utils.proctoring_events import ProctoringEventBuffer, get_proctoring_events, SEVERITIES
+from utils.reference_faces import ReferenceFace, ReferenceFaceCache, get_reference_faces
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 from uuid import UUID
-import requests
+import asyncio
+import json
 
 router = APIRouter(prefix="/proctoring", tags=["Proctoring"])
 
 
+async def _check_event_session(events: ProctoringEventBuffer, db: AsyncClient, session_id: UUID, user_id: UUID):
+    """Raise 404/400 unless the session belongs to the user and is in progress"""
+    error = await events.check_session(db, session_id, user_id)
+    
+    if error == "session_not_found":
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Test session not found"
+        )
+    
+    if error == "session_not_in_progress":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Test session is not in progress"
+        )
+
+
+def _violation_event(violation: ViolationLog, occurred_at: Optional[datetime] = None) -> Dict[str, Any]:
+    """Buffer row fields of a ViolationLog"""
+    if violation.severity not in SEVERITIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid severity: {violation.severity}"
+        )
+    
+    return {
+        "violation_type": violation.violation_type,
+        "severity": violation.severity,
+        "details": violation.details or {},
+        "occurred_at": (occurred_at or datetime.utcnow()).isoformat()
+    }
+
+
+def _tab_switch_event(tab_switch: TabSwitchLog) -> Dict[str, Any]:
+    """Buffer row fields of a TabSwitchLog"""
+    return _violation_event(ViolationLog(
+        violation_type="TabSwitch",
+        severity="Medium",
+        details={"timestamp": tab_switch.switched_at.isoformat()}
+    ), tab_switch.switched_at)
+
+
+async def _reference_face(faces: ReferenceFaceCache, db: AsyncClient, current_user: TokenData) -> ReferenceFace:
+    """The user's cached profile picture, the reference image for face verification"""
+    try:
+        face = await faces.get(db, current_user.user_id, current_user.user_role)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch profile picture: {str(e)}"
+        )
+    
+    if face is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No profile picture found. Please upload a profile picture first."
+        )
+    return face
+
+
+async def _record_face_verification(
+    db: AsyncClient,
+    events: ProctoringEventBuffer,
+    checks: FaceCheckTracker,
+    session_id: UUID,
+    user_id: UUID,
+    verification_result: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Log a verification attempt, buffer a violation if it failed, and build the response"""
+    log_data = {
+        "session_id": str(session_id),
+        "user_id": str(user_id),
+        "verified": verification_result["verified"],
+        "confidence": verification_result["confidence"],
+        "captured_at": datetime.utcnow().isoformat(),
+        "error": verification_result.get("error")
+    }
+    
+    await db.table("face_verification_logs").insert(log_data).execute()
+    
+    in_progress = await events.check_session(db, session_id, user_id) is None
+    
+    # If verification failed, log violation (never rate limited)
+    if not verification_result["verified"] and in_progress:
+        events.add(session_id, user_id, [{
+            "violation_type": "FaceNotMatched",
+            "severity": "High",
+            "details": {
+                "confidence": verification_result["confidence"],
+                "error": verification_result.get("error")
+            }
+        }], rate_limit=False)
+    
+    # Recommend when to check again from the session's checks and violations
+    next_check_seconds = None
+    if in_progress:
+        next_check_seconds = await checks.record(
+            db, session_id, verification_result["verified"],
+            float(verification_result["confidence"] or 0), events.total_violations(session_id)
+        )
+    
+    return {
+        "verified": verification_result["verified"],
+        "confidence": verification_result["confidence"],
+        "message": verification_result.get("details", {}).get("message", ""),
+        "error": verification_result.get("error"),
+        "next_check_seconds": next_check_seconds
+    }
+
+
 @router.post("/sessions/{session_id}/verify-face", response_model=Dict[str, Any])
 async def verify_face_during_test(
     session_id: UUID,
     face_data: FaceCaptureSubmit,
     current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    events: ProctoringEventBuffer = Depends(get_proctoring_events),
+    faces: ReferenceFaceCache = Depends(get_reference_faces),
+    engine: FaceVerificationEngine = Depends(get_face_engine),
+    checks: FaceCheckTracker = Depends(get_face_checks)
 ):
     """
     Verify user's face during test by comparing with profile picture
     """
     try:
-        # Verify session belongs to user
-        session_response = db.table("test_sessions").select("*").eq(
-            "session_id", str(session_id)
-        ).eq("user_id", str(current_user.user_id)).execute()
+        # Verify session belongs to user and is in progress
+        await _check_event_session(events, db, session_id, current_user.user_id)
         
-        if not session_response.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Test session not found"
-            )
-        
-        session = session_response.data[0]
-        
-        if session["status"] != "InProgress":
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Test session is not in progress"
-            )
-        
-        # Get user's profile picture
-        if current_user.user_role == "Student":
-            table_name = "student_profiles"
-            id_column = "student_id"
-        else:
-            table_name = "company_profiles"
-            id_column = "company_id"
+        reference = await _reference_face(faces, db, current_user)
         
-        profile_response = db.table(table_name).select("profile_picture_url").eq(
-            id_column, str(current_user.user_id)
-        ).execute()
+        # Verify face in the engine's worker processes
+        verification_result = await engine.verify(reference, face_data.image_base64)
         
-        if not profile_response.data or not profile_response.data[0].get("profile_picture_url"):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No profile picture found. Please upload a profile picture first."
-            )
-        
-        profile_picture_url = profile_response.data[0]["profile_picture_url"]
-        
-        # Download profile picture
-        try:
-            response = requests.get(profile_picture_url, timeout=10)
-            response.raise_for_status()
-            profile_image_bytes = response.content
-        except Exception as e:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to fetch profile picture: {str(e)}"
-            )
-        
-        # Verify face
-        verification_result = FaceVerification.verify_face(
-            profile_image_bytes,
-            face_data.image_base64
+        return await _record_face_verification(
+            db, events, checks, session_id, current_user.user_id, verification_result
         )
         
-        # Log the verification attempt
-        log_data = {
-            "session_id": str(session_id),
-            "user_id": str(current_user.user_id),
-            "verified": verification_result["verified"],
-            "confidence": verification_result["confidence"],
-            "captured_at": datetime.utcnow().isoformat(),
-            "error": verification_result.get("error")
-        }
-        
-        db.table("face_verification_logs").insert(log_data).execute()
-        
-        # If verification failed, log violation
-        if not verification_result["verified"]:
-            violation_data = {
-                "session_id": str(session_id),
-                "user_id": str(current_user.user_id),
-                "violation_type": "FaceNotMatched",
-                "severity": "High",
-                "details": {
-                    "confidence": verification_result["confidence"],
-                    "error": verification_result.get("error")
-                },
-                "occurred_at": datetime.utcnow().isoformat()
-            }
-            db.table("proctoring_violations").insert(violation_data).execute()
-        
-        return {
-            "verified": verification_result["verified"],
-            "confidence": verification_result["confidence"],
-            "message": verification_result.get("details", {}).get("message", ""),
-            "error": verification_result.get("error")
-        }
-        
     except HTTPException:
         raise
+    except FaceEngineBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
     except Exception as e:
         print(f"Error during face verification: {str(e)}")
         raise HTTPException(
@@ -129,52 +176,26 @@ async def log_proctoring_violation(
     session_id: UUID,
     violation: ViolationLog,
     current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    events: ProctoringEventBuffer = Depends(get_proctoring_events)
 ):
     """
     Log proctoring violations (tab switch, multiple faces, etc.)
     """
     try:
-        # Verify session belongs to user
-        session_response = db.table("test_sessions").select("status").eq(
-            "session_id", str(session_id)
-        ).eq("user_id", str(current_user.user_id)).execute()
-        
-        if not session_response.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Test session not found"
-            )
-        
-        if session_response.data[0]["status"] != "InProgress":
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Test session is not in progress"
-            )
-        
-        # Log violation
-        violation_data = {
-            "session_id": str(session_id),
-            "user_id": str(current_user.user_id),
-            "violation_type": violation.violation_type,
-            "severity": violation.severity,
-            "details": violation.details or {},
-            "occurred_at": datetime.utcnow().isoformat()
-        }
-        
-        response = db.table("proctoring_violations").insert(violation_data).execute()
-        
-        # Get total violation count
-        violations_response = db.table("proctoring_violations").select(
-            "violation_id", count="exact"
-        ).eq("session_id", str(session_id)).execute()
+        event = _violation_event(violation)
+        await _check_event_session(events, db, session_id, current_user.user_id)
         
-        violation_count = violations_response.count if violations_response.count else 0
+        # Buffered; written with the next bulk insert
+        violation_ids, rate_limited = events.add(session_id, current_user.user_id, [event])
         
+        # Same 200 response shape as before rate limiting; a dropped event has no id
         return {
-            "message": "Violation logged successfully",
-            "violation_id": response.data[0]["violation_id"] if response.data else None,
-            "total_violations": violation_count
+            "message": "Violation dropped: too many proctoring events for this session"
+            if rate_limited else "Violation logged successfully",
+            "violation_id": violation_ids[0] if violation_ids else None,
+            "dropped": bool(rate_limited),
+            "total_violations": events.total_violations(session_id)
         }
         
     except HTTPException:
@@ -191,21 +212,30 @@ async def log_proctoring_violation(
 async def log_tab_switch(
     session_id: UUID,
     current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    events: ProctoringEventBuffer = Depends(get_proctoring_events)
 ):
     """
     Log tab switch event
     """
     try:
-        # Log as a violation
-        violation = ViolationLog(
-            violation_type="TabSwitch",
-            severity="Medium",
-            details={"timestamp": datetime.utcnow().isoformat()}
+        await _check_event_session(events, db, session_id, current_user.user_id)
+        
+        violation_ids, rate_limited = events.add(
+            session_id, current_user.user_id, [_tab_switch_event(TabSwitchLog())]
         )
         
-        return await log_proctoring_violation(session_id, violation, current_user, db)
+        # Same 200 response shape as before rate limiting; a dropped event has no id
+        return {
+            "message": "Violation dropped: too many proctoring events for this session"
+            if rate_limited else "Violation logged successfully",
+            "violation_id": violation_ids[0] if violation_ids else None,
+            "dropped": bool(rate_limited),
+            "total_violations": events.total_violations(session_id)
+        }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -213,18 +243,211 @@ async def log_tab_switch(
         )
 
 
+@router.post("/sessions/{session_id}/events", response_model=Dict[str, Any])
+async def log_proctoring_events(
+    session_id: UUID,
+    batch: ProctoringEventBatch,
+    current_user: TokenData = Depends(get_current_active_user),
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    events: ProctoringEventBuffer = Depends(get_proctoring_events)
+):
+    """
+    Log a batch of violations and tab switches collected by the client
+    Events beyond the session's rate limit are dropped and reported as rate_limited.
+    """
+    try:
+        batch_events = [_violation_event(violation) for violation in batch.violations]
+        batch_events.extend(_tab_switch_event(tab_switch) for tab_switch in batch.tab_switches)
+        
+        await _check_event_session(events, db, session_id, current_user.user_id)
+        
+        violation_ids, rate_limited = events.add(session_id, current_user.user_id, batch_events)
+        
+        return {
+            "message": "Events logged successfully",
+            "accepted": len(violation_ids),
+            "rate_limited": rate_limited,
+            "violation_ids": violation_ids,
+            "total_violations": events.total_violations(session_id)
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error logging proctoring events: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to log proctoring events: {str(e)}"
+        )
+
+
+async def _authenticate_websocket(websocket: WebSocket) -> TokenData:
+    """Decode the access token of a WebSocket handshake (?token= or Authorization header)"""
+    token = websocket.query_params.get("token")
+    authorization = websocket.headers.get("authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    
+    if not token:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason="Not authenticated")
+    
+    try:
+        return await verify_access_token(token)
+    except HTTPException as e:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+
+
+@router.websocket("/sessions/{session_id}/stream")
+async def proctoring_stream(
+    websocket: WebSocket,
+    session_id: UUID,
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    events: ProctoringEventBuffer = Depends(get_proctoring_events),
+    faces: ReferenceFaceCache = Depends(get_reference_faces),
+    engine: FaceVerificationEngine = Depends(get_face_engine),
+    checks: FaceCheckTracker = Depends(get_face_checks)
+):
+    """
+    One proctoring channel per session for face frames, violations and heartbeats
+    
+    The token, session ownership and status are checked and the profile picture
+    is loaded once, at connect. Client messages are JSON objects with a `type`:
+    frame (image_base64), violation (ViolationLog fields), tab_switch
+    (switched_at) and heartbeat. Frames wait in a small queue; when face
+    verification falls behind, the oldest waiting frame is dropped.
+    """
+    current_user = await _authenticate_websocket(websocket)
+    
+    error = await events.check_session(db, session_id, current_user.user_id)
+    if error:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=error)
+    
+    try:
+        reference = await _reference_face(faces, db, current_user)
+    except HTTPException as e:
+        raise WebSocketException(code=status.WS_1011_INTERNAL_ERROR, reason=e.detail)
+    
+    await websocket.accept()
+    
+    frames: asyncio.Queue = asyncio.Queue(maxsize=settings.proctoring_ws_frame_queue_size)
+    send_lock = asyncio.Lock()
+    dropped_frames = 0
+    
+    async def send(message: Dict[str, Any]):
+        async with send_lock:
+            await websocket.send_json(message)
+    
+    async def verify_frames():
+        while True:
+            image_base64 = await frames.get()
+            try:
+                verification_result = await engine.verify(reference, image_base64)
+                response = await _record_face_verification(
+                    db, events, checks, session_id, current_user.user_id, verification_result
+                )
+                response["type"] = "verification"
+            except FaceEngineBusy as e:
+                response = {"type": "frame_dropped", "detail": str(e)}
+            except Exception as e:
+                print(f"Error during face verification: {str(e)}")
+                response = {"type": "error", "detail": f"Face verification failed: {str(e)}"}
+            
+            try:
+                await send(response)
+            except (WebSocketDisconnect, RuntimeError):
+                return
+    
+    verifier = asyncio.create_task(verify_frames())
+    
+    try:
+        while True:
+            incoming = await asyncio.wait_for(
+                websocket.receive(),
+                timeout=settings.proctoring_ws_idle_timeout_seconds
+            )
+            if incoming["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(incoming.get("code", status.WS_1000_NORMAL_CLOSURE))
+            
+            # JSON in text frames, or UTF-8 JSON in binary frames
+            raw = incoming.get("text")
+            if raw is None:
+                raw = (incoming.get("bytes") or b"").decode("utf-8")
+            message = json.loads(raw)
+            message_type = message.get("type") if isinstance(message, dict) else None
+            
+            if message_type == "frame":
+                if frames.full():
+                    # Keep the newest frames; the oldest waiting one is stale
+                    frames.get_nowait()
+                    dropped_frames += 1
+                    await send({"type": "frame_dropped", "dropped_frames": dropped_frames})
+                frames.put_nowait(message.get("image_base64") or "")
+                continue
+            
+            # Cached check; re-reads the session only every few seconds
+            error = await events.check_session(db, session_id, current_user.user_id)
+            if error:
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=error)
+                break
+            
+            if message_type in ("violation", "tab_switch"):
+                try:
+                    if message_type == "violation":
+                        event = _violation_event(ViolationLog(**{
+                            key: message[key] for key in ("violation_type", "severity", "details") if key in message
+                        }))
+                    else:
+                        event = _tab_switch_event(TabSwitchLog(**{
+                            key: message[key] for key in ("switched_at",) if key in message
+                        }))
+                except (ValidationError, HTTPException) as e:
+                    await send({"type": "error", "detail": getattr(e, "detail", str(e))})
+                    continue
+                
+                violation_ids, rate_limited = events.add(session_id, current_user.user_id, [event])
+                await send({
+                    "type": "violation_logged",
+                    "violation_id": violation_ids[0] if violation_ids else None,
+                    "rate_limited": rate_limited,
+                    "total_violations": events.total_violations(session_id)
+                })
+            elif message_type == "heartbeat":
+                await send({
+                    "type": "heartbeat",
+                    "server_time": datetime.utcnow().isoformat(),
+                    "total_violations": events.total_violations(session_id),
+                    "dropped_frames": dropped_frames,
+                    "queued_frames": frames.qsize()
+                })
+            else:
+                await send({"type": "error", "detail": f"Unknown message type: {message_type}"})
+    
+    except WebSocketDisconnect:
+        pass
+    except asyncio.TimeoutError:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Heartbeat timeout")
+    except ValueError:
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA, reason="Messages must be JSON")
+    finally:
+        verifier.cancel()
+        result, = await asyncio.gather(verifier, return_exceptions=True)
+        if isinstance(result, Exception):
+            print(f"Error in proctoring stream verifier: {str(result)}")
+
+
 @router.get("/sessions/{session_id}/violations", response_model=List[Dict[str, Any]])
 async def get_session_violations(
     session_id: UUID,
     current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    events: ProctoringEventBuffer = Depends(get_proctoring_events)
 ):
     """
     Get all violations for a test session
     """
     try:
         # Verify session belongs to user or user is admin
-        session_response = db.table("test_sessions").select("user_id").eq(
+        session_response = await db.table("test_sessions").select("user_id").eq(
             "session_id", str(session_id)
         ).execute()
         
@@ -241,8 +464,11 @@ async def get_session_violations(
                 detail="Access denied"
             )
         
+        # Write this worker's buffered events first
+        await events.flush(db)
+        
         # Fetch violations
-        violations_response = db.table("proctoring_violations").select("*").eq(
+        violations_response = await db.table("proctoring_violations").select("*").eq(
             "session_id", str(session_id)
         ).order("occurred_at").execute()
         
@@ -257,18 +483,39 @@ async def get_session_violations(
         )
 
 
+@router.get("/engine/stats", response_model=Dict[str, Any], dependencies=[Depends(require_operator)])
+async def get_face_engine_stats(
+    engine: FaceVerificationEngine = Depends(get_face_engine)
+):
+    """
+    Get face verification queue depth, batch sizes and per-frame latency
+    """
+    return engine.stats()
+
+
+@router.get("/events/stats", response_model=Dict[str, Any], dependencies=[Depends(require_operator)])
+async def get_proctoring_event_stats(
+    events: ProctoringEventBuffer = Depends(get_proctoring_events)
+):
+    """
+    Get write-behind buffer size and rate limiting counters
+    """
+    return events.stats()
+
+
 @router.get("/sessions/{session_id}/stats", response_model=Dict[str, Any])
 async def get_proctoring_stats(
     session_id: UUID,
     current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    events: ProctoringEventBuffer = Depends(get_proctoring_events)
 ):
     """
     Get proctoring statistics for a session
     """
     try:
         # Verify access
-        session_response = db.table("test_sessions").select("user_id").eq(
+        session_response = await db.table("test_sessions").select("user_id").eq(
             "session_id", str(session_id)
         ).execute()
         
@@ -284,8 +531,9 @@ async def get_proctoring_stats(
                 detail="Access denied"
             )
         
-        # Get violation counts by type
-        violations_response = db.table("proctoring_violations").select("*").eq(
+        # Get violation counts by type (after writing buffered events)
+        await events.flush(db)
+        violations_response = await db.table("proctoring_violations").select("*").eq(
             "session_id", str(session_id)
         ).execute()
         
@@ -305,7 +553,7 @@ async def get_proctoring_stats(
             stats["by_severity"][severity] = stats["by_severity"].get(severity, 0) + 1
         
         # Get face verification stats
-        face_logs_response = db.table("face_verification_logs").select("*").eq(
+        face_logs_response = await db.table("face_verification_logs").select("*").eq(
             "session_id", str(session_id)
         ).execute()
         
@@ -4,6 +4,8 @@ from supabase import Client
 from models.user import TokenData
 from utils.security import get_current_active_user
 from utils.face_verification import FaceVerification
+from utils.reference_faces import ReferenceFaceCache, get_reference_faces
+from utils.user_info_cache import UserInfoCache, get_user_info_cache
 from typing import Dict, Any
 import uuid
 from datetime import datetime
@@ -18,7 +20,9 @@ MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
 async def upload_profile_picture(
     file: UploadFile = File(...),
     current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+    db: Client = Depends(get_supabase_admin),
+    faces: ReferenceFaceCache = Depends(get_reference_faces),
+    user_info: UserInfoCache = Depends(get_user_info_cache)
 ):
     """
     Upload profile picture to Supabase storage with face validation
@@ -108,6 +112,10 @@ async def upload_profile_picture(
                 detail="Failed to update profile with picture URL"
             )
         
+        # New reference image for face verification; no download needed
+        faces.store(current_user.user_id, public_url, file_contents)
+        await user_info.invalidate(current_user.user_id)
+        
         return {
             "message": "Profile picture uploaded successfully",
             "profile_picture_url": public_url,
@@ -178,7 +186,9 @@ async def get_profile_picture(
 @router.delete("/picture")
 async def delete_profile_picture(
     current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+    db: Client = Depends(get_supabase_admin),
+    faces: ReferenceFaceCache = Depends(get_reference_faces),
+    user_info: UserInfoCache = Depends(get_user_info_cache)
 ):
     """
     Delete user's profile picture from storage and database
@@ -228,6 +238,9 @@ async def delete_profile_picture(
             "updated_at": datetime.utcnow().isoformat()
         }).eq("user_id", str(current_user.user_id)).execute()
         
+        faces.invalidate(current_user.user_id)
+        await user_info.invalidate(current_user.user_id)
+        
         return {
             "message": "Profile picture deleted successfully",
             "user_id": str(current_user.user_id)
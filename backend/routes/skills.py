@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException, status, Depends
-from database import get_supabase_admin
-from supabase import Client
+from database import get_async_supabase_admin
+from supabase import AsyncClient
 from models.user import TokenData
-from utils.security import get_current_active_user
+from utils.security import get_current_active_user, require_operator
+from utils.skill_catalog import SkillCatalog, get_skill_catalog
 from typing import List, Dict, Any
 from pydantic import BaseModel, Field
 from uuid import UUID
@@ -26,13 +27,15 @@ class SkillResponse(BaseModel):
 
 
 @router.get("/list", response_model=List[Dict[str, Any]])
-async def get_all_skills(db: Client = Depends(get_supabase_admin)):
+async def get_all_skills(
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    catalog: SkillCatalog = Depends(get_skill_catalog)
+):
     """
     Get all available skills from skills_master table
     """
     try:
-        response = db.table("skills_master").select("*").order("skill_name").execute()
-        return response.data or []
+        return await catalog.list_rows(db)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -40,10 +43,20 @@ async def get_all_skills(db: Client = Depends(get_supabase_admin)):
         )
 
 
+@router.get("/cache/stats", response_model=Dict[str, Any], dependencies=[Depends(require_operator)])
+async def get_skill_cache_stats(
+    catalog: SkillCatalog = Depends(get_skill_catalog)
+):
+    """
+    Get hit/miss counters for the in-process skill catalog cache
+    """
+    return catalog.stats()
+
+
 @router.get("/student/skills", response_model=List[Dict[str, Any]])
 async def get_user_skills(
     current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin)
 ):
     """
     Get all skills claimed by the current user with skill details
@@ -52,7 +65,7 @@ async def get_user_skills(
         user_id = str(current_user.user_id)
         
         # Join user_skills with skills_master to get skill names
-        response = db.table("user_skills").select(
+        response = await db.table("user_skills").select(
             "user_skill_id, skill_id, proficiency_level, verification_status, "
             "years_of_experience, claimed_at, skills_master(skill_name, skill_category)"
         ).eq("user_id", user_id).execute()
@@ -85,7 +98,7 @@ async def get_user_skills(
 async def save_user_skills(
     skills: List[SkillCreate],
     current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin)
 ):
     """
     Save/update user skills. Uses upsert to handle both create and update.
@@ -106,7 +119,7 @@ async def save_user_skills(
             )
         
         # Fetch existing skills to preserve their verification status
-        existing_skills_response = db.table("user_skills").select(
+        existing_skills_response = await db.table("user_skills").select(
             "skill_id, verification_status"
         ).eq("user_id", user_id).execute()
         
@@ -135,7 +148,7 @@ async def save_user_skills(
         
         # Use upsert to handle both insert and update
         # on_conflict specifies the unique constraint columns
-        response = db.table("user_skills").upsert(
+        response = await db.table("user_skills").upsert(
             skills_to_save,
             on_conflict="user_id,skill_id"
         ).execute()
@@ -165,7 +178,7 @@ async def save_user_skills(
 async def delete_user_skill(
     user_skill_id: UUID,
     current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin)
 ):
     """
     Delete a specific user skill
@@ -180,7 +193,7 @@ async def delete_user_skill(
         user_id = str(current_user.user_id)
         
         # First verify the skill belongs to the user
-        check_response = db.table("user_skills").select("user_id").eq(
+        check_response = await db.table("user_skills").select("user_id").eq(
             "user_skill_id", str(user_skill_id)
         ).execute()
         
@@ -197,7 +210,7 @@ async def delete_user_skill(
             )
         
         # Delete the skill
-        response = db.table("user_skills").delete().eq(
+        response = await db.table("user_skills").delete().eq(
             "user_skill_id", str(user_skill_id)
         ).execute()
         
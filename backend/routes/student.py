@@ -12,6 +12,7 @@ from models.student import (
 from models.user import TokenData
 from utils.security import get_current_active_user
 from utils.resume_extractor import resume_extractor
+from utils.user_info_cache import UserInfoCache, get_user_info_cache
 from typing import List, Dict, Any
 import json
 from uuid import UUID
@@ -95,7 +96,8 @@ async def upload_and_parse_resume(
 async def update_student_profile(
     profile_data: StudentProfileUpdate,
     current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+    db: Client = Depends(get_supabase_admin),
+    user_info: UserInfoCache = Depends(get_user_info_cache)
 ):
     """
     Update student profile with data from resume or manual entry
@@ -139,6 +141,8 @@ async def update_student_profile(
             "profile_completion_percentage": completion_percentage
         }).eq("user_id", student_id).execute()
         
+        await user_info.invalidate(student_id)
+        
         return {
             "message": "Profile updated successfully",
             "profile": profile,
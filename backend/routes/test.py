@@ -1,30 +1,44 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from database import get_supabase_admin
-from supabase import Client
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Header, Response
+from database import get_async_supabase_admin
+from supabase import AsyncClient
 from models.user import TokenData
 from models.test import (
     TestSessionCreate, TestSession, AnswerSubmit, AnswerResponse,
     TestSubmit, TestResult, QuestionResponse, QuestionType
 )
-from utils.security import get_current_active_user
-from typing import Dict, Any, List
+from utils.security import get_current_active_user, require_operator
+from utils.skill_catalog import SkillCatalog, get_skill_catalog
+from utils.answer_key_cache import AnswerKeyCache, get_answer_key_cache
+from utils.question_pool import QuestionPoolCache, get_question_pools
+from utils.deadline_scheduler import DeadlineScheduler, get_deadline_scheduler
+from utils.proctoring_events import ProctoringEventBuffer, get_proctoring_events
+from utils.face_check_policy import FaceCheckTracker, get_face_checks
+from utils.session_manifest import (
+    SessionManifest, SessionManifestCache, get_session_manifests, MANIFEST_COLUMNS
+)
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta, timezone
 from uuid import UUID
-import random
+import asyncio
 
 router = APIRouter(prefix="/test", tags=["Test"])
 
 # Test Configuration
 TOTAL_QUESTIONS_PER_TEST = 30
+QUESTION_DIFFICULTY_MIX = {"Easy": 10, "Medium": 10, "Hard": 10}  # Shortfalls are filled from other levels
 TEST_DURATION_MINUTES = 45
 PASSING_PERCENTAGE = 70
+MAX_PROCTORING_VIOLATIONS = 5  # More than this fails a proctored test
 
 
 @router.post("/sessions/create", response_model=Dict[str, Any])
 async def create_test_session(
     session_data: TestSessionCreate,
     current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    answer_keys: AnswerKeyCache = Depends(get_answer_key_cache),
+    question_pools: QuestionPoolCache = Depends(get_question_pools),
+    manifests: SessionManifestCache = Depends(get_session_manifests)
 ):
     """
     Create a new test session for a skill
@@ -37,7 +51,7 @@ async def create_test_session(
             )
         
         # Check if user has claimed this skill
-        skill_check = db.table("user_skills").select("*").eq(
+        skill_check = await db.table("user_skills").select("*").eq(
             "user_id", str(current_user.user_id)
         ).eq("skill_id", str(session_data.skill_id)).execute()
         
@@ -49,7 +63,7 @@ async def create_test_session(
         
         # Check if user has profile picture for proctored tests
         if session_data.is_proctored:
-            profile_check = db.table("student_profiles").select("profile_picture_url").eq(
+            profile_check = await db.table("student_profiles").select("profile_picture_url").eq(
                 "student_id", str(current_user.user_id)
             ).execute()
             
@@ -59,12 +73,13 @@ async def create_test_session(
                     detail="Profile picture required for proctored tests. Please upload your photo first."
                 )
         
-        # Check existing attempts
-        attempts_check = db.table("test_sessions").select("session_id", count="exact").eq(
-            "user_id", str(current_user.user_id)
-        ).eq("skill_id", str(session_data.skill_id)).execute()
+        # Check existing attempts, with the questions they used
+        attempts_check = await db.table("test_sessions").select(
+            "session_id, session_questions(question_id)"
+        ).eq("user_id", str(current_user.user_id)).eq("skill_id", str(session_data.skill_id)).execute()
         
-        attempts_count = attempts_check.count if attempts_check.count else 0
+        previous_sessions = attempts_check.data or []
+        attempts_count = len(previous_sessions)
         
         if attempts_count >= 3:
             raise HTTPException(
@@ -72,20 +87,23 @@ async def create_test_session(
                 detail="Maximum 3 attempts allowed per skill"
             )
         
-        # Fetch questions for this skill
-        questions_response = db.table("test_questions").select("*").eq(
-            "skill_id", str(session_data.skill_id)
-        ).execute()
+        # Draw a stratified sample from the in-memory pool, avoiding questions from earlier attempts
+        pool = await question_pools.get_pool(db, session_data.skill_id)
         
-        if not questions_response.data or len(questions_response.data) < TOTAL_QUESTIONS_PER_TEST:
+        if len(pool) < TOTAL_QUESTIONS_PER_TEST:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Not enough questions available for this skill (need {TOTAL_QUESTIONS_PER_TEST})"
             )
         
-        # Randomly select questions
-        selected_questions = random.sample(questions_response.data, TOTAL_QUESTIONS_PER_TEST)
-        total_score = sum(q.get("points", 1) for q in selected_questions)
+        previous_question_ids = [
+            item["question_id"]
+            for previous in previous_sessions
+            for item in previous.get("session_questions") or []
+        ]
+        selected_questions, total_score = pool.sample(
+            QUESTION_DIFFICULTY_MIX, TOTAL_QUESTIONS_PER_TEST, previous_question_ids
+        )
         
         # Create test session
         session_data_dict = {
@@ -98,7 +116,7 @@ async def create_test_session(
             "created_at": datetime.now(timezone.utc).isoformat()
         }
         
-        session_response = db.table("test_sessions").insert(session_data_dict).execute()
+        session_response = await db.table("test_sessions").insert(session_data_dict).execute()
         
         if not session_response.data:
             raise HTTPException(
@@ -117,7 +135,22 @@ async def create_test_session(
                 "question_order": idx + 1
             })
         
-        db.table("session_questions").insert(question_mappings).execute()
+        # Store the session's questions and fetch their content for the manifest together
+        question_ids = [question["question_id"] for question in selected_questions]
+        _, content_response = await asyncio.gather(
+            db.table("session_questions").insert(question_mappings).execute(),
+            db.table("test_questions").select(MANIFEST_COLUMNS).in_("question_id", question_ids).execute()
+        )
+        
+        # Cache the answer key so answers are graded without reading test_questions
+        await answer_keys.store(session_id, selected_questions)
+        
+        # Cache the question payload so get_session_questions needs no join
+        content_by_id = {str(row["question_id"]): row for row in content_response.data or []}
+        if len(content_by_id) == len(question_ids):
+            await manifests.store(session_id, str(current_user.user_id), [
+                content_by_id[question_id] for question_id in question_ids
+            ])
         
         return {
             "message": "Test session created successfully",
@@ -142,14 +175,16 @@ async def create_test_session(
 async def start_test_session(
     session_id: UUID,
     current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    answer_keys: AnswerKeyCache = Depends(get_answer_key_cache),
+    deadlines: DeadlineScheduler = Depends(get_deadline_scheduler)
 ):
     """
     Start a test session
     """
     try:
         # Verify session belongs to user
-        session_response = db.table("test_sessions").select("*").eq(
+        session_response = await db.table("test_sessions").select("*").eq(
             "session_id", str(session_id)
         ).eq("user_id", str(current_user.user_id)).execute()
         
@@ -168,15 +203,31 @@ async def start_test_session(
             )
         
         # Update session status
+        started_at = datetime.now(timezone.utc)
         update_data = {
             "status": "InProgress",
-            "started_at": datetime.now(timezone.utc).isoformat()
+            "started_at": started_at.isoformat()
         }
         
-        db.table("test_sessions").update(update_data).eq(
+        await db.table("test_sessions").update(update_data).eq(
             "session_id", str(session_id)
         ).execute()
         
+        # The session is auto-submitted when the time limit runs out
+        deadlines.schedule(session_id, started_at)
+        
+        # Re-cache the answer key if it was evicted (or the server restarted) since creation
+        if await answer_keys.get(str(session_id)) is None:
+            key_response = await db.table("session_questions").select(
+                "question_id, test_questions(question_type, correct_answer, points)"
+            ).eq("session_id", str(session_id)).execute()
+            
+            await answer_keys.store(str(session_id), [
+                {"question_id": item["question_id"], **item["test_questions"]}
+                for item in key_response.data or []
+                if item.get("test_questions")
+            ])
+        
         return {
             "message": "Test session started",
             "session_id": str(session_id),
@@ -193,63 +244,109 @@ async def start_test_session(
         )
 
 
+async def _get_session_manifest(
+    session_id: UUID,
+    current_user: TokenData,
+    db: AsyncClient,
+    manifests: SessionManifestCache
+) -> SessionManifest:
+    """Cached question manifest of a session, rebuilt from the database on a miss"""
+    manifest = await manifests.get(str(session_id))
+    
+    if manifest is not None:
+        if manifest.user_id != str(current_user.user_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Test session not found"
+            )
+        return manifest
+    
+    # Verify session belongs to user
+    session_response = await db.table("test_sessions").select("status").eq(
+        "session_id", str(session_id)
+    ).eq("user_id", str(current_user.user_id)).execute()
+    
+    if not session_response.data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Test session not found"
+        )
+    
+    # Get questions for this session
+    session_questions = await db.table("session_questions").select(
+        f"question_id, question_order, test_questions({MANIFEST_COLUMNS})"
+    ).eq("session_id", str(session_id)).order("question_order").execute()
+    
+    if not session_questions.data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No questions found for this session"
+        )
+    
+    return await manifests.store(str(session_id), str(current_user.user_id), [
+        item["test_questions"] for item in session_questions.data
+    ])
+
+
 @router.get("/sessions/{session_id}/questions", response_model=List[QuestionResponse])
 async def get_session_questions(
     session_id: UUID,
+    if_none_match: Optional[str] = Header(None),
     current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    manifests: SessionManifestCache = Depends(get_session_manifests)
 ):
     """
     Get all questions for a test session (without correct answers)
+    Served from the session manifest; send If-None-Match to get 304 on re-fetch
     """
     try:
-        # Verify session belongs to user
-        session_response = db.table("test_sessions").select("status").eq(
-            "session_id", str(session_id)
-        ).eq("user_id", str(current_user.user_id)).execute()
+        manifest = await _get_session_manifest(session_id, current_user, db, manifests)
+        headers = {"ETag": manifest.etag, "Cache-Control": "private, no-cache"}
         
-        if not session_response.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Test session not found"
-            )
+        if if_none_match == manifest.etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
         
-        # Get questions for this session
-        session_questions = db.table("session_questions").select(
-            "question_id, question_order, test_questions(*)"
-        ).eq("session_id", str(session_id)).order("question_order").execute()
+        return Response(content=manifest.body, media_type="application/json", headers=headers)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch questions: {str(e)}"
+        )
+
+
+@router.get("/sessions/{session_id}/questions/{question_order}", response_model=QuestionResponse)
+async def get_session_question(
+    session_id: UUID,
+    question_order: int,
+    current_user: TokenData = Depends(get_current_active_user),
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    manifests: SessionManifestCache = Depends(get_session_manifests)
+):
+    """
+    Get one question of a test session by its 1-based order, for progressive loading
+    """
+    try:
+        manifest = await _get_session_manifest(session_id, current_user, db, manifests)
+        questions = manifest.questions()
         
-        if not session_questions.data:
+        if question_order < 1 or question_order > len(questions):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="No questions found for this session"
+                detail="Question not found"
             )
         
-        # Format questions (exclude correct_answer)
-        formatted_questions = []
-        for item in session_questions.data:
-            question = item["test_questions"]
-            formatted_question = {
-                "question_id": question["question_id"],
-                "skill_id": question["skill_id"],
-                "question_type": question["question_type"],
-                "difficulty_level": question["difficulty_level"],
-                "question_text": question["question_text"],
-                "options": question.get("options"),
-                "points": question.get("points", 1),
-                "time_limit_seconds": question.get("time_limit_seconds"),
-                "question_order": item["question_order"]
-            }
-            formatted_questions.append(formatted_question)
-        
-        return formatted_questions
+        return questions[question_order - 1]
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to fetch questions: {str(e)}"
+            detail=f"Failed to fetch question: {str(e)}"
         )
 
 
@@ -258,83 +355,62 @@ async def submit_answer(
     session_id: UUID,
     answer_data: AnswerSubmit,
     current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    answer_keys: AnswerKeyCache = Depends(get_answer_key_cache)
 ):
     """
     Submit an answer for a question
     """
     try:
-        # Verify session
-        session_response = db.table("test_sessions").select("status").eq(
-            "session_id", str(session_id)
-        ).eq("user_id", str(current_user.user_id)).execute()
+        answer_key = await answer_keys.get(str(session_id))
+        graded = answer_keys.grade(answer_key, answer_data.question_id, answer_data.answer) if answer_key else None
+        
+        rpc_params = {
+            "p_session_id": str(session_id),
+            "p_user_id": str(current_user.user_id),
+            "p_question_id": str(answer_data.question_id),
+            "p_answer": answer_data.answer,
+            "p_time_taken_seconds": answer_data.time_taken_seconds
+        }
         
-        if not session_response.data:
+        if graded is not None:
+            # Graded from the cached key; the database only validates and saves
+            is_correct, points_earned = graded
+            response = await db.rpc("save_graded_test_answer", {
+                **rpc_params,
+                "p_is_correct": is_correct,
+                "p_points_earned": points_earned
+            }).execute()
+        else:
+            # Key not cached: validate, grade and upsert in the database
+            response = await db.rpc("submit_test_answer", rpc_params).execute()
+        
+        result = response.data[0] if response.data else {}
+        error = result.get("error")
+        
+        if error == "session_not_found":
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Test session not found"
             )
         
-        if session_response.data[0]["status"] != "InProgress":
+        if error == "session_not_in_progress":
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Test session is not in progress"
             )
         
-        # Check if answer already exists
-        existing_answer = db.table("test_answers").select("answer_id").eq(
-            "session_id", str(session_id)
-        ).eq("question_id", str(answer_data.question_id)).execute()
-        
-        # Get question details
-        question_response = db.table("test_questions").select("*").eq(
-            "question_id", str(answer_data.question_id)
-        ).execute()
-        
-        if not question_response.data:
+        if error == "question_not_found":
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Question not found"
             )
         
-        question = question_response.data[0]
-        
-        # Check if answer is correct
-        is_correct = False
-        if question["question_type"] == "MCQ":
-            is_correct = answer_data.answer.strip() == question["correct_answer"].strip()
-        # For coding and short answer, manual grading would be needed
-        # For now, we'll mark them as needing review
-        
-        points_earned = question.get("points", 1) if is_correct else 0
-        
-        # Prepare answer data
-        answer_dict = {
-            "session_id": str(session_id),
-            "question_id": str(answer_data.question_id),
-            "user_id": str(current_user.user_id),
-            "answer": answer_data.answer,
-            "is_correct": is_correct if question["question_type"] == "MCQ" else None,
-            "points_earned": points_earned,
-            "time_taken_seconds": answer_data.time_taken_seconds,
-            "submitted_at": datetime.now(timezone.utc).isoformat()
-        }
-        
-        # Insert or update answer
-        if existing_answer.data:
-            response = db.table("test_answers").update(answer_dict).eq(
-                "answer_id", existing_answer.data[0]["answer_id"]
-            ).execute()
-            answer_id = existing_answer.data[0]["answer_id"]
-        else:
-            response = db.table("test_answers").insert(answer_dict).execute()
-            answer_id = response.data[0]["answer_id"] if response.data else None
-        
         return {
-            "answer_id": answer_id,
+            "answer_id": result.get("answer_id"),
             "question_id": str(answer_data.question_id),
-            "is_correct": is_correct if question["question_type"] == "MCQ" else None,
-            "points_earned": points_earned
+            "is_correct": result.get("is_correct"),
+            "points_earned": result.get("points_earned", 0)
         }
         
     except HTTPException:
@@ -347,114 +423,85 @@ async def submit_answer(
         )
 
 
+async def _build_test_result(result: Dict[str, Any], db: AsyncClient, catalog: SkillCatalog) -> Dict[str, Any]:
+    """TestResult fields from a finalize_test_session row"""
+    started_at = datetime.fromisoformat(result["started_at"].replace('Z', '+00:00'))
+    completed_at = datetime.fromisoformat(result["completed_at"].replace('Z', '+00:00'))
+    
+    return {
+        "session_id": result["session_id"],
+        "user_id": result["user_id"],
+        "skill_id": result["skill_id"],
+        "skill_name": await catalog.skill_name(db, result["skill_id"]),
+        "total_questions": result["total_questions"],
+        "correct_answers": result["correct_answers"],
+        "obtained_score": result["obtained_score"],
+        "total_score": result["total_score"],
+        "percentage": float(result["percentage"]),
+        "status": result["status"],
+        "verification_status": result["verification_status"],
+        "started_at": started_at,
+        "completed_at": completed_at,
+        "duration_minutes": int((completed_at - started_at).total_seconds() / 60),
+        "proctoring_violations": result["proctoring_violations"]
+    }
+
+
 @router.post("/sessions/{session_id}/submit", response_model=TestResult)
 async def submit_test(
     session_id: UUID,
     submit_data: TestSubmit,
     current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    catalog: SkillCatalog = Depends(get_skill_catalog),
+    answer_keys: AnswerKeyCache = Depends(get_answer_key_cache),
+    deadlines: DeadlineScheduler = Depends(get_deadline_scheduler),
+    events: ProctoringEventBuffer = Depends(get_proctoring_events),
+    checks: FaceCheckTracker = Depends(get_face_checks)
 ):
     """
     Submit test and calculate results
     """
     try:
-        # Verify session
-        session_response = db.table("test_sessions").select("*").eq(
-            "session_id", str(session_id)
-        ).eq("user_id", str(current_user.user_id)).execute()
+        # Buffered proctoring violations must be in the table before scoring
+        await events.flush(db)
         
-        if not session_response.data:
+        # Score, count violations, complete the session, verify the skill and
+        # update the leaderboard in one transaction
+        response = await db.rpc("finalize_test_session", {
+            "p_session_id": str(session_id),
+            "p_user_id": str(current_user.user_id),
+            "p_passing_percentage": PASSING_PERCENTAGE,
+            "p_max_violations": MAX_PROCTORING_VIOLATIONS
+        }).execute()
+        
+        result = response.data[0] if response.data else {"error": "session_not_found"}
+        
+        if result.get("error") == "session_not_found":
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Test session not found"
             )
         
-        session = session_response.data[0]
-        
-        if session["status"] == "Completed":
+        if result.get("error") == "already_submitted":
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Test already submitted"
             )
         
-        # Get all answers
-        answers_response = db.table("test_answers").select("*").eq(
-            "session_id", str(session_id)
-        ).execute()
-        
-        answers = answers_response.data or []
-        
-        # Calculate results
-        total_score = session["total_score"]
-        obtained_score = sum(answer.get("points_earned", 0) for answer in answers)
-        correct_answers = sum(1 for answer in answers if answer.get("is_correct") == True)
-        percentage = (obtained_score / total_score * 100) if total_score > 0 else 0
-        
-        # Determine verification status
-        verification_status = "Verified" if percentage >= PASSING_PERCENTAGE else "Failed"
-        
-        # Calculate duration
-        started_at = datetime.fromisoformat(session["started_at"].replace('Z', '+00:00'))
-        completed_at = datetime.now(timezone.utc)
-        duration = completed_at - started_at
-        duration_minutes = int(duration.total_seconds() / 60)
-        
-        # Count proctoring violations
-        violations_response = db.table("proctoring_violations").select(
-            "violation_id", count="exact"
-        ).eq("session_id", str(session_id)).execute()
-        
-        violation_count = violations_response.count if violations_response.count else 0
-        
-        # If too many violations, mark as failed
-        if session["is_proctored"] and violation_count > 5:
-            verification_status = "Failed"
-        
-        # Update session
-        update_data = {
-            "status": "Completed",
-            "completed_at": completed_at.isoformat(),
-            "obtained_score": obtained_score,
-            "percentage": percentage,
-            "verification_status": verification_status
-        }
-        
-        db.table("test_sessions").update(update_data).eq(
-            "session_id", str(session_id)
-        ).execute()
-        
-        # Update user skill verification status
-        if verification_status == "Verified":
-            db.table("user_skills").update({
-                "verification_status": "Verified"
-            }).eq("user_id", str(current_user.user_id)).eq(
-                "skill_id", session["skill_id"]
-            ).execute()
+        if result.get("error") == "not_in_progress":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Test session is not in progress"
+            )
         
-        # Get skill name
-        skill_response = db.table("skills_master").select("skill_name").eq(
-            "skill_id", session["skill_id"]
-        ).execute()
+        # No more answers can be graded for this session
+        await answer_keys.invalidate(str(session_id))
+        deadlines.cancel(session_id)
+        events.forget(session_id)
+        checks.forget(session_id)
         
-        skill_name = skill_response.data[0]["skill_name"] if skill_response.data else "Unknown"
-        
-        return {
-            "session_id": str(session_id),
-            "user_id": str(current_user.user_id),
-            "skill_id": session["skill_id"],
-            "skill_name": skill_name,
-            "total_questions": session["total_questions"],
-            "correct_answers": correct_answers,
-            "obtained_score": obtained_score,
-            "total_score": total_score,
-            "percentage": round(percentage, 2),
-            "status": "Completed",
-            "verification_status": verification_status,
-            "started_at": started_at,
-            "completed_at": completed_at,
-            "duration_minutes": duration_minutes,
-            "proctoring_violations": violation_count
-        }
+        return await _build_test_result(result, db, catalog)
         
     except HTTPException:
         raise
@@ -470,14 +517,15 @@ async def submit_test(
 async def get_test_result(
     session_id: UUID,
     current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    catalog: SkillCatalog = Depends(get_skill_catalog)
 ):
     """
     Get test results for a completed session
     """
     try:
         # Verify session
-        session_response = db.table("test_sessions").select("*").eq(
+        session_response = await db.table("test_sessions").select("*").eq(
             "session_id", str(session_id)
         ).eq("user_id", str(current_user.user_id)).execute()
         
@@ -496,7 +544,7 @@ async def get_test_result(
             )
         
         # Get answer stats
-        answers_response = db.table("test_answers").select("*").eq(
+        answers_response = await db.table("test_answers").select("*").eq(
             "session_id", str(session_id)
         ).execute()
         
@@ -504,18 +552,14 @@ async def get_test_result(
         correct_answers = sum(1 for answer in answers if answer.get("is_correct") == True)
         
         # Get violations
-        violations_response = db.table("proctoring_violations").select(
+        violations_response = await db.table("proctoring_violations").select(
             "violation_id", count="exact"
         ).eq("session_id", str(session_id)).execute()
         
         violation_count = violations_response.count if violations_response.count else 0
         
         # Get skill name
-        skill_response = db.table("skills_master").select("skill_name").eq(
-            "skill_id", session["skill_id"]
-        ).execute()
-        
-        skill_name = skill_response.data[0]["skill_name"] if skill_response.data else "Unknown"
+        skill_name = await catalog.skill_name(db, session["skill_id"])
         
         # Calculate duration
         started_at = datetime.fromisoformat(session["started_at"].replace('Z', '+00:00'))
@@ -553,7 +597,8 @@ async def get_test_result(
 @router.get("/skills-performance", response_model=Dict[str, Any])
 async def get_skills_performance(
     current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    catalog: SkillCatalog = Depends(get_skill_catalog)
 ):
     """
     Get user's test performance across all skills
@@ -561,7 +606,7 @@ async def get_skills_performance(
     """
     try:
         # Get all test sessions for user
-        sessions_response = db.table("test_sessions").select(
+        sessions_response = await db.table("test_sessions").select(
             "session_id, skill_id, percentage, obtained_score, total_score, verification_status, completed_at"
         ).eq("user_id", str(current_user.user_id)).eq("status", "Completed").execute()
         
@@ -592,11 +637,7 @@ async def get_skills_performance(
         
         # Get skill names
         skill_ids = list(skill_performance.keys())
-        skills_response = db.table("skills_master").select("skill_id, skill_name").in_(
-            "skill_id", skill_ids
-        ).execute()
-        
-        skills_map = {skill["skill_id"]: skill["skill_name"] for skill in skills_response.data}
+        skills_map = await catalog.skill_names(db, skill_ids)
         
         # Format response
         skills_data = []
@@ -633,45 +674,44 @@ async def get_skills_performance(
 
 @router.get("/history", response_model=List[TestResult])
 async def get_test_history(
+    after: Optional[datetime] = Query(None, description="Return sessions created before this created_at (cursor)"),
+    limit: int = Query(50, ge=1, le=100, description="Maximum sessions to return"),
     current_user: TokenData = Depends(get_current_active_user),
-    db: Client = Depends(get_supabase_admin)
+    db: AsyncClient = Depends(get_async_supabase_admin),
+    catalog: SkillCatalog = Depends(get_skill_catalog)
 ):
     """
     Get user's test history
+    
+    Correct answer and violation counts are embedded in a single select and
+    skill names come from the skill catalog. Paginate by passing the last
+    result's created_at as ?after=.
     """
     try:
-        sessions_response = db.table("test_sessions").select("*").eq(
-            "user_id", str(current_user.user_id)
-        ).order("created_at", desc=True).execute()
+        query = db.table("test_sessions").select(
+            "*, test_answers(count), proctoring_violations(count)"
+        ).eq("user_id", str(current_user.user_id)).eq("status", "Completed").eq(
+            "test_answers.is_correct", True
+        )
+        
+        if after:
+            query = query.lt("created_at", after.isoformat())
+        
+        sessions_response = await query.order("created_at", desc=True).limit(limit).execute()
         
         if not sessions_response.data:
             return []
         
         results = []
         for session in sessions_response.data:
-            if session["status"] != "Completed":
-                continue
-            
-            # Get skill name
-            skill_response = db.table("skills_master").select("skill_name").eq(
-                "skill_id", session["skill_id"]
-            ).execute()
-            
-            skill_name = skill_response.data[0]["skill_name"] if skill_response.data else "Unknown"
+            skill_name = await catalog.skill_name(db, session["skill_id"])
             
-            # Get correct answers count
-            answers_response = db.table("test_answers").select("is_correct").eq(
-                "session_id", session["session_id"]
-            ).execute()
-            
-            correct_answers = sum(1 for a in (answers_response.data or []) if a.get("is_correct") == True)
-            
-            # Get violations
-            violations_response = db.table("proctoring_violations").select(
-                "violation_id", count="exact"
-            ).eq("session_id", session["session_id"]).execute()
+            # Embedded counts arrive as [{"count": n}]
+            answers = session.get("test_answers") or [{}]
+            correct_answers = answers[0].get("count", 0)
             
-            violation_count = violations_response.count if violations_response.count else 0
+            violations = session.get("proctoring_violations") or [{}]
+            violation_count = violations[0].get("count", 0)
             
             started_at = datetime.fromisoformat(session["started_at"].replace('Z', '+00:00'))
             completed_at = datetime.fromisoformat(session.get("completed_at", session["started_at"]).replace('Z', '+00:00'))
@@ -693,7 +733,8 @@ async def get_test_history(
                 "started_at": started_at,
                 "completed_at": completed_at if session.get("completed_at") else None,
                 "duration_minutes": duration_minutes,
-                "proctoring_violations": violation_count
+                "proctoring_violations": violation_count,
+                "created_at": session.get("created_at")
             })
         
         return results
@@ -703,3 +744,24 @@ async def get_test_history(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch test history: {str(e)}"
         )
+
+
+@router.get("/question-pools/stats", response_model=Dict[str, Any], dependencies=[Depends(require_operator)])
+async def get_question_pool_stats(
+    question_pools: QuestionPoolCache = Depends(get_question_pools)
+):
+    """
+    Get sizes and versions of the in-memory question pools
+    """
+    return question_pools.stats()
+
+
+@router.get("/deadlines/stats", response_model=Dict[str, Any], dependencies=[Depends(require_operator)])
+async def get_deadline_stats(
+    deadlines: DeadlineScheduler = Depends(get_deadline_scheduler)
+):
+    """
+    Get the number of scheduled session deadlines and expiry counters
+    """
+    return deadlines.stats()
+
@@ -0,0 +1,15 @@
+"""
+Test configuration
+
+Tests import app modules directly (run pytest from backend/). The settings
+the modules read at import time are filled with placeholders when no .env
+provides them; nothing in these tests talks to Supabase.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+for name in ("SUPABASE_URL", "SUPABASE_KEY", "SUPABASE_SERVICE_KEY", "SECRET_KEY"):
+    os.environ.setdefault(name, "https://test.supabase.co" if name == "SUPABASE_URL" else "test")
@@ -0,0 +1,109 @@
+"""
+Next-check intervals of the fixed and adaptive face check policies
+
+Policies are pure functions of CheckSignals, so these tests need no app.
+Jitter is off unless a test is about jitter.
+"""
+
+import random
+import pytest
+from utils.face_check_policy import (
+    AdaptiveIntervalPolicy,
+    CheckIntervalPolicy,
+    CheckSignals,
+    FixedIntervalPolicy
+)
+
+HIT = (True, 95.0)
+MISS = (False, 10.0)
+WEAK_HIT = (True, 60.0)
+
+
+def adaptive(**overrides) -> AdaptiveIntervalPolicy:
+    options = dict(base_seconds=30, min_seconds=5, max_seconds=600, jitter=0)
+    options.update(overrides)
+    return AdaptiveIntervalPolicy(**options)
+
+
+def signals(checks, previous=None, total_violations=0, new_violations=0) -> CheckSignals:
+    return CheckSignals(checks, total_violations, new_violations, previous)
+
+
+def test_policy_interface_is_abstract():
+    with pytest.raises(TypeError):
+        CheckIntervalPolicy()
+
+
+def test_fixed_policy_ignores_signals():
+    policy = FixedIntervalPolicy(base_seconds=30)
+    
+    assert policy.next_interval(signals([HIT])) == 30
+    assert policy.next_interval(signals([MISS], previous=30, total_violations=4, new_violations=2)) == 30
+
+
+def test_hits_double_the_interval_up_to_max():
+    policy = adaptive()
+    interval = None
+    intervals = []
+    for _ in range(8):
+        interval = policy.next_interval(signals([HIT], previous=interval))
+        intervals.append(interval)
+    
+    assert intervals == [60, 120, 240, 480, 600, 600, 600, 600]
+
+
+def test_miss_snaps_to_min():
+    policy = adaptive()
+    
+    assert policy.next_interval(signals([HIT, HIT, MISS], previous=480)) == 5
+
+
+def test_low_confidence_hit_resets_to_base():
+    policy = adaptive()
+    
+    assert policy.next_interval(signals([HIT, WEAK_HIT, HIT], previous=240)) == 30
+
+
+def test_new_violations_shrink_the_interval():
+    policy = adaptive()
+    
+    assert policy.next_interval(signals([HIT], previous=480, total_violations=1, new_violations=1)) == 15
+    assert policy.next_interval(signals([HIT], previous=480, total_violations=2, new_violations=2)) == 7.5
+    # Never below min_seconds
+    assert policy.next_interval(signals([HIT], previous=480, total_violations=5, new_violations=5)) == 5
+
+
+def test_past_violations_lower_the_ceiling():
+    policy = adaptive()
+    
+    assert policy.next_interval(signals([HIT], previous=600, total_violations=1)) == 300
+    assert policy.next_interval(signals([HIT], previous=600, total_violations=2)) == 150
+    # The ceiling never drops below base_seconds
+    assert policy.next_interval(signals([HIT], previous=30, total_violations=10)) == 30
+
+
+@pytest.mark.parametrize("checks, previous, total, new", [
+    ([], None, 0, 0),
+    ([HIT], 1, 0, 0),
+    ([HIT], 10000, 0, 0),
+    ([MISS], 10000, 0, 0),
+    ([HIT], 10000, 50, 50),
+    ([WEAK_HIT], 0.1, 3, 0)
+])
+def test_interval_stays_within_bounds(checks, previous, total, new):
+    policy = adaptive(jitter=0.5, rng=random.Random(7))
+    
+    for _ in range(20):
+        interval = policy.next_interval(signals(checks, previous, total, new))
+        assert 5 <= interval <= 600
+
+
+def test_jitter_only_shortens_and_is_reproducible():
+    first = adaptive(jitter=0.2, rng=random.Random(1))
+    second = adaptive(jitter=0.2, rng=random.Random(1))
+    
+    intervals = [first.next_interval(signals([HIT], previous=240)) for _ in range(10)]
+    
+    assert intervals == [second.next_interval(signals([HIT], previous=240)) for _ in range(10)]
+    assert all(480 * 0.8 <= interval <= 480 for interval in intervals)
+    assert len(set(intervals)) > 1
@@ -0,0 +1,173 @@
+"""
+Micro-batching of utils.face_engine with the numpy reference backend
+
+Each test starts a real engine (one worker process) and drives it with
+random byte images: a frame equal to its reference matches, any other
+frame does not.
+"""
+
+import asyncio
+import base64
+import random
+import pytest
+from utils.face_engine import FaceEngineBusy, FaceVerificationEngine
+from utils.reference_faces import ReferenceFace
+
+IMAGE_BYTES = 4096
+
+
+def make_engine(**overrides) -> FaceVerificationEngine:
+    options = dict(
+        backend="reference",
+        workers=1,
+        max_batch_size=16,
+        batch_window_ms=20,
+        max_queue=256,
+        threshold=0.4
+    )
+    options.update(overrides)
+    return FaceVerificationEngine(**options)
+
+
+def make_sessions(count: int, seed: int = 42):
+    """References and frames; even sessions send their own picture"""
+    rng = random.Random(seed)
+    images = [rng.randbytes(IMAGE_BYTES) for _ in range(count)]
+    references = [ReferenceFace(f"test://{i}", image) for i, image in enumerate(images)]
+    frames = [
+        base64.b64encode(image if i % 2 == 0 else rng.randbytes(IMAGE_BYTES)).decode()
+        for i, image in enumerate(images)
+    ]
+    return references, frames
+
+
+def run_with_engine(engine: FaceVerificationEngine, scenario):
+    async def main():
+        engine.start()
+        try:
+            return await scenario(engine)
+        finally:
+            await engine.stop()
+    return asyncio.run(main())
+
+
+def test_concurrent_frames_share_batches():
+    references, frames = make_sessions(64)
+    
+    async def scenario(engine):
+        results = await asyncio.gather(*(
+            engine.verify(reference, frame) for reference, frame in zip(references, frames)
+        ))
+        return results, engine.stats()
+    
+    results, stats = run_with_engine(make_engine(), scenario)
+    
+    assert [result["verified"] for result in results] == [i % 2 == 0 for i in range(64)]
+    assert all(result["error"] is None for result in results)
+    assert stats["frames"] == 64
+    assert stats["failed_batches"] == 0
+    assert stats["mean_batch_size"] > 1
+    assert stats["queue_depth"] == 0 and stats["in_flight"] == 0
+
+
+def test_batches_are_capped_at_max_batch_size():
+    references, frames = make_sessions(20)
+    
+    async def scenario(engine):
+        await asyncio.gather(*(
+            engine.verify(reference, frame) for reference, frame in zip(references, frames)
+        ))
+        return list(engine._batch_sizes)
+    
+    batch_sizes = run_with_engine(make_engine(max_batch_size=8), scenario)
+    
+    assert sum(batch_sizes) == 20
+    assert max(batch_sizes) <= 8
+
+
+def test_reference_embedding_is_reused():
+    references, frames = make_sessions(1)
+    
+    async def scenario(engine):
+        first = await engine.verify(references[0], frames[0])
+        embedding = references[0].embedding
+        second = await engine.verify(references[0], frames[0])
+        return first, second, embedding
+    
+    first, second, embedding = run_with_engine(make_engine(), scenario)
+    
+    assert embedding is not None
+    assert references[0].embedding is embedding
+    assert first["verified"] and second["verified"]
+
+
+def test_lone_frame_is_dispatched_after_the_batch_window():
+    references, frames = make_sessions(2)
+    
+    async def scenario(engine):
+        # Warm the worker up so the timing below excludes process start-up
+        await engine.verify(references[0], frames[0])
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        result = await asyncio.wait_for(engine.verify(references[1], frames[1]), timeout=5)
+        return result, loop.time() - started, list(engine._batch_sizes)
+    
+    result, elapsed, batch_sizes = run_with_engine(make_engine(batch_window_ms=100), scenario)
+    
+    assert result["verified"] is False
+    assert elapsed >= 0.1
+    assert batch_sizes == [1, 1]
+
+
+def test_full_batch_does_not_wait_for_the_window():
+    references, frames = make_sessions(4)
+    
+    async def scenario(engine):
+        return await asyncio.wait_for(asyncio.gather(*(
+            engine.verify(reference, frame) for reference, frame in zip(references, frames)
+        )), timeout=5)
+    
+    # A 60 second window would time the test out if a full batch waited for it
+    results = run_with_engine(make_engine(max_batch_size=4, batch_window_ms=60000), scenario)
+    
+    assert [result["verified"] for result in results] == [True, False, True, False]
+
+
+def test_full_queue_rejects_frames():
+    references, frames = make_sessions(3)
+    
+    async def scenario(engine):
+        queued = [
+            asyncio.create_task(engine.verify(reference, frame))
+            for reference, frame in zip(references[:2], frames[:2])
+        ]
+        await asyncio.sleep(0)
+        with pytest.raises(FaceEngineBusy):
+            await engine.verify(references[2], frames[2])
+        rejected = engine.stats()["rejected"]
+        
+        # Frames still queued at shutdown fail instead of hanging
+        await engine.stop()
+        outcomes = await asyncio.gather(*queued, return_exceptions=True)
+        return rejected, outcomes
+    
+    rejected, outcomes = run_with_engine(make_engine(max_queue=2, batch_window_ms=60000), scenario)
+    
+    assert rejected == 1
+    assert all(isinstance(outcome, FaceEngineBusy) for outcome in outcomes)
+
+
+def test_invalid_frame_fails_only_itself():
+    references, frames = make_sessions(2)
+    frames[1] = "not base64!"
+    
+    async def scenario(engine):
+        return await asyncio.gather(*(
+            engine.verify(reference, frame) for reference, frame in zip(references, frames)
+        ))
+    
+    results = run_with_engine(make_engine(), scenario)
+    
+    assert results[0]["verified"] is True
+    assert results[1]["verified"] is False
+    assert results[1]["error"] == "Invalid image data"
@@ -0,0 +1,123 @@
+"""
+utils.job_catalog on small feeds written to a temporary directory
+"""
+
+import asyncio
+import json
+import os
+import time
+from utils.job_catalog import JobCatalog
+
+
+def job(job_id, required, preferred=()):
+    return {"id": job_id, "requirements": {"required_skills": list(required), "preferred_skills": list(preferred)}}
+
+
+def write_feed(path, jobs, mtime=None):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(jobs, f)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_changed_feed_is_reloaded_in_the_background(tmp_path):
+    path = str(tmp_path / "jobs.json")
+    write_feed(path, [job("A", ["Python"])])
+    catalog = JobCatalog(path, check_interval_seconds=0.01)
+    catalog.load()
+    
+    async def scenario():
+        catalog.start()
+        try:
+            assert [item["id"] for item in catalog.all()] == ["A"]
+            write_feed(path, [job("A", ["Python"]), job("B", ["SQL"])], mtime=time.time() + 10)
+            for _ in range(200):
+                if catalog.get("B") is not None:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await catalog.stop()
+    
+    asyncio.run(scenario())
+    
+    assert catalog.get("B") is not None
+    assert catalog.reloads == 2
+    assert json.loads(catalog.all_body()) == catalog.all()
+
+
+def test_broken_feed_keeps_the_last_good_catalog(tmp_path):
+    path = str(tmp_path / "jobs.json")
+    write_feed(path, [job("A", ["Python"])])
+    catalog = JobCatalog(path)
+    catalog.load()
+    
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[{")
+    catalog.load()
+    
+    assert catalog.get("A") is not None
+    assert catalog.reloads == 1
+
+
+def test_recommend_weights_required_over_preferred(tmp_path):
+    path = str(tmp_path / "jobs.json")
+    write_feed(path, [
+        job("preferred", ["Go"], ["Python"]),
+        job("required", ["Python", "Docker"]),
+        job("both", ["Django/Flask"], ["Python"]),
+        job("none", ["Rust"])
+    ])
+    catalog = JobCatalog(path)
+    
+    recommendations, total = catalog.recommend(["Python", "Flask", "Django"])
+    
+    assert total == 3
+    assert [(item["id"], item["match_score"]) for item in recommendations] == [
+        ("both", 100.0), ("required", 35.0), ("preferred", 30.0)
+    ]
+    assert recommendations[0]["matched_skills"] == ["Django/Flask", "Python"]
+
+
+def test_ranking_matches_a_plain_sort_on_a_tie_heavy_feed(tmp_path):
+    # Few distinct skill lists, so many jobs tie at the cut-off
+    skills = ["Python", "SQL", "Docker", "React", "AWS", "Agile/Scrum", "Java"]
+    jobs = [
+        job(f"J{i}", skills[i % 3:i % 3 + 2 + i % 2], skills[i % 5:i % 5 + 1])
+        for i in range(300)
+    ]
+    path = str(tmp_path / "jobs.json")
+    write_feed(path, jobs)
+    catalog = JobCatalog(path)
+    
+    user_skills = ["Python", "Docker", "Scrum"]
+    recommendations, total = catalog.recommend(user_skills, limit=20)
+    
+    expected = []
+    for position, item in enumerate(jobs):
+        score = 0.0
+        for key, weight in (("required_skills", 70), ("preferred_skills", 30)):
+            names = item["requirements"][key]
+            matched = [name for name in names if name in ("Python", "Docker", "Agile/Scrum")]
+            score += weight * len(matched) / len(names) if names else 0
+        if score:
+            expected.append((-round(score, 2), position))
+    expected.sort()
+    
+    assert total == len(expected)
+    assert [item["id"] for item in recommendations] == [jobs[position]["id"] for _, position in expected[:20]]
+    assert [item["match_score"] for item in recommendations] == [-score for score, _ in expected[:20]]
+
+
+def test_recommendations_are_cached_until_the_feed_changes(tmp_path):
+    path = str(tmp_path / "jobs.json")
+    write_feed(path, [job("A", ["Python"])])
+    catalog = JobCatalog(path)
+    
+    first, _ = catalog.recommend(["Python"])
+    first[0]["match_score"] = 0
+    second, _ = catalog.recommend(["Python"])
+    assert second[0]["match_score"] == 70.0
+    
+    write_feed(path, [job("B", ["Python"])])
+    catalog.load()
+    assert [item["id"] for item in catalog.recommend(["Python"])[0]] == ["B"]
@@ -0,0 +1,130 @@
+"""
+Buffering of utils.proctoring_events against an in-memory database
+
+FakeDatabase answers the two queries the buffer makes: the session row with
+its violation count, and the bulk insert into proctoring_violations.
+"""
+
+import asyncio
+import uuid
+from types import SimpleNamespace
+from utils.proctoring_events import ProctoringEventBuffer
+
+EVENT = {"violation_type": "tab_switch", "severity": "low"}
+
+
+class FakeQuery:
+    def __init__(self, execute):
+        self._execute = execute
+    
+    def eq(self, column, value):
+        return self
+    
+    async def execute(self):
+        return await self._execute()
+
+
+class FakeDatabase:
+    """One in-progress session; inserts can be held open with a gate"""
+    
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.violations = []
+        self.gate = None
+    
+    def table(self, name):
+        return SimpleNamespace(
+            select=lambda columns: FakeQuery(self._session),
+            insert=lambda rows: FakeQuery(lambda: self._insert(rows))
+        )
+    
+    async def _session(self):
+        return SimpleNamespace(data=[{
+            "user_id": self.user_id,
+            "status": "InProgress",
+            "proctoring_violations": [{"count": len(self.violations)}]
+        }])
+    
+    async def _insert(self, rows):
+        # Rows become visible before the caller hears back
+        self.violations.extend(rows)
+        if self.gate is not None:
+            await self.gate.wait()
+        return SimpleNamespace(data=rows)
+
+
+def make_buffer() -> ProctoringEventBuffer:
+    return ProctoringEventBuffer(
+        flush_interval_ms=10,
+        flush_max_events=100,
+        rate_limit_per_second=100,
+        rate_limit_burst=100,
+        session_check_seconds=0
+    )
+
+
+def test_total_is_database_count_plus_buffered_events():
+    async def scenario():
+        db = FakeDatabase(str(uuid.uuid4()))
+        buffer = make_buffer()
+        session_id = str(uuid.uuid4())
+        assert await buffer.check_session(db, session_id, db.user_id) is None
+        buffer.add(session_id, db.user_id, [EVENT] * 3)
+        await buffer.flush(db)
+        buffer.add(session_id, db.user_id, [EVENT] * 2)
+        
+        # An overcount held in memory is replaced, not kept
+        buffer._sessions[session_id].total_violations = 50
+        assert await buffer.check_session(db, session_id, db.user_id) is None
+        assert buffer.total_violations(session_id) == 5
+    
+    asyncio.run(scenario())
+
+
+def test_insert_in_flight_is_not_counted_twice():
+    async def scenario():
+        db = FakeDatabase(str(uuid.uuid4()))
+        buffer = make_buffer()
+        session_id = str(uuid.uuid4())
+        await buffer.check_session(db, session_id, db.user_id)
+        buffer.add(session_id, db.user_id, [EVENT] * 4)
+        
+        db.gate = asyncio.Event()
+        flushing = asyncio.create_task(buffer.flush(db))
+        await asyncio.sleep(0.01)
+        checking = asyncio.create_task(buffer.check_session(db, session_id, db.user_id))
+        await asyncio.sleep(0.01)
+        db.gate.set()
+        await flushing
+        assert await checking is None
+        assert buffer.total_violations(session_id) == 4
+    
+    asyncio.run(scenario())
+
+
+def test_flusher_survives_a_failing_flush():
+    async def scenario():
+        db = FakeDatabase(str(uuid.uuid4()))
+        buffer = make_buffer()
+        session_id = str(uuid.uuid4())
+        await buffer.check_session(db, session_id, db.user_id)
+        buffer.add(session_id, db.user_id, [EVENT])
+        
+        real_flush = buffer.flush
+        calls = 0
+        
+        async def flush(db=None):
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise RuntimeError("unexpected")
+            await real_flush(db)
+        
+        buffer.flush = flush
+        buffer.start(db)
+        await asyncio.sleep(0.1)
+        assert not buffer._task.done()
+        assert len(db.violations) == 1
+        await buffer.stop()
+    
+    asyncio.run(scenario())
@@ -0,0 +1,62 @@
+"""
+Successor derivation of utils.refresh_tokens
+
+rotate_refresh_token itself runs in Postgres; these tests check what the
+store sends to it with a recording stand-in for the RPC call.
+"""
+
+import asyncio
+import pytest
+from utils.refresh_tokens import RefreshTokenError, RefreshTokenStore, hash_refresh_token
+
+
+class RecordingDB:
+    """Answers rpc(...).execute() with a fixed status and records the params"""
+    
+    def __init__(self, status: str):
+        self.status = status
+        self.calls = []
+    
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        return self
+    
+    async def execute(self):
+        class Response:
+            data = [{"status": self.status, "user_id": "u", "email": "e", "user_role": "Student"}]
+        return Response()
+
+
+def test_concurrent_rotations_yield_the_same_successor():
+    store = RefreshTokenStore(ttl_days=14, grace_seconds=30)
+    db = RecordingDB("rotated")
+    
+    first, _ = asyncio.run(store.rotate(db, "old-token"))
+    second, _ = asyncio.run(store.rotate(db, "old-token"))
+    
+    assert first == second
+    assert first != "old-token"
+    assert len(first) == 43
+    params = db.calls[0][1]
+    assert params["p_token_hash"] == hash_refresh_token("old-token")
+    assert params["p_new_token_hash"] == hash_refresh_token(first)
+    assert params["p_grace_seconds"] == 30
+
+
+def test_successors_differ_per_token_and_issued_tokens_are_random():
+    store = RefreshTokenStore(ttl_days=14, grace_seconds=30)
+    db = RecordingDB("rotated")
+    
+    first, _ = asyncio.run(store.rotate(db, "token-a"))
+    second, _ = asyncio.run(store.rotate(db, "token-b"))
+    
+    assert first != second
+    assert store._new_token()[0] != store._new_token()[0]
+
+
+def test_refused_rotation_raises():
+    store = RefreshTokenStore(ttl_days=14, grace_seconds=30)
+    
+    with pytest.raises(RefreshTokenError, match="reused"):
+        asyncio.run(store.rotate(RecordingDB("reused"), "old-token"))
+    assert store.refused == 1
@@ -0,0 +1,67 @@
+"""
+Version-checked reloads of utils.skill_catalog
+
+A small stand-in for the async Supabase client serves skills_master and
+skill_catalog_version from dicts and counts the queries.
+"""
+
+import asyncio
+from utils.skill_catalog import SkillCatalog
+
+
+class FakeDB:
+    def __init__(self):
+        self.skills = [{"skill_id": "1", "skill_name": "Python"}]
+        self.version = 1
+        self.queries = []
+    
+    def table(self, name):
+        self.queries.append(name)
+        self._name = name
+        return self
+    
+    def select(self, *_):
+        return self
+    
+    def order(self, *_):
+        return self
+    
+    async def execute(self):
+        db = self
+        
+        class Response:
+            data = [{"version": db.version}] if db._name == "skill_catalog_version" else list(db.skills)
+        return Response()
+
+
+def test_new_skill_shows_up_after_a_version_bump():
+    db = FakeDB()
+    catalog = SkillCatalog(ttl_seconds=300, check_interval_seconds=0)
+    
+    async def scenario():
+        assert await catalog.get_by_name(db, "python") is not None
+        
+        # Unchanged version: checked, not reloaded
+        await catalog.get_by_name(db, "python")
+        assert catalog.loads == 1
+        
+        db.skills.append({"skill_id": "2", "skill_name": "Rust"})
+        db.version = 2
+        assert (await catalog.get_by_name(db, "rust")).skill_id == "2"
+        assert catalog.loads == 2
+    
+    asyncio.run(scenario())
+
+
+def test_version_is_read_at_most_once_per_check_interval():
+    db = FakeDB()
+    catalog = SkillCatalog(ttl_seconds=300, check_interval_seconds=60)
+    
+    async def scenario():
+        for _ in range(5):
+            await catalog.list_rows(db)
+    
+    asyncio.run(scenario())
+    
+    assert db.queries == ["skill_catalog_version", "skills_master"]
+    assert catalog.hits == 4
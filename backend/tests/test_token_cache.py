@@ -0,0 +1,97 @@
+"""
+Revocations of utils.token_cache shared between API workers
+
+Two VerifiedTokenCache instances stand for two workers. They share one
+backend, which is wrapped so that it counts as a shared (Redis-like) store.
+"""
+
+import asyncio
+import time
+import uuid
+import pytest
+from models.user import TokenData
+from utils.cache_backends import LocalCacheBackend
+from utils.token_cache import TokenRevokedError, VerifiedTokenCache
+
+
+class SharedBackend:
+    """A LocalCacheBackend that is not recognized as a per-worker store"""
+    
+    def __init__(self):
+        self._backend = LocalCacheBackend(max_entries=100)
+        self.round_trips = 0
+    
+    async def get(self, key):
+        return await self._backend.get(key)
+    
+    async def get_many(self, keys):
+        self.round_trips += 1
+        return await self._backend.get_many(keys)
+    
+    async def set(self, key, value, ttl_seconds):
+        await self._backend.set(key, value, ttl_seconds)
+    
+    async def delete(self, key):
+        await self._backend.delete(key)
+
+
+def make_user() -> TokenData:
+    return TokenData(user_id=uuid.uuid4(), email="student@example.com", user_role="Student")
+
+
+def make_workers(shared=True):
+    revocations = SharedBackend() if shared else LocalCacheBackend(max_entries=100)
+    return (
+        VerifiedTokenCache(max_entries=10, revocation_seconds=60, revocations=revocations),
+        VerifiedTokenCache(max_entries=10, revocation_seconds=60, revocations=revocations)
+    )
+
+
+def test_logout_on_one_worker_is_seen_by_another():
+    first, second = make_workers()
+    user = make_user()
+    second.put("token", user, time.time() + 300)
+    
+    async def scenario():
+        await second.check_revoked("token", user)
+        assert second._shared.round_trips == 1
+        await first.revoke_token("token")
+        with pytest.raises(TokenRevokedError):
+            await second.check_revoked("token", user)
+    
+    asyncio.run(scenario())
+    
+    # The second worker now refuses the token without asking the backend
+    with pytest.raises(TokenRevokedError):
+        second.get("token")
+
+
+def test_user_revocation_is_shared_and_lifted():
+    first, second = make_workers()
+    user = make_user()
+    
+    async def scenario():
+        await first.revoke_user(user.user_id)
+        with pytest.raises(TokenRevokedError):
+            await second.check_revoked("other-token", user)
+        
+        await first.reinstate_user(user.user_id)
+        await second.check_revoked("other-token", user)
+    
+    asyncio.run(scenario())
+
+
+def test_local_backend_keeps_revocations_per_worker():
+    first, second = make_workers(shared=False)
+    user = make_user()
+    
+    async def scenario():
+        await first.revoke_token("token")
+        await second.check_revoked("token", user)
+    
+    asyncio.run(scenario())
+    
+    assert first.stats()["shared_revocations"] is False
+    with pytest.raises(TokenRevokedError):
+        first.get("token")
+    assert second.get("token") is None
@@ -3,6 +3,7 @@ from .security import (
     get_password_hash,
     create_access_token,
     decode_access_token,
+    verify_access_token,
     get_current_user,
     get_current_active_user
 )
@@ -12,6 +13,7 @@ __all__ = [
     "get_password_hash",
     "create_access_token",
     "decode_access_token",
+    "verify_access_token",
     "get_current_user",
     "get_current_active_user"
 ]
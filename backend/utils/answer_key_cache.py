@@ -0,0 +1,108 @@
+"""
+Answer Key Cache - per-session MCQ answer keys for in-memory grading
+
+create_test_session already holds every sampled question row, so the
+session's answer key (question type, correct answer, points) is cached under
+its session_id. submit_answer then grades with a dictionary lookup and only
+goes to the database to save the answer.
+
+Storage is pluggable (see cache_backends): a bounded in-process LRU with TTL
+by default, or any Redis-compatible server when REDIS_URL is set, so every
+API worker shares the same keys.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from config import settings
+from utils.cache_backends import create_backend
+
+# question_id -> {"question_type", "correct_answer", "points"}
+AnswerKey = Dict[str, Dict[str, Any]]
+
+KEY_PREFIX = "answer_key:"
+
+
+class AnswerKeyCache:
+    """Answer keys keyed by session_id on top of a cache backend"""
+    
+    def __init__(self, backend, ttl_seconds: int):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+    
+    async def store(self, session_id: str, questions: List[Dict[str, Any]]):
+        """Cache the answer key for a session from its question rows"""
+        answer_key = {
+            str(question["question_id"]): {
+                "question_type": question.get("question_type"),
+                "correct_answer": question.get("correct_answer"),
+                "points": question["points"] if question.get("points") is not None else 1
+            }
+            for question in questions
+        }
+        try:
+            await self.backend.set(KEY_PREFIX + str(session_id), json.dumps(answer_key), self.ttl_seconds)
+        except Exception as e:
+            # Grading falls back to the database when the key is missing
+            print(f"Warning: Failed to cache answer key: {str(e)}")
+    
+    async def get(self, session_id: str) -> Optional[AnswerKey]:
+        """Cached answer key for a session, or None"""
+        try:
+            value = await self.backend.get(KEY_PREFIX + str(session_id))
+        except Exception as e:
+            print(f"Warning: Failed to read answer key cache: {str(e)}")
+            value = None
+        
+        if value is None:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        return json.loads(value)
+    
+    async def invalidate(self, session_id: str):
+        """Drop a session's answer key once the test is over"""
+        try:
+            await self.backend.delete(KEY_PREFIX + str(session_id))
+        except Exception as e:
+            print(f"Warning: Failed to invalidate answer key: {str(e)}")
+    
+    @staticmethod
+    def grade(answer_key: AnswerKey, question_id: str, answer: str) -> Optional[Tuple[Optional[bool], int]]:
+        """
+        Grade an answer against the key
+        Returns: (is_correct, points_earned), or None if the question is not in the key.
+        is_correct is None for question types that need manual grading.
+        """
+        question = answer_key.get(str(question_id))
+        if question is None:
+            return None
+        
+        if question["question_type"] != "MCQ":
+            return None, 0
+        
+        correct_answer = question["correct_answer"]
+        is_correct = correct_answer is not None and answer.strip() == correct_answer.strip()
+        return is_correct, question["points"] if is_correct else 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+
+# Singleton instance
+answer_key_cache = AnswerKeyCache(create_backend(settings.answer_key_cache_max_sessions), ttl_seconds=settings.answer_key_cache_ttl_seconds)
+
+
+def get_answer_key_cache() -> AnswerKeyCache:
+    """Dependency to get the shared answer key cache"""
+    return answer_key_cache
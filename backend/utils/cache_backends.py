@@ -0,0 +1,80 @@
+"""
+Cache Backends - pluggable string key/value stores with TTL
+
+Session-scoped caches (answer keys, question manifests) store serialized
+values through this small async interface. LocalCacheBackend is a bounded
+in-process LRU and the default; RedisCacheBackend talks to any
+Redis-compatible server so all API workers share entries.
+"""
+
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from config import settings
+
+
+class LocalCacheBackend:
+    """In-process LRU with per-entry TTL; also the stand-in for Redis in tests"""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+    
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    async def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        return [await self.get(key) for key in keys]
+    
+    async def set(self, key: str, value: str, ttl_seconds: int):
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """Redis-compatible backend (Redis, Valkey, KeyDB, ...) via redis.asyncio"""
+    
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+        self._client = redis.from_url(url, decode_responses=True)
+    
+    async def get(self, key: str) -> Optional[str]:
+        return await self._client.get(key)
+    
+    async def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        """Values of several keys in one round trip (MGET)"""
+        return await self._client.mget(keys)
+    
+    async def set(self, key: str, value: str, ttl_seconds: int):
+        await self._client.set(key, value, ex=ttl_seconds)
+    
+    async def delete(self, key: str):
+        await self._client.delete(key)
+
+
+def create_backend(max_entries: int):
+    """Redis backend when REDIS_URL is configured, otherwise the local LRU"""
+    if settings.redis_url:
+        try:
+            return RedisCacheBackend(settings.redis_url)
+        except ImportError:
+            print("Warning: REDIS_URL is set but the redis package is not installed; using the in-process cache")
+    return LocalCacheBackend(max_entries=max_entries)
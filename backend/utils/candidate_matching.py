@@ -0,0 +1,293 @@
+"""
+Candidate Matching - batch ranking of students against job postings
+
+The recruiter-side counterpart of /jobs/recommended. Job postings and students
+are encoded as sparse skill-incidence matrices over skills_master ids, and a
+single sparse product scores every (student, job) pair with the same 70/30
+required/preferred rule. The top K students per posting are persisted to
+recommended_candidates.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from supabase import AsyncClient
+
+from utils.job_catalog import REQUIRED_SKILLS_WEIGHT, PREFERRED_SKILLS_WEIGHT
+
+# Optional per-skill multipliers for a student's claimed skills
+PROFICIENCY_WEIGHTS = {
+    "Beginner": 0.25,
+    "Intermediate": 0.5,
+    "Advanced": 0.75,
+    "Expert": 1.0,
+}
+VERIFICATION_WEIGHTS = {
+    "Verified": 1.0,
+    "Unverified": 0.5,
+    "Failed": 0.0,
+}
+
+# PostgREST returns at most 1000 rows per request by default
+PAGE_SIZE = 1000
+UPSERT_BATCH_SIZE = 500
+
+
+class JobSkills:
+    """Skill requirements of one job posting"""
+    
+    def __init__(self, job_id: str, required: List[str], preferred: Optional[List[str]] = None):
+        self.job_id = job_id
+        self.required = required
+        self.preferred = preferred or []
+
+
+def build_skill_columns(jobs: List[JobSkills]) -> Dict[str, int]:
+    """Column index for every skill that appears in at least one job"""
+    columns: Dict[str, int] = {}
+    for job in jobs:
+        for skill_id in job.required + job.preferred:
+            columns.setdefault(skill_id, len(columns))
+    return columns
+
+
+def build_job_matrix(jobs: List[JobSkills], columns: Dict[str, int]) -> sparse.csr_matrix:
+    """
+    jobs x skills matrix; each cell is the skill's share of the match score
+    (70 / required count or 30 / preferred count)
+    """
+    rows, cols, values = [], [], []
+    for job_pos, job in enumerate(jobs):
+        for skills, weight in ((job.required, REQUIRED_SKILLS_WEIGHT), (job.preferred, PREFERRED_SKILLS_WEIGHT)):
+            unique_skills = list(dict.fromkeys(skills))
+            for skill_id in unique_skills:
+                rows.append(job_pos)
+                cols.append(columns[skill_id])
+                values.append(weight / len(unique_skills))
+    
+    # Duplicate (job, skill) cells, e.g. a skill both required and preferred, are summed
+    return sparse.csr_matrix(
+        (np.array(values, dtype=np.float64), (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64))),
+        shape=(len(jobs), len(columns))
+    )
+
+
+def build_student_matrix(
+    user_skills: List[Dict[str, Any]],
+    columns: Dict[str, int],
+    weight_by_proficiency: bool = False,
+    weight_by_verification: bool = False
+) -> Tuple[sparse.csr_matrix, List[str]]:
+    """
+    students x skills matrix from user_skills rows
+    Returns: (matrix, student id per row)
+    
+    A cell is 1 for a claimed skill, or its proficiency/verification
+    multiplier when weighting is enabled. Skills no job asks for are dropped.
+    """
+    student_rows: Dict[str, int] = {}
+    rows, cols, values = [], [], []
+    for skill in user_skills:
+        column = columns.get(str(skill["skill_id"]))
+        if column is None:
+            continue
+        
+        value = 1.0
+        if weight_by_proficiency:
+            value *= PROFICIENCY_WEIGHTS.get(skill.get("proficiency_level"), 0.0)
+        if weight_by_verification:
+            value *= VERIFICATION_WEIGHTS.get(skill.get("verification_status") or "Unverified", 0.0)
+        if value <= 0:
+            continue
+        
+        row = student_rows.setdefault(str(skill["user_id"]), len(student_rows))
+        rows.append(row)
+        cols.append(column)
+        values.append(value)
+    
+    matrix = sparse.csr_matrix(
+        (np.array(values, dtype=np.float64), (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64))),
+        shape=(len(student_rows), len(columns))
+    )
+    # user_skills is unique per (user, skill), but keep a cell at most 1.0 regardless
+    matrix.data = np.minimum(matrix.data, 1.0)
+    return matrix, list(student_rows)
+
+
+def rank_candidates(
+    jobs: List[JobSkills],
+    user_skills: List[Dict[str, Any]],
+    top_k: int,
+    weight_by_proficiency: bool = False,
+    weight_by_verification: bool = False
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Top K students for every job
+    Returns: job_id -> [{student_id, match_score, matched_skills}] best first
+    """
+    columns = build_skill_columns(jobs)
+    job_matrix = build_job_matrix(jobs, columns)
+    student_matrix, student_ids = build_student_matrix(
+        user_skills, columns, weight_by_proficiency, weight_by_verification
+    )
+    
+    # One sparse product scores every (student, job) pair; column j holds job j's scores
+    scores = (student_matrix @ job_matrix.T).tocsc()
+    scores.eliminate_zeros()
+    
+    skill_ids = list(columns)
+    rankings: Dict[str, List[Dict[str, Any]]] = {}
+    for job_pos, job in enumerate(jobs):
+        start, end = scores.indptr[job_pos], scores.indptr[job_pos + 1]
+        students = scores.indices[start:end]
+        values = scores.data[start:end]
+        
+        if len(values) > top_k:
+            keep = np.argpartition(-values, top_k - 1)[:top_k]
+            students, values = students[keep], values[keep]
+        
+        # Highest score first, then student order for stable results
+        order = np.lexsort((students, -values))
+        
+        job_columns = job_matrix.indices[job_matrix.indptr[job_pos]:job_matrix.indptr[job_pos + 1]]
+        candidates = []
+        for index in order:
+            student = students[index]
+            student_columns = student_matrix.indices[student_matrix.indptr[student]:student_matrix.indptr[student + 1]]
+            matched = np.intersect1d(job_columns, student_columns, assume_unique=True)
+            candidates.append({
+                "student_id": student_ids[student],
+                "match_score": round(min(float(values[index]), 100.0), 2),
+                "matched_skills": [skill_ids[column] for column in matched]
+            })
+        rankings[job.job_id] = candidates
+    
+    return rankings
+
+
+async def _fetch_all(query_factory: Callable[[], Any]) -> List[Dict[str, Any]]:
+    """Read every row of a query, one PostgREST page at a time"""
+    rows = []
+    start = 0
+    while True:
+        response = await query_factory().range(start, start + PAGE_SIZE - 1).execute()
+        page = response.data or []
+        rows.extend(page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        start += PAGE_SIZE
+
+
+async def fetch_open_jobs(
+    db: AsyncClient,
+    job_ids: Optional[List[str]] = None,
+    company_id: Optional[str] = None
+) -> List[JobSkills]:
+    """
+    Open job postings with their skill requirements
+    job_postings only stores required skill ids, so preferred skills are empty
+    """
+    def query():
+        q = db.table("job_postings").select("job_id, required_skills").eq("job_status", "Open")
+        if job_ids:
+            q = q.in_("job_id", job_ids)
+        if company_id:
+            q = q.eq("company_id", company_id)
+        return q.order("job_id")
+    
+    rows = await _fetch_all(query)
+    return [
+        JobSkills(row["job_id"], [str(skill_id) for skill_id in row.get("required_skills") or []])
+        for row in rows
+    ]
+
+
+async def fetch_student_skills(db: AsyncClient, verified_only: bool = True) -> List[Dict[str, Any]]:
+    """Skills claimed by student accounts, optionally only verified ones"""
+    def query():
+        q = db.table("user_skills").select(
+            "user_id, skill_id, proficiency_level, verification_status, users!inner(user_role)"
+        ).eq("users.user_role", "Student")
+        if verified_only:
+            q = q.eq("verification_status", "Verified")
+        return q.order("user_skill_id")
+    
+    return await _fetch_all(query)
+
+
+async def save_recommendations(db: AsyncClient, rankings: Dict[str, List[Dict[str, Any]]]) -> int:
+    """
+    Upsert the rankings into recommended_candidates and remove older
+    recommendations for the same jobs that fell out of the top K
+    Returns: number of rows written
+    """
+    generated_at = datetime.now(timezone.utc).isoformat()
+    rows = [
+        {
+            "job_id": job_id,
+            "student_id": candidate["student_id"],
+            "match_score": candidate["match_score"],
+            "matched_skills": candidate["matched_skills"],
+            "generated_at": generated_at
+        }
+        for job_id, candidates in rankings.items()
+        for candidate in candidates
+    ]
+    
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        await db.table("recommended_candidates").upsert(
+            rows[start:start + UPSERT_BATCH_SIZE],
+            on_conflict="job_id,student_id"
+        ).execute()
+    
+    job_ids = list(rankings)
+    for start in range(0, len(job_ids), UPSERT_BATCH_SIZE):
+        await db.table("recommended_candidates").delete().in_(
+            "job_id", job_ids[start:start + UPSERT_BATCH_SIZE]
+        ).lt("generated_at", generated_at).execute()
+    
+    return len(rows)
+
+
+async def run_candidate_matching(
+    db: AsyncClient,
+    job_ids: Optional[List[str]] = None,
+    company_id: Optional[str] = None,
+    top_k: int = 50,
+    verified_only: bool = True,
+    weight_by_proficiency: bool = False,
+    weight_by_verification: bool = False,
+    save: bool = True
+) -> Dict[str, Any]:
+    """Load jobs and student skills, rank candidates and optionally persist them"""
+    started = time.perf_counter()
+    jobs = await fetch_open_jobs(db, job_ids=job_ids, company_id=company_id)
+    if not jobs:
+        return {
+            "jobs_matched": 0,
+            "students_considered": 0,
+            "recommendations_saved": 0,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "rankings": {}
+        }
+    
+    user_skills = await fetch_student_skills(db, verified_only=verified_only)
+    
+    # Matrix work is CPU-bound; keep it off the event loop
+    rankings = await asyncio.to_thread(
+        rank_candidates, jobs, user_skills, top_k, weight_by_proficiency, weight_by_verification
+    )
+    
+    saved = await save_recommendations(db, rankings) if save else 0
+    
+    return {
+        "jobs_matched": len(jobs),
+        "students_considered": len({str(skill["user_id"]) for skill in user_skills}),
+        "recommendations_saved": saved,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "rankings": rankings
+    }
@@ -0,0 +1,205 @@
+"""
+Deadline Scheduler - server-side enforcement of the test time limit
+
+A started session has a fixed deadline (started_at + test duration). Deadlines
+are kept in a min-heap, so one background task sleeps until the earliest one
+instead of polling. When deadlines pass, the due sessions are expired together
+through the expire_test_sessions RPC: sessions with answers are scored exactly
+like submit_test, sessions without answers are marked Abandoned. A cohort
+whose tests end at the same minute costs one round-trip per batch.
+
+Sessions submitted by the student are cancelled lazily: their heap entry is
+skipped when it comes up. InProgress sessions are re-loaded from the database
+at startup and on every sweep, which covers restarts and sessions started on
+other workers. Expiring a session twice is harmless; the RPC skips sessions
+that are no longer InProgress.
+"""
+
+import asyncio
+import heapq
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from supabase import AsyncClient
+from config import settings
+from models.test import TestStatus
+from utils.answer_key_cache import answer_key_cache
+from utils.face_check_policy import face_checks
+from utils.proctoring_events import proctoring_events
+
+# PostgREST returns at most 1000 rows per request by default
+PAGE_SIZE = 1000
+
+# Delay before retrying a batch the database failed to expire
+RETRY_DELAY_SECONDS = 30
+
+
+class DeadlineScheduler:
+    """Min-heap of session deadlines drained by one background task"""
+    
+    def __init__(self, grace_seconds: float, batch_size: int, sweep_interval_seconds: float):
+        self.grace_seconds = grace_seconds
+        self.batch_size = batch_size
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self.duration = timedelta(0)
+        self.passing_percentage = 70
+        self.max_violations = 5
+        self._heap: List[Tuple[float, str]] = []
+        self._deadlines: Dict[str, float] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.expired = {TestStatus.COMPLETED.value: 0, TestStatus.ABANDONED.value: 0}
+        self.batches = 0
+        self.failures = 0
+    
+    def schedule(self, session_id: Any, started_at: datetime):
+        """Expire the session once its time limit (plus grace) has passed"""
+        session_id = str(session_id)
+        deadline = (started_at + self.duration).timestamp() + self.grace_seconds
+        if self._deadlines.get(session_id) == deadline:
+            return
+        
+        self._deadlines[session_id] = deadline
+        heapq.heappush(self._heap, (deadline, session_id))
+        # Wake the loop if this is now the earliest deadline
+        if self._wakeup is not None and self._heap[0][1] == session_id:
+            self._wakeup.set()
+    
+    def cancel(self, session_id: Any):
+        """Forget a session that was submitted; its heap entry is skipped later"""
+        self._deadlines.pop(str(session_id), None)
+    
+    def _pop_due(self, now: float) -> List[str]:
+        """Up to batch_size sessions whose deadline has passed"""
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+            deadline, session_id = heapq.heappop(self._heap)
+            # Skip cancelled sessions and entries superseded by a later schedule()
+            if self._deadlines.get(session_id) != deadline:
+                continue
+            del self._deadlines[session_id]
+            due.append(session_id)
+        return due
+    
+    async def _sweep(self, db: AsyncClient):
+        """Schedule every InProgress session in the database"""
+        start = 0
+        while True:
+            response = await db.table("test_sessions").select("session_id, started_at").eq(
+                "status", TestStatus.IN_PROGRESS.value
+            ).order("session_id").range(start, start + PAGE_SIZE - 1).execute()
+            page = response.data or []
+            for session in page:
+                if session.get("started_at"):
+                    self.schedule(session["session_id"], datetime.fromisoformat(session["started_at"]))
+            if len(page) < PAGE_SIZE:
+                break
+            start += PAGE_SIZE
+    
+    async def _expire(self, db: AsyncClient, session_ids: List[str]):
+        """Close one batch of sessions in a single RPC"""
+        try:
+            # Buffered violations count towards the score
+            await proctoring_events.flush(db)
+            response = await db.rpc("expire_test_sessions", {
+                "p_session_ids": session_ids,
+                "p_passing_percentage": self.passing_percentage,
+                "p_max_violations": self.max_violations
+            }).execute()
+        except Exception as e:
+            print(f"Warning: Failed to expire test sessions: {str(e)}")
+            self.failures += 1
+            retry_at = time.time() + RETRY_DELAY_SECONDS
+            for session_id in session_ids:
+                if session_id not in self._deadlines:
+                    self._deadlines[session_id] = retry_at
+                    heapq.heappush(self._heap, (retry_at, session_id))
+            return
+        
+        self.batches += 1
+        for row in response.data or []:
+            self.expired[row["status"]] = self.expired.get(row["status"], 0) + 1
+            try:
+                # No more answers can be graded or faces checked for this session
+                await answer_key_cache.invalidate(str(row["session_id"]))
+                proctoring_events.forget(row["session_id"])
+                face_checks.forget(row["session_id"])
+            except Exception as e:
+                # The session is already closed; a failed cleanup must not stop the scheduler
+                print(f"Warning: Failed to clean up expired test session: {str(e)}")
+    
+    async def _run(self, db: AsyncClient):
+        next_sweep = 0.0
+        while True:
+            now = time.time()
+            if now >= next_sweep:
+                try:
+                    await self._sweep(db)
+                except Exception as e:
+                    print(f"Warning: Failed to load in-progress test sessions: {str(e)}")
+                next_sweep = now + self.sweep_interval_seconds
+            
+            due = self._pop_due(now)
+            if due:
+                await self._expire(db, due)
+                continue
+            
+            timeout = next_sweep - now
+            if self._heap:
+                timeout = min(timeout, self._heap[0][0] - now)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(timeout, 0))
+            except asyncio.TimeoutError:
+                pass
+    
+    def start(
+        self,
+        db: AsyncClient,
+        duration_minutes: int,
+        passing_percentage: float,
+        max_violations: int
+    ):
+        """Start the background task (called from the app lifespan)"""
+        self.duration = timedelta(minutes=duration_minutes)
+        self.passing_percentage = passing_percentage
+        self.max_violations = max_violations
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(db))
+    
+    async def stop(self):
+        """Cancel the background task; pending deadlines are re-loaded on next start"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue size and expiry counters for monitoring"""
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "scheduled_sessions": len(self._deadlines),
+            "next_deadline": min(self._deadlines.values()) if self._deadlines else None,
+            "expired": dict(self.expired),
+            "batches": self.batches,
+            "failures": self.failures,
+            "grace_seconds": self.grace_seconds,
+            "batch_size": self.batch_size
+        }
+
+
+# Singleton instance
+deadline_scheduler = DeadlineScheduler(
+    grace_seconds=settings.test_deadline_grace_seconds,
+    batch_size=settings.test_deadline_batch_size,
+    sweep_interval_seconds=settings.test_deadline_sweep_interval_seconds
+)
+
+
+def get_deadline_scheduler() -> DeadlineScheduler:
+    """Dependency to get the shared deadline scheduler"""
+    return deadline_scheduler
@@ -0,0 +1,195 @@
+"""
+Face Backends - face embedding models that run inside engine worker processes
+
+Each worker process of the face verification engine loads one backend once
+(init_worker) and then serves whole batches of frames (verify_batch): every
+frame in the batch is embedded in one backend call and compared with its
+reference embedding in one vectorized step.
+
+Backends:
+- reference: deterministic CPU-only embedding of the raw image bytes
+  (centered block means). It needs only numpy, so the engine can be
+  exercised and benchmarked without a GPU or face model. Identical or nearly
+  identical images match; it is not a face recognizer.
+- deepface: the DeepFace model listed (commented out) in
+  requirements-windows.txt, with OpenCV for decoding.
+
+This module is imported by worker processes and must stay free of app
+imports (config, database, routes).
+"""
+
+import base64
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+
+def decode_image(image_base64: str) -> bytes:
+    """Image bytes from base64, with or without a data URL prefix"""
+    if image_base64.startswith("data:") and "," in image_base64:
+        image_base64 = image_base64.split(",", 1)[1]
+    return base64.b64decode(image_base64)
+
+
+class FaceBackend(ABC):
+    """Interface of an embedding backend"""
+    
+    name = ""
+    
+    def load(self):
+        """Load models; called once per worker process"""
+    
+    @abstractmethod
+    def embed(self, images: List[bytes]) -> List[Optional[np.ndarray]]:
+        """L2-normalized embedding per image, or None when no face was found"""
+
+
+class ReferenceBackend(FaceBackend):
+    """Deterministic numpy embedding of raw image bytes"""
+    
+    name = "reference"
+    DIMENSIONS = 512
+    
+    def embed(self, images: List[bytes]) -> List[Optional[np.ndarray]]:
+        embeddings: List[Optional[np.ndarray]] = []
+        for image in images:
+            data = np.frombuffer(image, dtype=np.uint8).astype(np.float64)
+            if data.size < self.DIMENSIONS:
+                embeddings.append(None)
+                continue
+            
+            # Mean intensity of equal blocks, centered: unrelated images are near-orthogonal
+            usable = data.size - data.size % self.DIMENSIONS
+            vector = data[:usable].reshape(self.DIMENSIONS, -1).mean(axis=1)
+            vector -= vector.mean()
+            norm = np.linalg.norm(vector)
+            embeddings.append(vector / norm if norm > 0 else None)
+        return embeddings
+
+
+class DeepFaceBackend(FaceBackend):
+    """DeepFace embeddings (optional dependency: deepface, opencv-python)"""
+    
+    name = "deepface"
+    MODEL_NAME = "Facenet"
+    
+    def load(self):
+        import cv2
+        from deepface import DeepFace
+        self._cv2 = cv2
+        self._deepface = DeepFace
+        # Build once so the first batch does not pay for loading the weights
+        DeepFace.build_model(self.MODEL_NAME)
+    
+    def embed(self, images: List[bytes]) -> List[Optional[np.ndarray]]:
+        embeddings: List[Optional[np.ndarray]] = []
+        for image in images:
+            pixels = self._cv2.imdecode(np.frombuffer(image, dtype=np.uint8), self._cv2.IMREAD_COLOR)
+            if pixels is None:
+                embeddings.append(None)
+                continue
+            try:
+                faces = self._deepface.represent(
+                    img_path=pixels,
+                    model_name=self.MODEL_NAME,
+                    enforce_detection=True
+                )
+            except ValueError:
+                # Raised when no face is detected
+                embeddings.append(None)
+                continue
+            vector = np.asarray(faces[0]["embedding"], dtype=np.float64)
+            embeddings.append(vector / np.linalg.norm(vector))
+        return embeddings
+
+
+BACKENDS = {
+    ReferenceBackend.name: ReferenceBackend,
+    DeepFaceBackend.name: DeepFaceBackend
+}
+
+# Per-process state set by init_worker
+_backend: Optional[FaceBackend] = None
+_threshold = 0.4
+
+
+def init_worker(backend_name: str, threshold: float):
+    """ProcessPoolExecutor initializer: load the backend once per worker"""
+    global _backend, _threshold
+    _backend = BACKENDS[backend_name]()
+    _backend.load()
+    _threshold = threshold
+
+
+def _result(verified: bool, confidence: float, error: Optional[str], message: str, distance: Optional[float] = None) -> Dict[str, Any]:
+    return {
+        "verified": verified,
+        "confidence": confidence,
+        "error": error,
+        "details": {
+            "message": message,
+            "distance": distance,
+            "threshold": round(_threshold * 100, 2)
+        }
+    }
+
+
+def verify_batch(
+    references: Dict[str, Tuple[str, Any]],
+    frames: List[Tuple[str, str]]
+) -> Tuple[List[Dict[str, Any]], Dict[str, Optional[np.ndarray]]]:
+    """
+    Verify a batch of frames against their reference faces
+    references: content hash -> ("embedding", vector) or ("image", bytes)
+    frames: (reference content hash, base64 frame) per frame
+    Returns: (result per frame, embeddings computed for references sent as images)
+    """
+    # Embed references that arrived as images, in the same call as the frames
+    new_references = [key for key, (kind, _) in references.items() if kind == "image"]
+    images = [references[key][1] for key in new_references]
+    
+    results: List[Optional[Dict[str, Any]]] = [None] * len(frames)
+    frame_positions = []
+    for position, (_, image_base64) in enumerate(frames):
+        try:
+            images.append(decode_image(image_base64))
+            frame_positions.append(position)
+        except (ValueError, TypeError):
+            results[position] = _result(False, 0.0, "Invalid image data", "Could not decode the captured frame")
+    
+    embeddings = _backend.embed(images) if images else []
+    computed = dict(zip(new_references, embeddings[:len(new_references)]))
+    frame_embeddings = embeddings[len(new_references):]
+    
+    reference_vectors = {
+        key: computed[key] if kind == "image" else payload
+        for key, (kind, payload) in references.items()
+    }
+    
+    # Compare every frame that has both embeddings in one vectorized step
+    pairs = []
+    for position, embedding in zip(frame_positions, frame_embeddings):
+        reference = reference_vectors.get(frames[position][0])
+        if reference is None:
+            results[position] = _result(False, 0.0, "No face detected in profile picture", "Reference face unavailable")
+        elif embedding is None:
+            results[position] = _result(False, 0.0, "No face detected", "No face found in the captured frame")
+        else:
+            pairs.append((position, embedding, reference))
+    
+    if pairs:
+        frame_matrix = np.stack([embedding for _, embedding, _ in pairs])
+        reference_matrix = np.stack([reference for _, _, reference in pairs])
+        distances = 1.0 - np.einsum("ij,ij->i", frame_matrix, reference_matrix)
+        for (position, _, _), distance in zip(pairs, distances):
+            distance = float(max(distance, 0.0))
+            verified = distance <= _threshold
+            results[position] = _result(
+                verified,
+                round(max(0.0, 1.0 - distance) * 100, 2),
+                None,
+                "Face matched" if verified else "Face did not match profile picture",
+                round(distance, 4)
+            )
+    
+    return results, computed
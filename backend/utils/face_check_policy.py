@@ -0,0 +1,207 @@
+"""
+Face Check Policy - server-recommended interval until the next face check
+
+Clients used to verify the student's face on a fixed 30 second timer. Each
+verification response now carries next_check_seconds, computed by a
+pluggable policy from the session's recent face_verification_logs
+confidences and its proctoring violations:
+
+- fixed: always base_seconds (the old client behaviour)
+- adaptive: a clean session's interval doubles after every confident match
+  up to max_seconds, which cuts checks per 45 minute test by about ten times.
+  A failed check snaps it to min_seconds, new violations shrink it, and each
+  violation in the session lowers the ceiling it can grow back to. Jitter
+  keeps the schedule from being predictable.
+
+Policies are pure functions of a CheckSignals value (plus an injectable
+random source), so they can be unit-tested without the app. FaceCheckTracker
+keeps the per-session signals in memory, loading a session's recent logs
+once when it first sees it.
+"""
+
+import random
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from supabase import AsyncClient
+from config import settings
+
+# Recent checks a policy sees per session
+HISTORY_SIZE = 5
+
+# Sessions tracked per worker before the least recently checked are dropped
+MAX_TRACKED_SESSIONS = 10000
+
+
+class CheckSignals:
+    """What a policy knows about a session when recommending the next check"""
+    
+    def __init__(
+        self,
+        checks: List[Tuple[bool, float]],
+        total_violations: int,
+        new_violations: int,
+        previous_interval: Optional[float]
+    ):
+        self.checks = checks  # (verified, confidence), oldest first
+        self.total_violations = total_violations
+        self.new_violations = new_violations  # since the previous check
+        self.previous_interval = previous_interval
+
+
+class CheckIntervalPolicy(ABC):
+    """Interface of a next-check policy"""
+    
+    name = ""
+    
+    @abstractmethod
+    def next_interval(self, signals: CheckSignals) -> float:
+        """Seconds until the client should check the face again"""
+
+
+class FixedIntervalPolicy(CheckIntervalPolicy):
+    """The same interval for every session"""
+    
+    name = "fixed"
+    
+    def __init__(self, base_seconds: float, **_):
+        self.base_seconds = base_seconds
+    
+    def next_interval(self, signals: CheckSignals) -> float:
+        return self.base_seconds
+
+
+class AdaptiveIntervalPolicy(CheckIntervalPolicy):
+    """Back off on clean sessions, tighten on failed checks and violations"""
+    
+    name = "adaptive"
+    
+    def __init__(
+        self,
+        base_seconds: float,
+        min_seconds: float,
+        max_seconds: float,
+        growth: float = 2.0,
+        confidence_floor: float = 80.0,
+        jitter: float = 0.2,
+        rng: Optional[random.Random] = None
+    ):
+        self.base_seconds = base_seconds
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.growth = growth
+        self.confidence_floor = confidence_floor
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+    
+    def next_interval(self, signals: CheckSignals) -> float:
+        previous = signals.previous_interval or self.base_seconds
+        
+        if signals.checks and not signals.checks[-1][0]:
+            interval = self.min_seconds
+        elif signals.new_violations:
+            interval = min(previous, self.base_seconds) / (self.growth * signals.new_violations)
+        elif any(confidence < self.confidence_floor for _, confidence in signals.checks):
+            interval = self.base_seconds
+        else:
+            # Every violation so far halves how far a clean streak can back off
+            ceiling = max(self.base_seconds, self.max_seconds / (2 ** signals.total_violations))
+            interval = min(previous * self.growth, ceiling)
+        
+        interval = max(self.min_seconds, min(interval, self.max_seconds))
+        if self.jitter:
+            interval *= 1 - self.rng.uniform(0, self.jitter)
+        return round(max(self.min_seconds, interval), 1)
+
+
+POLICIES = {
+    FixedIntervalPolicy.name: FixedIntervalPolicy,
+    AdaptiveIntervalPolicy.name: AdaptiveIntervalPolicy
+}
+
+
+def create_policy(name: str) -> CheckIntervalPolicy:
+    """The configured policy"""
+    if name not in POLICIES:
+        raise ValueError(f"Unknown face check policy: {name}")
+    return POLICIES[name](
+        base_seconds=settings.face_check_base_seconds,
+        min_seconds=settings.face_check_min_seconds,
+        max_seconds=settings.face_check_max_seconds
+    )
+
+
+class SessionChecks:
+    """Recent checks and the last recommendation of one session"""
+    
+    def __init__(self, checks: List[Tuple[bool, float]], total_violations: int):
+        self.checks: Deque[Tuple[bool, float]] = deque(checks, maxlen=HISTORY_SIZE)
+        self.total_violations = total_violations
+        self.interval: Optional[float] = None
+
+
+class FaceCheckTracker:
+    """Per-session check history feeding a CheckIntervalPolicy"""
+    
+    def __init__(self, policy: CheckIntervalPolicy):
+        self.policy = policy
+        self._sessions: "OrderedDict[str, SessionChecks]" = OrderedDict()
+    
+    async def _load(self, db: AsyncClient, session_id: str, total_violations: int) -> SessionChecks:
+        response = await db.table("face_verification_logs").select("verified, confidence").eq(
+            "session_id", session_id
+        ).order("captured_at", desc=True).limit(HISTORY_SIZE).execute()
+        checks = [
+            (bool(log["verified"]), float(log.get("confidence") or 0))
+            for log in reversed(response.data or [])
+        ]
+        return SessionChecks(checks, total_violations)
+    
+    async def record(
+        self,
+        db: AsyncClient,
+        session_id: Any,
+        verified: bool,
+        confidence: float,
+        total_violations: int
+    ) -> float:
+        """
+        Record a face check (already written to face_verification_logs)
+        Returns: seconds until the next recommended check
+        """
+        session_id = str(session_id)
+        session = self._sessions.get(session_id)
+        if session is None:
+            try:
+                # Includes the check being recorded
+                session = await self._load(db, session_id, total_violations)
+            except Exception as e:
+                print(f"Warning: Failed to load face check history: {str(e)}")
+                session = SessionChecks([(verified, confidence)], total_violations)
+            self._sessions[session_id] = session
+            while len(self._sessions) > MAX_TRACKED_SESSIONS:
+                self._sessions.popitem(last=False)
+            new_violations = 0
+        else:
+            session.checks.append((verified, confidence))
+            new_violations = max(0, total_violations - session.total_violations)
+            self._sessions.move_to_end(session_id)
+        
+        session.interval = self.policy.next_interval(CheckSignals(
+            list(session.checks), total_violations, new_violations, session.interval
+        ))
+        session.total_violations = total_violations
+        return session.interval
+    
+    def forget(self, session_id: Any):
+        """Drop a session's history once it is submitted or expired"""
+        self._sessions.pop(str(session_id), None)
+
+
+# Singleton instance
+face_checks = FaceCheckTracker(create_policy(settings.face_check_policy))
+
+
+def get_face_checks() -> FaceCheckTracker:
+    """Dependency to get the shared face check tracker"""
+    return face_checks
@@ -0,0 +1,214 @@
+"""
+Face Engine - process-pool face verification with micro-batching
+
+A face model pins a CPU core for hundreds of milliseconds per frame, which
+would stall the event loop if run in the request handler. The engine runs a
+backend (see face_backends) in a ProcessPoolExecutor whose workers load the
+model once. Frames arriving from many sessions at about the same time are
+queued and dispatched together: each batch is one inter-process call and one
+backend call. At most one batch per worker is in flight, so under load the
+queue grows and batches get larger instead of piling up in the pool.
+
+Reference faces are sent as images the first time; the embedding a worker
+computes is kept on the ReferenceFace and sent instead afterwards.
+
+The engine reports queue depth, batch sizes and per-frame latency. With
+FACE_VERIFICATION_BACKEND=disabled (the default) no pool is started and the
+FaceVerification stub answers every frame.
+"""
+
+import asyncio
+import statistics
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from config import settings
+from utils.face_backends import BACKENDS, init_worker, verify_batch
+from utils.face_verification import FaceVerification
+from utils.reference_faces import ReferenceFace
+
+# Per-frame latencies kept for the stats percentiles
+LATENCY_WINDOW = 1000
+
+
+class FaceEngineBusy(Exception):
+    """The verification queue is full; the frame was not accepted"""
+
+
+class FaceVerificationEngine:
+    """Micro-batching front end of a face verification process pool"""
+    
+    def __init__(
+        self,
+        backend: str,
+        workers: int,
+        max_batch_size: int,
+        batch_window_ms: float,
+        max_queue: int,
+        threshold: float
+    ):
+        if backend != "disabled" and backend not in BACKENDS:
+            raise ValueError(f"Unknown face verification backend: {backend}")
+        self.backend = backend
+        self.workers = workers
+        self.max_batch_size = max_batch_size
+        self.batch_window_ms = batch_window_ms
+        self.max_queue = max_queue
+        self.threshold = threshold
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._queue: List[Tuple[ReferenceFace, str, asyncio.Future, float]] = []
+        self._ready: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._task: Optional[asyncio.Task] = None
+        self._in_flight = 0
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._batch_sizes: Deque[int] = deque(maxlen=LATENCY_WINDOW)
+        self.frames = 0
+        self.rejected = 0
+        self.failed_batches = 0
+    
+    def start(self):
+        """Start the worker pool and the dispatcher (called from the app lifespan)"""
+        if self.backend == "disabled":
+            return
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=init_worker,
+            initargs=(self.backend, self.threshold)
+        )
+        self._ready = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.workers)
+        self._task = asyncio.create_task(self._dispatch())
+    
+    async def stop(self):
+        """Stop dispatching and shut the worker pool down"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for _, _, future, _ in self._queue:
+            if not future.done():
+                future.set_exception(FaceEngineBusy("Face verification engine stopped"))
+        self._queue = []
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    async def verify(self, reference: ReferenceFace, image_base64: str) -> Dict[str, Any]:
+        """
+        Verify one frame against the user's reference face
+        Returns the FaceVerification.verify_face result shape.
+        Raises FaceEngineBusy when the queue is full.
+        """
+        if self._pool is None:
+            return FaceVerification.verify_face(reference.image_bytes, image_base64)
+        
+        if len(self._queue) >= self.max_queue:
+            self.rejected += 1
+            raise FaceEngineBusy("Face verification is overloaded, try again shortly")
+        
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((reference, image_base64, future, time.perf_counter()))
+        self._ready.set()
+        return await future
+    
+    async def _dispatch(self):
+        while True:
+            await self._ready.wait()
+            if len(self._queue) < self.max_batch_size:
+                # Give concurrent frames a moment to join the batch
+                await asyncio.sleep(self.batch_window_ms / 1000)
+            
+            await self._slots.acquire()
+            batch = self._queue[:self.max_batch_size]
+            self._queue = self._queue[self.max_batch_size:]
+            if not self._queue:
+                self._ready.clear()
+            if not batch:
+                self._slots.release()
+                continue
+            asyncio.create_task(self._run_batch(batch))
+    
+    async def _run_batch(self, batch: List[Tuple[ReferenceFace, str, asyncio.Future, float]]):
+        self._in_flight += len(batch)
+        try:
+            references: Dict[str, Tuple[str, Any]] = {}
+            faces: Dict[str, ReferenceFace] = {}
+            for reference, _, _, _ in batch:
+                if reference.content_hash not in references:
+                    faces[reference.content_hash] = reference
+                    references[reference.content_hash] = (
+                        ("embedding", reference.embedding) if reference.embedding is not None
+                        else ("image", reference.image_bytes)
+                    )
+            frames = [(reference.content_hash, image_base64) for reference, image_base64, _, _ in batch]
+            
+            results, computed = await asyncio.get_running_loop().run_in_executor(
+                self._pool, verify_batch, references, frames
+            )
+            
+            for content_hash, embedding in computed.items():
+                if embedding is not None:
+                    faces[content_hash].embedding = embedding
+            
+            finished = time.perf_counter()
+            self._batch_sizes.append(len(batch))
+            for (_, _, future, queued_at), result in zip(batch, results):
+                self.frames += 1
+                self._latencies.append(finished - queued_at)
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            print(f"Warning: Face verification batch failed: {str(e)}")
+            self.failed_batches += 1
+            for _, _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._in_flight -= len(batch)
+            self._slots.release()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, batch sizes and per-frame latency for monitoring"""
+        latencies = sorted(self._latencies)
+        
+        def percentile(fraction: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000, 2)
+        
+        return {
+            "backend": self.backend,
+            "workers": self.workers if self._pool is not None else 0,
+            "queue_depth": len(self._queue),
+            "in_flight": self._in_flight,
+            "frames": self.frames,
+            "rejected": self.rejected,
+            "failed_batches": self.failed_batches,
+            "mean_batch_size": round(statistics.mean(self._batch_sizes), 2) if self._batch_sizes else None,
+            "latency_ms": {
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99)
+            }
+        }
+
+
+# Singleton instance
+face_engine = FaceVerificationEngine(
+    backend=settings.face_verification_backend,
+    workers=settings.face_verification_workers,
+    max_batch_size=settings.face_verification_max_batch_size,
+    batch_window_ms=settings.face_verification_batch_window_ms,
+    max_queue=settings.face_verification_max_queue,
+    threshold=FaceVerification.FACE_MATCH_THRESHOLD
+)
+
+
+def get_face_engine() -> FaceVerificationEngine:
+    """Dependency to get the shared face verification engine"""
+    return face_engine
@@ -0,0 +1,384 @@
+"""
+Job Catalog - in-memory index of jobs/jobs.json
+
+The job feed is parsed once at startup instead of on every request. A
+JobIndex holds an id -> job dict, the pre-serialized /jobs/all response
+body, and an inverted index from skill token to the job skills (postings)
+that mention it, so recommendations only touch jobs that share a skill with
+the user. Postings and per-skill weights are numpy arrays and are summed per
+job in one vectorized step.
+
+A background task (start/stop, from the app lifespan) re-parses the file in
+a worker thread when its modification time changes and swaps the new index
+in with one assignment, so requests never wait for a reload and always see
+one consistent index. Matching tokens per user token and whole
+recommendations per skill set are cached on the index, so they are dropped
+with it.
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Any, Set, Tuple
+import numpy as np
+
+# Path to jobs.json file
+JOBS_FILE_PATH = os.path.join(os.path.dirname(__file__), "..", "jobs", "jobs.json")
+
+# Match score weights
+REQUIRED_SKILLS_WEIGHT = 70
+PREFERRED_SKILLS_WEIGHT = 30
+
+# Canonical names for common spellings of the same skill
+SKILL_ALIASES = {
+    "js": "javascript",
+    "es6": "javascript",
+    "es6+": "javascript",
+    "nodejs": "node.js",
+    "node": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+    "vue": "vue.js",
+    "vuejs": "vue.js",
+    "postgres": "postgresql",
+    "mongo": "mongodb",
+    "k8s": "kubernetes",
+    "golang": "go",
+    "ml": "machine learning",
+    "py": "python",
+}
+
+# Qualifiers that do not change the skill ("Agile experience" -> "agile",
+# "Excellent communication skills" -> "communication")
+QUALIFIER_SUFFIXES = (" experience", " knowledge", " skills", " skill", " proficiency")
+QUALIFIER_PREFIXES = (
+    "excellent ", "strong ", "good ", "solid ", "proven ", "great ", "basic ",
+    "working knowledge of ", "knowledge of ", "experience with ", "experience in ",
+    "familiarity with ", "understanding of ", "proficiency in ", "proficient in ",
+)
+
+# Separators between alternatives: "Django/Flask", "Node.js or Python",
+# "(e.g., Java, Python)". A slash between short words is part of the name:
+# "A/B Testing", "CI/CD", "UI/UX".
+SKILL_SEPARATORS = re.compile(r"\(|\)|,|\be\.g\.|\bor\b|(?<=\w{3})/(?=\w{3})")
+
+# Shortest word that may match as the tail of a longer one ("sql" in "postgresql")
+MIN_SUFFIX_LENGTH = 3
+
+# Distinct skill names tokenized and remembered (feeds repeat the same names)
+SKILL_TOKENS_CACHE_SIZE = 65536
+
+# Per index: user tokens whose matching job tokens are remembered, and
+# skill sets whose recommendations are remembered
+MATCHING_TOKENS_CACHE_SIZE = 10000
+RECOMMENDATIONS_CACHE_SIZE = 1000
+
+
+def normalize_skill(skill: str) -> str:
+    """Normalize a skill name for matching"""
+    return " ".join(skill.lower().split())
+
+
+def _strip_qualifiers(token: str) -> str:
+    stripped = True
+    while stripped:
+        stripped = False
+        for prefix in QUALIFIER_PREFIXES:
+            if token.startswith(prefix) and len(token) > len(prefix):
+                token = token[len(prefix):]
+                stripped = True
+        for suffix in QUALIFIER_SUFFIXES:
+            if token.endswith(suffix) and len(token) > len(suffix):
+                token = token[:-len(suffix)]
+                stripped = True
+    return token
+
+
+@lru_cache(maxsize=SKILL_TOKENS_CACHE_SIZE)
+def skill_tokens(skill: str) -> FrozenSet[str]:
+    """
+    Canonical tokens for a skill name (memoized)
+    "Django/Flask" -> {"django", "flask"}
+    "Scripting (Python/PowerShell)" -> {"scripting", "python", "powershell"}
+    "Excellent communication skills" -> {"communication"}
+    """
+    tokens = set()
+    for part in SKILL_SEPARATORS.split(normalize_skill(skill)):
+        token = _strip_qualifiers(part.strip(" .:;-"))
+        if token:
+            tokens.add(SKILL_ALIASES.get(token, token))
+    return frozenset(tokens)
+
+
+def _words_match(word: str, other: str) -> bool:
+    """Same word, or one ends with the other ("sql" / "postgresql", not "java" / "javascript")"""
+    if word == other:
+        return True
+    shorter, longer = (word, other) if len(word) < len(other) else (other, word)
+    return len(shorter) >= MIN_SUFFIX_LENGTH and longer.endswith(shorter)
+
+
+def tokens_match(words: FrozenSet[str], other: FrozenSet[str]) -> bool:
+    """Every word of the shorter token matches a word of the longer ("react" / "react native")"""
+    shorter, longer = (words, other) if len(words) <= len(other) else (other, words)
+    return all(any(_words_match(word, candidate) for candidate in longer) for word in shorter)
+
+
+class JobIndex:
+    """One parsed job feed and its skill index; never modified once built"""
+    
+    def __init__(self, jobs: List[Dict[str, Any]]):
+        self.jobs = jobs
+        self.by_id: Dict[str, Dict[str, Any]] = {job.get("id"): job for job in jobs}
+        self.all_jobs_body = json.dumps(jobs).encode("utf-8")
+        
+        # One entry per job skill, required before preferred, in feed order, so
+        # a job's entries are the range job_entry_start[pos]:job_entry_start[pos + 1]
+        entry_job, entry_skill, entry_weight = [], [], []
+        job_entry_start = [0]
+        postings: Dict[str, List[int]] = {}
+        for job_pos, job in enumerate(jobs):
+            requirements = job.get("requirements", {})
+            required = requirements.get("required_skills") or []
+            preferred = requirements.get("preferred_skills") or []
+            
+            for skills, weight in ((required, REQUIRED_SKILLS_WEIGHT), (preferred, PREFERRED_SKILLS_WEIGHT)):
+                for skill in skills:
+                    entry = len(entry_job)
+                    entry_job.append(job_pos)
+                    entry_skill.append(skill)
+                    entry_weight.append(weight / len(skills))
+                    for token in skill_tokens(skill):
+                        postings.setdefault(token, []).append(entry)
+            job_entry_start.append(len(entry_job))
+        
+        self.entry_job = np.asarray(entry_job, dtype=np.int64)
+        self.entry_weight = np.asarray(entry_weight, dtype=np.float64)
+        self.entry_skill = entry_skill
+        self.job_entry_start = job_entry_start
+        # skill token -> sorted entry ids
+        self.postings = {token: np.asarray(entries, dtype=np.int64) for token, entries in postings.items()}
+        
+        # Fallback when no token is shared: word -> tokens containing it,
+        # and suffix -> words ending with it
+        self.token_words = {token: frozenset(token.split()) for token in postings}
+        self.word_tokens: Dict[str, Set[str]] = {}
+        self.suffix_words: Dict[str, Set[str]] = {}
+        for token, words in self.token_words.items():
+            for word in words:
+                self.word_tokens.setdefault(word, set()).add(token)
+                for start in range(1, len(word) - MIN_SUFFIX_LENGTH + 1):
+                    self.suffix_words.setdefault(word[start:], set()).add(word)
+        
+        self._matching: "OrderedDict[str, FrozenSet[str]]" = OrderedDict()
+        self._recommendations: "OrderedDict[Tuple[FrozenSet[str], int], Tuple[List[Tuple[int, float, List[int]]], int]]" = OrderedDict()
+    
+    def _find_matching_tokens(self, token: str) -> FrozenSet[str]:
+        words = frozenset(token.split())
+        candidates = set()
+        for word in words:
+            related = {word} | self.suffix_words.get(word, set())
+            related.update(word[start:] for start in range(1, len(word) - MIN_SUFFIX_LENGTH + 1))
+            for related_word in related:
+                candidates |= self.word_tokens.get(related_word, set())
+        
+        matches = {candidate for candidate in candidates if tokens_match(words, self.token_words[candidate])}
+        if token in self.postings:
+            matches.add(token)
+        return frozenset(matches)
+    
+    def matching_tokens(self, token: str) -> FrozenSet[str]:
+        """Job skill tokens matching a user token: the same token, or a token_match (cached)"""
+        matches = self._matching.get(token)
+        if matches is None:
+            matches = self._matching[token] = self._find_matching_tokens(token)
+            if len(self._matching) > MATCHING_TOKENS_CACHE_SIZE:
+                self._matching.popitem(last=False)
+        else:
+            self._matching.move_to_end(token)
+        return matches
+    
+    def _rank(self, tokens: FrozenSet[str], limit: int) -> Tuple[List[Tuple[int, float, List[int]]], int]:
+        postings = [self.postings[token] for token in tokens if token in self.postings]
+        if not postings or limit <= 0:
+            return [], 0
+        
+        # A job skill counts once even if several user tokens match it
+        # ("Django" and "Flask" vs "Django/Flask")
+        if len(postings) == 1:
+            entries = postings[0]
+        else:
+            matched = np.zeros(len(self.entry_job), dtype=bool)
+            for entry_ids in postings:
+                matched[entry_ids] = True
+            entries = np.flatnonzero(matched)
+        scores = np.round(np.bincount(
+            self.entry_job[entries], weights=self.entry_weight[entries], minlength=len(self.jobs)
+        ), 2)
+        job_positions = np.flatnonzero(scores)
+        total = len(job_positions)
+        
+        if total > limit:
+            # Jobs above the limit-th best score, then the earliest jobs tied with it
+            job_scores = scores[job_positions]
+            cutoff = np.partition(job_scores, total - limit)[total - limit]
+            above = job_positions[job_scores > cutoff]
+            tied = job_positions[job_scores == cutoff][:limit - len(above)]
+            job_positions = np.concatenate((above, tied))
+        
+        # Highest score first; equal scores keep feed order
+        order = np.lexsort((job_positions, -scores[job_positions]))
+        top = [(int(job_pos), float(scores[job_pos])) for job_pos in job_positions[order]]
+        
+        ranked = []
+        for job_pos, score in top:
+            start, end = self.job_entry_start[job_pos], self.job_entry_start[job_pos + 1]
+            job_entries = entries[np.searchsorted(entries, start):np.searchsorted(entries, end)]
+            ranked.append((job_pos, score, job_entries.tolist()))
+        return ranked, total
+    
+    def clear_cache(self):
+        self._matching.clear()
+        self._recommendations.clear()
+    
+    def recommend(self, user_skills: List[str], limit: int) -> Tuple[List[Dict[str, Any]], int]:
+        tokens = set()
+        for skill in user_skills:
+            for token in skill_tokens(skill):
+                tokens |= self.matching_tokens(token)
+        
+        key = (frozenset(tokens), limit)
+        cached = self._recommendations.get(key)
+        if cached is None:
+            cached = self._recommendations[key] = self._rank(key[0], limit)
+            if len(self._recommendations) > RECOMMENDATIONS_CACHE_SIZE:
+                self._recommendations.popitem(last=False)
+        else:
+            self._recommendations.move_to_end(key)
+        
+        ranked, total = cached
+        recommendations = []
+        for job_pos, score, entries in ranked:
+            job_with_match = self.jobs[job_pos].copy()
+            job_with_match["match_score"] = score
+            job_with_match["matched_skills"] = [self.entry_skill[entry] for entry in entries]
+            recommendations.append(job_with_match)
+        return recommendations, total
+
+
+class JobCatalog:
+    """jobs.json loaded into memory and reloaded in the background when the file changes"""
+    
+    def __init__(self, path: str, check_interval_seconds: float = 1.0):
+        self.path = path
+        self.check_interval_seconds = check_interval_seconds
+        self._index = JobIndex([])
+        self._loaded = False
+        self._file_mtime: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self.reloads = 0
+    
+    @staticmethod
+    def _mtime(path: str) -> Optional[float]:
+        try:
+            return os.path.getmtime(path)
+        except FileNotFoundError:
+            return None
+    
+    def load(self):
+        """
+        Parse the jobs file, build a new index and swap it in
+        Blocking; the watcher runs it in a worker thread.
+        """
+        self._loaded = True
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, 'r', encoding='utf-8') as f:
+                jobs = json.load(f)
+        except FileNotFoundError:
+            print(f"Jobs file not found at: {self.path}")
+            jobs, mtime = [], None
+        except json.JSONDecodeError as e:
+            # Keep serving the last good catalog until the file is fixed
+            print(f"Error decoding jobs JSON: {e}")
+            self._file_mtime = self._mtime(self.path)
+            return
+        
+        self._index = JobIndex(jobs)
+        self._file_mtime = mtime
+        self.reloads += 1
+    
+    def start(self):
+        """Start watching the jobs file (called from the app lifespan)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._watch())
+    
+    async def stop(self):
+        """Stop watching the jobs file"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self.check_interval_seconds)
+            try:
+                if self._mtime(self.path) != self._file_mtime:
+                    await asyncio.to_thread(self.load)
+            except Exception as e:
+                print(f"Warning: Failed to reload jobs: {str(e)}")
+    
+    def _current(self) -> JobIndex:
+        # Outside the app (scripts, benchmarks) nothing loaded the feed yet
+        if not self._loaded:
+            self.load()
+        return self._index
+    
+    def clear_cache(self):
+        """Forget cached matches and recommendations (they also go with every reload)"""
+        self._current().clear_cache()
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a job by id"""
+        return self._current().by_id.get(job_id)
+    
+    def all(self) -> List[Dict[str, Any]]:
+        """All jobs, in file order"""
+        return self._current().jobs
+    
+    def all_body(self) -> bytes:
+        """Pre-serialized JSON array of all jobs"""
+        return self._current().all_jobs_body
+    
+    def recommend(self, user_skills: List[str], limit: int = 20) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Top jobs for a set of user skills
+        Returns: (up to `limit` jobs with match_score and matched_skills, total matching jobs)
+        
+        Algorithm:
+        - Required skills are weighted at 70%
+        - Preferred skills are weighted at 30%
+        - A job skill matches a user skill if, after splitting alternatives and
+          dropping qualifiers, one of its tokens equals or contains a user token
+          word for word ("react" / "react native"), where a word also matches
+          its own tail ("sql" / "postgresql") but not its head ("java" / "javascript")
+        - Only jobs reached through the user's tokens are scored
+        """
+        return self._current().recommend(user_skills, limit)
+
+
+# Singleton instance
+job_catalog = JobCatalog(JOBS_FILE_PATH)
+
+
+def get_job_catalog() -> JobCatalog:
+    """Dependency to get the shared job catalog"""
+    return job_catalog
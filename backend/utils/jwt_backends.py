@@ -0,0 +1,91 @@
+"""
+JWT Backends - interchangeable libraries for signing and verifying tokens
+
+Access tokens are plain HS256 JWTs, so any JWT library can sign and check
+them. JoseBackend (python-jose) is the default; PyJWTBackend uses PyJWT,
+which is actively maintained (benchmarks/bench_auth.py compares the two).
+The library is chosen with JWT_BACKEND and both raise InvalidTokenError on
+a bad token, so utils.security does not care which one is active.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict
+from config import settings
+
+
+class InvalidTokenError(Exception):
+    """Bad signature, malformed token or expired token"""
+
+
+class JWTBackend(ABC):
+    """Interface of a JWT library"""
+    
+    name = ""
+    
+    @abstractmethod
+    def encode(self, claims: Dict[str, Any], key: str, algorithm: str) -> str:
+        """Signed token for the claims"""
+    
+    @abstractmethod
+    def decode(self, token: str, key: str, algorithm: str) -> Dict[str, Any]:
+        """Verified claims (including exp) or InvalidTokenError"""
+
+
+class JoseBackend(JWTBackend):
+    """python-jose"""
+    
+    name = "jose"
+    
+    def __init__(self):
+        from jose import JWTError, jwt
+        self._jwt = jwt
+        self._error = JWTError
+    
+    def encode(self, claims: Dict[str, Any], key: str, algorithm: str) -> str:
+        return self._jwt.encode(claims, key, algorithm=algorithm)
+    
+    def decode(self, token: str, key: str, algorithm: str) -> Dict[str, Any]:
+        try:
+            return self._jwt.decode(token, key, algorithms=[algorithm])
+        except self._error as e:
+            raise InvalidTokenError(str(e))
+
+
+class PyJWTBackend(JWTBackend):
+    """PyJWT"""
+    
+    name = "pyjwt"
+    
+    def __init__(self):
+        import jwt
+        self._jwt = jwt
+    
+    def encode(self, claims: Dict[str, Any], key: str, algorithm: str) -> str:
+        return self._jwt.encode(claims, key, algorithm=algorithm)
+    
+    def decode(self, token: str, key: str, algorithm: str) -> Dict[str, Any]:
+        try:
+            return self._jwt.decode(token, key, algorithms=[algorithm])
+        except self._jwt.PyJWTError as e:
+            raise InvalidTokenError(str(e))
+
+
+BACKENDS = {
+    JoseBackend.name: JoseBackend,
+    PyJWTBackend.name: PyJWTBackend
+}
+
+
+def create_jwt_backend(name: str) -> JWTBackend:
+    """The configured JWT library, falling back to python-jose if it is missing"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown JWT backend: {name}")
+    try:
+        return BACKENDS[name]()
+    except ImportError:
+        print(f"Warning: JWT_BACKEND={name} but its package is not installed; using python-jose")
+        return JoseBackend()
+
+
+# Singleton instance
+jwt_backend = create_jwt_backend(settings.jwt_backend)
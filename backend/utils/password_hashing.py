@@ -0,0 +1,155 @@
+"""
+Password Hashing - bcrypt off the event loop with load shedding
+
+bcrypt costs about 250 ms of CPU per hash or check at the default cost. Run
+inline in an async handler it freezes every other request on the worker, so
+a registration wave stalls test submissions. Hashing and verification run
+in a small dedicated thread pool instead (bcrypt releases the GIL while it
+works). Requests beyond the pool size wait in a bounded queue; when that is
+full the call fails fast with PasswordHasherBusy, which the auth routes turn
+into 503 + Retry-After instead of letting latency grow without bound.
+
+Bulk registration hashes a whole cohort with hash_many on a second pool with
+one thread per CPU core, one batch at a time per API worker, so a cohort
+upload does not take the interactive pool's slots.
+
+The cost factor is BCRYPT_ROUNDS. Hashes made with another cost are
+re-hashed transparently on the next successful login (needs_rehash).
+"""
+
+import asyncio
+import os
+import statistics
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional
+from config import settings
+from utils.security import get_password_hash, verify_password
+
+# Hash durations kept for the stats percentiles
+LATENCY_WINDOW = 1000
+
+
+class PasswordHasherBusy(Exception):
+    """Too many password operations are queued; try again shortly"""
+
+
+class PasswordHasher:
+    """bcrypt hashing and verification on a size-capped executor"""
+    
+    def __init__(self, workers: int, max_queue: int, rounds: int, bulk_workers: int = 0):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self.bulk_workers = bulk_workers or os.cpu_count() or 1
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._bulk_executor: Optional[ThreadPoolExecutor] = None
+        self._bulk_running = False
+        self._pending = 0
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+    
+    async def _run(self, function: Callable, *args) -> Any:
+        if self._pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise PasswordHasherBusy("Too many authentication requests, please retry shortly")
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        
+        self._pending += 1
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+        finally:
+            self._pending -= 1
+            self.completed += 1
+            self._latencies.append(time.perf_counter() - start)
+    
+    async def hash(self, password: str) -> str:
+        """bcrypt hash of a password at the configured cost"""
+        return await self._run(get_password_hash, password, self.rounds)
+    
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Check a password against a stored hash"""
+        return await self._run(verify_password, password, hashed_password)
+    
+    async def hash_many(self, passwords: List[str]) -> List[str]:
+        """Hash a batch of passwords in parallel on every core (bulk registration)"""
+        if self._bulk_running:
+            self.rejected += 1
+            raise PasswordHasherBusy("A bulk registration is already running, please retry shortly")
+        
+        if self._bulk_executor is None:
+            self._bulk_executor = ThreadPoolExecutor(max_workers=self.bulk_workers, thread_name_prefix="bcrypt-bulk")
+        
+        self._bulk_running = True
+        try:
+            loop = asyncio.get_running_loop()
+            hashes = await asyncio.gather(*(
+                loop.run_in_executor(self._bulk_executor, get_password_hash, password, self.rounds)
+                for password in passwords
+            ))
+            self.completed += len(hashes)
+            return list(hashes)
+        finally:
+            self._bulk_running = False
+    
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """True when the hash was made with a different cost factor"""
+        try:
+            # $2b$12$<salt+hash>
+            return int(hashed_password.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+    
+    def shutdown(self):
+        """Stop the worker threads (called from the app lifespan)"""
+        for executor in (self._executor, self._bulk_executor):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._bulk_executor = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and latency for monitoring"""
+        latencies = sorted(self._latencies)
+        
+        def percentile(fraction: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000, 2)
+        
+        return {
+            "workers": self.workers,
+            "bulk_workers": self.bulk_workers,
+            "bulk_running": self._bulk_running,
+            "rounds": self.rounds,
+            "pending": self._pending,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "mean_ms": round(statistics.mean(latencies) * 1000, 2) if latencies else None,
+            "latency_ms": {
+                "p50": percentile(0.50),
+                "p99": percentile(0.99)
+            }
+        }
+
+
+# Singleton instance
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_max_queue,
+    rounds=settings.bcrypt_rounds,
+    bulk_workers=settings.password_hash_bulk_workers
+)
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Dependency to get the shared password hasher"""
+    return password_hasher
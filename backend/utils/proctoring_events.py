@@ -0,0 +1,326 @@
+"""
+Proctoring Events - write-behind buffer for proctoring violations
+
+Logging a violation used to cost three queries per event (session status,
+insert, exact count), and a student flapping between tabs sends a stream of
+them. Events are now validated against a cached per-session state, given
+their violation_id up front and appended to an in-memory buffer. The buffer
+is written with one bulk insert every flush interval, or as soon as it holds
+flush_max_events rows.
+
+Each session keeps its running violation total in memory (database count
+plus buffered events, re-read every session_check_seconds so events logged
+by other workers are picked up) and a token bucket that drops events beyond
+the per-session rate limit.
+
+Anything that reads proctoring_violations for scoring (submit_test, the
+deadline scheduler) calls flush() first. That writes only this worker's
+buffer: events buffered by other workers reach the table within one flush
+interval, so a score computed right after a violation logged elsewhere can
+miss it.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+from postgrest.exceptions import APIError
+from supabase import AsyncClient
+from config import settings
+from models.test import TestStatus
+
+SEVERITIES = ("Low", "Medium", "High")
+
+# A bulk insert that fails to reach the database is retried once with the
+# next flush, then dropped. One the database rejects is split up instead.
+MAX_FLUSH_ATTEMPTS = 2
+
+# Session states unused for this long are dropped
+SESSION_IDLE_SECONDS = 3600
+
+
+class SessionState:
+    """Cached ownership, status, violation total and rate limit of one session"""
+    
+    def __init__(self, user_id: str, status: str, total_violations: int, burst: int):
+        self.user_id = user_id
+        self.status = status
+        self.total_violations = total_violations
+        self.checked_at = time.monotonic()
+        self.last_seen = self.checked_at
+        self.tokens = float(burst)
+        self.refilled_at = self.checked_at
+    
+    def take(self, count: int, rate: float, burst: int) -> int:
+        """Take up to count tokens from the session's bucket; returns how many were granted"""
+        now = time.monotonic()
+        self.tokens = min(float(burst), self.tokens + (now - self.refilled_at) * rate)
+        self.refilled_at = now
+        granted = min(count, int(self.tokens))
+        self.tokens -= granted
+        return granted
+
+
+class ProctoringEventBuffer:
+    """Per-session violation state plus a bulk-insert buffer for proctoring_violations"""
+    
+    def __init__(
+        self,
+        flush_interval_ms: int,
+        flush_max_events: int,
+        rate_limit_per_second: float,
+        rate_limit_burst: int,
+        session_check_seconds: float
+    ):
+        self.flush_interval_ms = flush_interval_ms
+        self.flush_max_events = flush_max_events
+        self.rate_limit_per_second = rate_limit_per_second
+        self.rate_limit_burst = rate_limit_burst
+        self.session_check_seconds = session_check_seconds
+        self._sessions: Dict[str, SessionState] = {}
+        self._rows: List[Dict[str, Any]] = []
+        self._retry: List[Tuple[int, List[Dict[str, Any]]]] = []
+        self._pending: Dict[str, int] = {}
+        self._flush_lock = asyncio.Lock()
+        self._full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._db: Optional[AsyncClient] = None
+        self.accepted = 0
+        self.rate_limited = 0
+        self.flushes = 0
+        self.dropped_on_error = 0
+    
+    async def _load_session(self, db: AsyncClient, session_id: str) -> Optional[SessionState]:
+        # Count under the flush lock so no insert is in flight: every event is
+        # then either in the database count or still buffered, never both
+        async with self._flush_lock:
+            response = await db.table("test_sessions").select(
+                "user_id, status, proctoring_violations(count)"
+            ).eq("session_id", session_id).execute()
+            if not response.data:
+                return None
+            
+            row = response.data[0]
+            counts = row.get("proctoring_violations") or [{"count": 0}]
+            total = counts[0]["count"] + self._pending.get(session_id, 0)
+        
+        state = self._sessions.get(session_id)
+        if state is None:
+            return SessionState(str(row["user_id"]), row["status"], total, self.rate_limit_burst)
+        
+        state.status = row["status"]
+        state.total_violations = total
+        state.checked_at = time.monotonic()
+        return state
+    
+    async def check_session(self, db: AsyncClient, session_id: Any, user_id: Any) -> Optional[str]:
+        """
+        Validate that the session belongs to the user and is in progress
+        Returns: None, or 'session_not_found' / 'session_not_in_progress'
+        """
+        session_id = str(session_id)
+        state = self._sessions.get(session_id)
+        if state is None or time.monotonic() - state.checked_at >= self.session_check_seconds:
+            state = await self._load_session(db, session_id)
+            if state is None:
+                return "session_not_found"
+            self._sessions[session_id] = state
+        
+        state.last_seen = time.monotonic()
+        if state.user_id != str(user_id):
+            return "session_not_found"
+        if state.status != TestStatus.IN_PROGRESS.value:
+            return "session_not_in_progress"
+        return None
+    
+    def add(
+        self,
+        session_id: Any,
+        user_id: Any,
+        events: List[Dict[str, Any]],
+        rate_limit: bool = True
+    ) -> Tuple[List[str], int]:
+        """
+        Buffer violation events of a session validated by check_session
+        Each event has violation_type, severity, details and occurred_at.
+        Returns: (violation ids of the accepted events, number of rate-limited events)
+        """
+        session_id = str(session_id)
+        state = self._sessions[session_id]
+        granted = len(events)
+        if rate_limit:
+            granted = state.take(len(events), self.rate_limit_per_second, self.rate_limit_burst)
+        
+        violation_ids = []
+        for event in events[:granted]:
+            violation_id = str(uuid4())
+            violation_ids.append(violation_id)
+            self._rows.append({
+                "violation_id": violation_id,
+                "session_id": session_id,
+                "user_id": str(user_id),
+                "violation_type": event["violation_type"],
+                "severity": event["severity"],
+                "details": event.get("details") or {},
+                "occurred_at": event.get("occurred_at") or datetime.utcnow().isoformat()
+            })
+        
+        state.total_violations += granted
+        self._pending[session_id] = self._pending.get(session_id, 0) + granted
+        self.accepted += granted
+        self.rate_limited += len(events) - granted
+        
+        if self._full is not None and len(self._rows) >= self.flush_max_events:
+            self._full.set()
+        return violation_ids, len(events) - granted
+    
+    def forget(self, session_id: Any):
+        """Drop a session's cached state once it is submitted or expired"""
+        self._sessions.pop(str(session_id), None)
+    
+    def total_violations(self, session_id: Any) -> int:
+        """Running violation total of a session validated by check_session"""
+        return self._sessions[str(session_id)].total_violations
+    
+    async def flush(self, db: Optional[AsyncClient] = None):
+        """Write this worker's buffered events with one bulk insert"""
+        db = db or self._db
+        async with self._flush_lock:
+            batches, self._retry = self._retry, []
+            if self._rows:
+                batches.append((0, self._rows))
+                self._rows = []
+            
+            for attempts, rows in batches:
+                requeued: List[Dict[str, Any]] = []
+                try:
+                    await db.table("proctoring_violations").insert(rows).execute()
+                except APIError:
+                    # Rejected rows (a deleted session, a bad value) must not
+                    # take the rest of the batch down with them
+                    dropped, requeued = await self._insert_isolating(db, rows, attempts)
+                    self.dropped_on_error += len(dropped)
+                except Exception as e:
+                    print(f"Warning: Failed to write proctoring violations: {str(e)}")
+                    if attempts + 1 < MAX_FLUSH_ATTEMPTS:
+                        self._retry.append((attempts + 1, rows))
+                        continue
+                    self.dropped_on_error += len(rows)
+                
+                self.flushes += 1
+                requeued_ids = {row["violation_id"] for row in requeued}
+                for row in rows:
+                    if row["violation_id"] in requeued_ids:
+                        continue
+                    session_id = row["session_id"]
+                    self._pending[session_id] -= 1
+                    if not self._pending[session_id]:
+                        del self._pending[session_id]
+    
+    async def _insert_isolating(
+        self,
+        db: AsyncClient,
+        rows: List[Dict[str, Any]],
+        attempts: int
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Insert a batch the database rejected in parts: per session, then halves
+        Returns: (rows dropped, each logged; rows queued for the next flush)
+        """
+        by_session: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            by_session.setdefault(row["session_id"], []).append(row)
+        if len(by_session) > 1:
+            parts = list(by_session.values())
+        else:
+            parts = [rows[:len(rows) // 2], rows[len(rows) // 2:]]
+        
+        dropped, requeued = [], []
+        for part in parts:
+            try:
+                await db.table("proctoring_violations").insert(part).execute()
+            except APIError as e:
+                if len(part) > 1:
+                    part_dropped, part_requeued = await self._insert_isolating(db, part, attempts)
+                    dropped.extend(part_dropped)
+                    requeued.extend(part_requeued)
+                    continue
+                row = part[0]
+                print(
+                    f"Warning: Dropped proctoring violation {row['violation_id']} of session "
+                    f"{row['session_id']} ({row['violation_type']}): {str(e)}"
+                )
+                dropped.append(row)
+            except Exception as e:
+                print(f"Warning: Failed to write proctoring violations: {str(e)}")
+                if attempts + 1 < MAX_FLUSH_ATTEMPTS:
+                    self._retry.append((attempts + 1, part))
+                    requeued.extend(part)
+                else:
+                    dropped.extend(part)
+        return dropped, requeued
+    
+    def _prune(self):
+        cutoff = time.monotonic() - SESSION_IDLE_SECONDS
+        for session_id in [sid for sid, state in self._sessions.items() if state.last_seen < cutoff]:
+            del self._sessions[session_id]
+    
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.flush_interval_ms / 1000)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            try:
+                await self.flush()
+                self._prune()
+            except Exception as e:
+                # Keep the flusher alive; the next round retries what is still buffered
+                print(f"Warning: Proctoring event flush failed: {str(e)}")
+    
+    def start(self, db: AsyncClient):
+        """Start the background flusher (called from the app lifespan)"""
+        self._db = db
+        self._full = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the flusher and write whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Buffer size and counters for monitoring"""
+        return {
+            "buffered_events": len(self._rows) + sum(len(rows) for _, rows in self._retry),
+            "tracked_sessions": len(self._sessions),
+            "accepted": self.accepted,
+            "rate_limited": self.rate_limited,
+            "flushes": self.flushes,
+            "dropped_on_error": self.dropped_on_error,
+            "flush_interval_ms": self.flush_interval_ms,
+            "flush_max_events": self.flush_max_events
+        }
+
+
+# Singleton instance
+proctoring_events = ProctoringEventBuffer(
+    flush_interval_ms=settings.proctoring_flush_interval_ms,
+    flush_max_events=settings.proctoring_flush_max_events,
+    rate_limit_per_second=settings.proctoring_rate_limit_per_second,
+    rate_limit_burst=settings.proctoring_rate_limit_burst,
+    session_check_seconds=settings.proctoring_session_check_seconds
+)
+
+
+def get_proctoring_events() -> ProctoringEventBuffer:
+    """Dependency to get the shared proctoring event buffer"""
+    return proctoring_events
@@ -0,0 +1,210 @@
+"""
+Question Pool - in-memory question ids per skill for test sampling
+
+A skill's question bank only changes when questions are imported, but every
+new test session samples from it. Each skill's bank is held as compact
+parallel arrays (question id, points, type, correct answer) with index lists
+per difficulty level. Sampling is O(k) and needs no database read.
+
+Pools are rebuilt only when the skill's row in question_bank_versions changes.
+A trigger on test_questions bumps that row, so any import invalidates the
+pool. The version is checked at most once per check interval.
+"""
+
+import asyncio
+import random
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from supabase import AsyncClient
+from config import settings
+
+DIFFICULTY_LEVELS = ("Easy", "Medium", "Hard")
+
+# PostgREST returns at most 1000 rows per request by default
+PAGE_SIZE = 1000
+
+
+class QuestionPool:
+    """One skill's question bank as parallel arrays grouped by difficulty"""
+    
+    def __init__(self, rows: List[Dict[str, Any]], version: int):
+        self.version = version
+        self.question_ids: List[str] = []
+        self.points = array("i")
+        self.question_types: List[str] = []
+        self.difficulty_levels: List[str] = []
+        self.correct_answers: List[Optional[str]] = []
+        self.by_difficulty: Dict[str, List[int]] = {level: [] for level in DIFFICULTY_LEVELS}
+        self.position: Dict[str, int] = {}
+        
+        for row in rows:
+            index = len(self.question_ids)
+            self.question_ids.append(str(row["question_id"]))
+            self.points.append(row["points"] if row.get("points") is not None else 1)
+            self.question_types.append(row["question_type"])
+            self.difficulty_levels.append(row["difficulty_level"])
+            self.correct_answers.append(row.get("correct_answer"))
+            self.by_difficulty.setdefault(row["difficulty_level"], []).append(index)
+            self.position[self.question_ids[index]] = index
+    
+    def __len__(self) -> int:
+        return len(self.question_ids)
+    
+    @staticmethod
+    def _draw(candidates: Sequence[int], k: int, excluded: Set[int]) -> List[int]:
+        """
+        Up to k distinct indices from candidates, skipping excluded ones
+        Rejection sampling is O(k) while few candidates are excluded; after too
+        many rejections the remaining candidates are filtered once instead.
+        """
+        if k <= 0 or not candidates:
+            return []
+        
+        drawn: List[int] = []
+        seen: Set[int] = set()
+        attempts = 0
+        while len(drawn) < k and attempts < 4 * k + 16:
+            attempts += 1
+            index = candidates[random.randrange(len(candidates))]
+            if index in excluded or index in seen:
+                continue
+            seen.add(index)
+            drawn.append(index)
+        
+        if len(drawn) < k:
+            remaining = [index for index in candidates if index not in excluded and index not in seen]
+            drawn.extend(random.sample(remaining, min(k - len(drawn), len(remaining))))
+        return drawn
+    
+    def sample(
+        self,
+        mix: Dict[str, int],
+        total: int,
+        avoid_question_ids: Iterable[str] = ()
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Draw `total` questions, `mix[level]` per difficulty level
+        Returns: (question rows with id, type, difficulty, answer and points; total score)
+        
+        Questions in avoid_question_ids (the student's previous attempts) are
+        only reused when the bank has nothing else left. Difficulty levels with
+        too few questions are topped up from the other levels.
+        """
+        avoided = {self.position[question_id] for question_id in avoid_question_ids if question_id in self.position}
+        chosen: List[int] = []
+        
+        for level, count in mix.items():
+            chosen.extend(self._draw(self.by_difficulty.get(level, []), count, avoided))
+        
+        all_indices = range(len(self.question_ids))
+        if len(chosen) < total:
+            # Top up from any level, still avoiding previous questions
+            chosen.extend(self._draw(all_indices, total - len(chosen), avoided | set(chosen)))
+        if len(chosen) < total:
+            # Bank exhausted for this student: allow repeats from earlier attempts
+            chosen.extend(self._draw(all_indices, total - len(chosen), set(chosen)))
+        
+        chosen = chosen[:total]
+        random.shuffle(chosen)
+        
+        questions = []
+        total_score = 0
+        for index in chosen:
+            total_score += self.points[index]
+            questions.append({
+                "question_id": self.question_ids[index],
+                "question_type": self.question_types[index],
+                "difficulty_level": self.difficulty_levels[index],
+                "correct_answer": self.correct_answers[index],
+                "points": self.points[index]
+            })
+        return questions, total_score
+
+
+class QuestionPoolCache:
+    """Question pools by skill_id, rebuilt when the skill's bank version changes"""
+    
+    def __init__(self, check_interval_seconds: float):
+        self.check_interval_seconds = check_interval_seconds
+        self._pools: Dict[str, QuestionPool] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.loads = 0
+    
+    async def _fetch_version(self, db: AsyncClient, skill_id: str) -> int:
+        response = await db.table("question_bank_versions").select("version").eq(
+            "skill_id", skill_id
+        ).execute()
+        return response.data[0]["version"] if response.data else 0
+    
+    async def _load(self, db: AsyncClient, skill_id: str, version: int) -> QuestionPool:
+        rows = []
+        start = 0
+        while True:
+            response = await db.table("test_questions").select(
+                "question_id, difficulty_level, question_type, correct_answer, points"
+            ).eq("skill_id", skill_id).order("question_id").range(start, start + PAGE_SIZE - 1).execute()
+            page = response.data or []
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                break
+            start += PAGE_SIZE
+        
+        self.loads += 1
+        return QuestionPool(rows, version)
+    
+    async def get_pool(self, db: AsyncClient, skill_id: Any) -> QuestionPool:
+        """The skill's pool, rebuilt if its question bank changed"""
+        skill_id = str(skill_id)
+        pool = self._pools.get(skill_id)
+        now = time.monotonic()
+        if pool is not None and now - self._checked_at.get(skill_id, 0) < self.check_interval_seconds:
+            return pool
+        
+        lock = self._locks.setdefault(skill_id, asyncio.Lock())
+        async with lock:
+            # Another request may have refreshed the pool while we waited
+            pool = self._pools.get(skill_id)
+            if pool is not None and time.monotonic() - self._checked_at.get(skill_id, 0) < self.check_interval_seconds:
+                return pool
+            
+            version = await self._fetch_version(db, skill_id)
+            if pool is None or pool.version != version:
+                pool = await self._load(db, skill_id, version)
+                self._pools[skill_id] = pool
+            self._checked_at[skill_id] = time.monotonic()
+            return pool
+    
+    def invalidate(self, skill_id: Optional[Any] = None):
+        """Drop one skill's pool, or all pools; the next session rebuilds them"""
+        if skill_id is None:
+            self._pools.clear()
+            self._checked_at.clear()
+        else:
+            self._pools.pop(str(skill_id), None)
+            self._checked_at.pop(str(skill_id), None)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Pool sizes for monitoring"""
+        return {
+            "loads": self.loads,
+            "check_interval_seconds": self.check_interval_seconds,
+            "pools": {
+                skill_id: {
+                    "version": pool.version,
+                    "questions": len(pool),
+                    "by_difficulty": {level: len(indices) for level, indices in pool.by_difficulty.items()}
+                }
+                for skill_id, pool in self._pools.items()
+            }
+        }
+
+
+# Singleton instance
+question_pools = QuestionPoolCache(check_interval_seconds=settings.question_pool_check_interval_seconds)
+
+
+def get_question_pools() -> QuestionPoolCache:
+    """Dependency to get the shared question pools"""
+    return question_pools
@@ -0,0 +1,162 @@
+"""
+Reference Faces - cached profile pictures for face verification
+
+Every face check compares a webcam frame with the user's profile picture.
+The picture is fetched once per user with a pooled async HTTP client and
+kept in a bounded in-process LRU together with its URL and content hash, so
+per-frame verification needs no database query and no download. The face
+embedding derived from it can be attached to the same entry, so it is
+computed once per picture too.
+
+upload_profile_picture stores the new picture directly (it already holds
+the bytes) and delete_profile_picture invalidates the entry. Entries expire
+after ttl_seconds so a picture changed through another API worker is picked
+up.
+"""
+
+import asyncio
+import hashlib
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import httpx
+from supabase import AsyncClient
+from config import settings
+
+
+class ReferenceFace:
+    """A user's profile picture and anything derived from it"""
+    
+    def __init__(self, url: str, image_bytes: bytes):
+        self.url = url
+        self.image_bytes = image_bytes
+        self.content_hash = hashlib.sha256(image_bytes).hexdigest()
+        self.embedding: Optional[Any] = None
+        self.loaded_at = time.monotonic()
+
+
+class ReferenceFaceCache:
+    """Reference faces by user_id in a bounded LRU with TTL"""
+    
+    def __init__(self, max_users: int, ttl_seconds: int, fetch_timeout_seconds: float):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self.fetch_timeout_seconds = fetch_timeout_seconds
+        self._faces: "OrderedDict[str, ReferenceFace]" = OrderedDict()
+        # Per-user fetch locks; an entry disappears once no request holds its lock
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._http: Optional[httpx.AsyncClient] = None
+        self.hits = 0
+        self.misses = 0
+        self.downloads = 0
+    
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            # One connection pool for every download
+            self._http = httpx.AsyncClient(
+                timeout=self.fetch_timeout_seconds,
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20)
+            )
+        return self._http
+    
+    def _cached(self, user_id: str) -> Optional[ReferenceFace]:
+        face = self._faces.get(user_id)
+        if face is None or time.monotonic() - face.loaded_at >= self.ttl_seconds:
+            return None
+        self._faces.move_to_end(user_id)
+        return face
+    
+    def store(self, user_id: Any, url: str, image_bytes: bytes) -> ReferenceFace:
+        """Cache a user's picture, keeping the embedding if the content is unchanged"""
+        user_id = str(user_id)
+        face = ReferenceFace(url, image_bytes)
+        previous = self._faces.pop(user_id, None)
+        if previous is not None and previous.content_hash == face.content_hash:
+            face.embedding = previous.embedding
+        
+        self._faces[user_id] = face
+        while len(self._faces) > self.max_users:
+            self._faces.popitem(last=False)
+        return face
+    
+    async def get(self, db: AsyncClient, user_id: Any, user_role: str) -> Optional[ReferenceFace]:
+        """
+        The user's reference face, fetched on first use
+        Returns None when the user has no profile picture; download errors propagate.
+        """
+        user_id = str(user_id)
+        face = self._cached(user_id)
+        if face is not None:
+            self.hits += 1
+            return face
+        
+        lock = self._locks.setdefault(user_id, asyncio.Lock())
+        async with lock:
+            # Another frame may have loaded it while we waited
+            face = self._cached(user_id)
+            if face is not None:
+                self.hits += 1
+                return face
+            
+            self.misses += 1
+            if user_role == "Student":
+                table_name, id_column = "student_profiles", "student_id"
+            else:
+                table_name, id_column = "company_profiles", "company_id"
+            
+            profile_response = await db.table(table_name).select("profile_picture_url").eq(
+                id_column, user_id
+            ).execute()
+            
+            if not profile_response.data or not profile_response.data[0].get("profile_picture_url"):
+                self.invalidate(user_id)
+                return None
+            
+            url = profile_response.data[0]["profile_picture_url"]
+            previous = self._faces.get(user_id)
+            if previous is not None and previous.url == url:
+                # Expired but unchanged: same URL means the same uploaded file
+                previous.loaded_at = time.monotonic()
+                self._faces.move_to_end(user_id)
+                return previous
+            
+            response = await self._client().get(url)
+            response.raise_for_status()
+            self.downloads += 1
+            return self.store(user_id, url, response.content)
+    
+    def invalidate(self, user_id: Any):
+        """Forget a user's picture after it was replaced or deleted"""
+        self._faces.pop(str(user_id), None)
+    
+    async def close(self):
+        """Close the HTTP connection pool (called from the app lifespan)"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "cached_users": len(self._faces),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "downloads": self.downloads,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+
+# Singleton instance
+reference_faces = ReferenceFaceCache(
+    max_users=settings.reference_face_cache_max_users,
+    ttl_seconds=settings.reference_face_cache_ttl_seconds,
+    fetch_timeout_seconds=10
+)
+
+
+def get_reference_faces() -> ReferenceFaceCache:
+    """Dependency to get the shared reference face cache"""
+    return reference_faces
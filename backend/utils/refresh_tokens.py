@@ -0,0 +1,116 @@
+"""
+Refresh Tokens - opaque long-lived tokens exchanged for new access tokens
+
+Access tokens live ACCESS_TOKEN_EXPIRE_MINUTES (30 by default), shorter than
+a 45 minute test, and renewing them used to mean a full login: a users
+read, a ~250 ms bcrypt check and a last_login_at write. Login now also
+hands out a refresh token. POST /auth/refresh swaps it for a new access
+token and a new refresh token through one RPC (rotate_refresh_token in
+migrations/refresh_tokens.sql) with no bcrypt involved.
+
+Tokens are 256 random bits, so a plain SHA-256 is enough to store them
+safely; the raw token exists only on the client. Each token is single use:
+replaying a rotated token revokes its whole family.
+
+A successor is not random but the HMAC of its predecessor under SECRET_KEY,
+so the server can recompute it without storing raw tokens. When two tabs
+refresh with the same token at once, the later request presents the same
+successor hash and, within REFRESH_TOKEN_GRACE_SECONDS, receives the same
+successor instead of tripping reuse detection.
+"""
+
+import base64
+import hashlib
+import hmac
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+from supabase import AsyncClient
+from config import settings
+
+
+class RefreshTokenError(Exception):
+    """Unknown, expired, reused or suspended refresh token"""
+
+
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class RefreshTokenStore:
+    """Issue, rotate and revoke refresh tokens in the refresh_tokens table"""
+    
+    def __init__(self, ttl_days: int, grace_seconds: int):
+        self.ttl_days = ttl_days
+        self.grace_seconds = grace_seconds
+        self.issued = 0
+        self.rotated = 0
+        self.refused = 0
+    
+    def _new_token(self, predecessor: Optional[str] = None) -> Tuple[str, str, str]:
+        if predecessor is None:
+            token = secrets.token_urlsafe(32)
+        else:
+            digest = hmac.new(settings.secret_key.encode(), b"refresh:" + predecessor.encode(), hashlib.sha256).digest()
+            token = base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+        expires_at = datetime.now(timezone.utc) + timedelta(days=self.ttl_days)
+        return token, hash_refresh_token(token), expires_at.isoformat()
+    
+    async def issue(self, db: AsyncClient, user_id: Any) -> str:
+        """A refresh token starting a new family (at login or registration)"""
+        token, token_hash, expires_at = self._new_token()
+        await db.table("refresh_tokens").insert({
+            "token_hash": token_hash,
+            "user_id": str(user_id),
+            "family_id": str(uuid.uuid4()),
+            "expires_at": expires_at
+        }).execute()
+        self.issued += 1
+        return token
+    
+    async def rotate(self, db: AsyncClient, token: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Exchange a refresh token for its successor
+        Returns: (new refresh token, {user_id, email, user_role})
+        """
+        new_token, new_hash, expires_at = self._new_token(predecessor=token)
+        response = await db.rpc("rotate_refresh_token", {
+            "p_token_hash": hash_refresh_token(token),
+            "p_new_token_hash": new_hash,
+            "p_expires_at": expires_at,
+            "p_grace_seconds": self.grace_seconds
+        }).execute()
+        
+        row = response.data[0] if response.data else {"status": "invalid"}
+        if row["status"] != "rotated":
+            self.refused += 1
+            raise RefreshTokenError(f"Refresh token {row['status']}")
+        
+        self.rotated += 1
+        return new_token, row
+    
+    async def revoke(self, db: AsyncClient, token: str):
+        """Revoke a token and every token rotated from the same login"""
+        await db.rpc("revoke_refresh_token", {"p_token_hash": hash_refresh_token(token)}).execute()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ttl_days": self.ttl_days,
+            "grace_seconds": self.grace_seconds,
+            "issued": self.issued,
+            "rotated": self.rotated,
+            "refused": self.refused
+        }
+
+
+# Singleton instance
+refresh_tokens = RefreshTokenStore(
+    ttl_days=settings.refresh_token_expire_days,
+    grace_seconds=settings.refresh_token_grace_seconds
+)
+
+
+def get_refresh_tokens() -> RefreshTokenStore:
+    """Dependency to get the shared refresh token store"""
+    return refresh_tokens
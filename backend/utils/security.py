@@ -1,11 +1,13 @@
+import secrets
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
 import bcrypt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from config import settings
 from models.user import TokenData
+from utils.jwt_backends import InvalidTokenError, jwt_backend
+from utils.token_cache import TokenRevokedError, verified_tokens
 from uuid import UUID
 
 # HTTP Bearer security scheme
@@ -17,9 +19,9 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 
-def get_password_hash(password: str) -> str:
-    """Hash a password"""
-    salt = bcrypt.gensalt()
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
+    """Hash a password (cost factor BCRYPT_ROUNDS unless given)"""
+    salt = bcrypt.gensalt(rounds=rounds or settings.bcrypt_rounds)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
@@ -34,13 +36,13 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
+    encoded_jwt = jwt_backend.encode(to_encode, settings.secret_key, settings.algorithm)
     
     return encoded_jwt
 
 
 def decode_access_token(token: str) -> TokenData:
-    """Decode and validate JWT token"""
+    """Decode and validate JWT token (verified tokens are cached until exp)"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -48,7 +50,11 @@ def decode_access_token(token: str) -> TokenData:
     )
     
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        cached = verified_tokens.get(token)
+        if cached is not None:
+            return cached
+        
+        payload = jwt_backend.decode(token, settings.secret_key, settings.algorithm)
         user_id: str = payload.get("sub")
         email: str = payload.get("email")
         user_role: str = payload.get("role")
@@ -61,19 +67,45 @@ def decode_access_token(token: str) -> TokenData:
             email=email,
             user_role=user_role
         )
+        verified_tokens.put(token, token_data, payload.get("exp"))
         return token_data
         
-    except JWTError:
+    except (InvalidTokenError, TokenRevokedError, ValueError):
         raise credentials_exception
 
 
+async def verify_access_token(token: str) -> TokenData:
+    """decode_access_token plus the revocations made by other API workers"""
+    token_data = decode_access_token(token)
+    try:
+        await verified_tokens.check_revoked(token, token_data)
+    except TokenRevokedError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return token_data
+
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> TokenData:
     """Dependency to get current authenticated user from JWT token"""
     token = credentials.credentials
-    return decode_access_token(token)
+    return await verify_access_token(token)
 
 
 async def get_current_active_user(current_user: TokenData = Depends(get_current_user)) -> TokenData:
     """Dependency to get current active user"""
     # Additional checks can be added here (e.g., checking if user is active in DB)
     return current_user
+
+
+async def require_operator(x_ops_key: Optional[str] = Header(None)):
+    """
+    Dependency for internal monitoring endpoints: requires the X-Ops-Key header
+    to match OPS_API_KEY. Without OPS_API_KEY the endpoints do not exist (404).
+    """
+    if not settings.ops_api_key:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_ops_key or not secrets.compare_digest(x_ops_key, settings.ops_api_key):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Operator key required")
@@ -0,0 +1,111 @@
+"""
+Session Manifest - pre-serialized question payload per test session
+
+A session's questions never change after create_test_session samples them.
+The manifest is built once at creation: the ordered QuestionResponse list
+with correct answers stripped, serialized to JSON, with an ETag. It is cached
+by session_id, so get_session_questions serves re-fetches from the cache
+(or 304 Not Modified) instead of joining session_questions to test_questions.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, List, Optional
+from config import settings
+from models.test import QuestionResponse
+from utils.cache_backends import create_backend
+
+KEY_PREFIX = "session_manifest:"
+
+# test_questions columns a manifest needs (never correct_answer)
+MANIFEST_COLUMNS = "question_id, skill_id, question_type, difficulty_level, question_text, options, points, time_limit_seconds"
+
+
+class SessionManifest:
+    """Immutable question payload of one session"""
+    
+    def __init__(self, user_id: str, etag: str, body: str):
+        self.user_id = user_id
+        self.etag = etag
+        self.body = body
+        self._questions: Optional[List[Dict[str, Any]]] = None
+    
+    @classmethod
+    def build(cls, user_id: str, questions: List[Dict[str, Any]]) -> "SessionManifest":
+        """Manifest from test_questions rows in question order"""
+        payload = [QuestionResponse(**question).model_dump(mode="json") for question in questions]
+        body = json.dumps(payload, separators=(",", ":"))
+        etag = '"' + hashlib.sha256(body.encode("utf-8")).hexdigest()[:32] + '"'
+        return cls(str(user_id), etag, body)
+    
+    def questions(self) -> List[Dict[str, Any]]:
+        """Parsed questions, for serving them one at a time"""
+        if self._questions is None:
+            self._questions = json.loads(self.body)
+        return self._questions
+    
+    def serialize(self) -> str:
+        return f"{self.user_id}\n{self.etag}\n{self.body}"
+    
+    @classmethod
+    def deserialize(cls, value: str) -> "SessionManifest":
+        user_id, etag, body = value.split("\n", 2)
+        return cls(user_id, etag, body)
+
+
+class SessionManifestCache:
+    """Session manifests keyed by session_id on top of a cache backend"""
+    
+    def __init__(self, backend, ttl_seconds: int):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+    
+    async def store(self, session_id: str, user_id: str, questions: List[Dict[str, Any]]) -> SessionManifest:
+        """Build and cache the manifest for a session"""
+        manifest = SessionManifest.build(user_id, questions)
+        try:
+            await self.backend.set(KEY_PREFIX + str(session_id), manifest.serialize(), self.ttl_seconds)
+        except Exception as e:
+            # get_session_questions rebuilds the manifest when it is missing
+            print(f"Warning: Failed to cache session manifest: {str(e)}")
+        return manifest
+    
+    async def get(self, session_id: str) -> Optional[SessionManifest]:
+        """Cached manifest for a session, or None"""
+        try:
+            value = await self.backend.get(KEY_PREFIX + str(session_id))
+        except Exception as e:
+            print(f"Warning: Failed to read session manifest cache: {str(e)}")
+            value = None
+        
+        if value is None:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        return SessionManifest.deserialize(value)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+
+# Singleton instance; manifests live as long as answer keys
+session_manifests = SessionManifestCache(
+    create_backend(settings.answer_key_cache_max_sessions),
+    ttl_seconds=settings.answer_key_cache_ttl_seconds
+)
+
+
+def get_session_manifests() -> SessionManifestCache:
+    """Dependency to get the shared session manifest cache"""
+    return session_manifests
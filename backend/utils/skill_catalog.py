@@ -0,0 +1,176 @@
+"""
+Skill Catalog - in-process cache of skills_master
+
+skills_master is read on nearly every request path but only changes when
+skills or question banks are imported. The catalog loads the whole table in
+one query and indexes it by skill_id and by normalized name.
+
+Imports bump the single row of skill_catalog_version (a trigger on
+skills_master does too, see migrations/skill_catalog_version.sql). Every
+worker reads that version at most once per check interval and reloads when
+it changed, so a new skill shows up everywhere within seconds. The TTL
+remains as a backstop.
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Any
+from pydantic import BaseModel
+from supabase import AsyncClient
+from config import settings
+
+
+class Skill(BaseModel):
+    skill_id: str
+    skill_name: str
+    skill_category: Optional[str] = None
+    difficulty_level: Optional[str] = None
+    description: Optional[str] = None
+    icon_url: Optional[str] = None
+    created_at: Optional[str] = None
+
+
+class SkillCatalog:
+    """TTL cache of skills_master indexed by skill_id and normalized skill name"""
+    
+    def __init__(self, ttl_seconds: int, check_interval_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self._rows: List[Dict[str, Any]] = []
+        self._by_id: Dict[str, Skill] = {}
+        self._by_name: Dict[str, Skill] = {}
+        self._loaded_at: Optional[float] = None
+        self._version: Optional[int] = None
+        self._checked_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+    
+    @staticmethod
+    def normalize(name: str) -> str:
+        """Normalize a skill name for lookups ("  Node.JS " -> "node.js")"""
+        return " ".join(name.lower().split())
+    
+    def _is_fresh(self) -> bool:
+        now = time.monotonic()
+        return (
+            self._loaded_at is not None
+            and now - self._loaded_at < self.ttl_seconds
+            and now - self._checked_at < self.check_interval_seconds
+        )
+    
+    async def _fetch_version(self, db: AsyncClient) -> Optional[int]:
+        try:
+            response = await db.table("skill_catalog_version").select("version").execute()
+        except Exception as e:
+            print(f"Warning: Failed to read skill catalog version: {str(e)}")
+            return None
+        return response.data[0]["version"] if response.data else None
+    
+    async def _ensure_loaded(self, db: AsyncClient):
+        """Reload the catalog if it is empty, expired or its version changed"""
+        if self._is_fresh():
+            self.hits += 1
+            return
+        
+        async with self._lock:
+            # Another request may have checked or reloaded while we waited
+            if self._is_fresh():
+                self.hits += 1
+                return
+            
+            version = await self._fetch_version(db)
+            now = time.monotonic()
+            if (
+                self._loaded_at is not None
+                and now - self._loaded_at < self.ttl_seconds
+                and version is not None
+                and version == self._version
+            ):
+                self._checked_at = now
+                self.hits += 1
+                return
+            
+            self.misses += 1
+            response = await db.table("skills_master").select("*").order("skill_name").execute()
+            rows = response.data or []
+            
+            skills = [Skill(**row) for row in rows]
+            self._rows = rows
+            self._by_id = {skill.skill_id: skill for skill in skills}
+            self._by_name = {self.normalize(skill.skill_name): skill for skill in skills}
+            self._loaded_at = self._checked_at = time.monotonic()
+            self._version = version
+            self.loads += 1
+    
+    async def list_rows(self, db: AsyncClient) -> List[Dict[str, Any]]:
+        """All skills_master rows, ordered by skill_name"""
+        await self._ensure_loaded(db)
+        return self._rows
+    
+    async def get_by_id(self, db: AsyncClient, skill_id: Any) -> Optional[Skill]:
+        """Look up a skill by skill_id"""
+        await self._ensure_loaded(db)
+        return self._by_id.get(str(skill_id))
+    
+    async def get_by_name(self, db: AsyncClient, skill_name: str) -> Optional[Skill]:
+        """Look up a skill by exact (normalized) name"""
+        await self._ensure_loaded(db)
+        return self._by_name.get(self.normalize(skill_name))
+    
+    async def search(self, db: AsyncClient, term: str) -> Optional[Skill]:
+        """
+        Find a skill by name: exact match first, otherwise the first skill
+        (by name) containing the term, like ilike '%term%'
+        """
+        await self._ensure_loaded(db)
+        normalized = self.normalize(term)
+        
+        if normalized in self._by_name:
+            return self._by_name[normalized]
+        
+        for name in sorted(self._by_name):
+            if normalized in name:
+                return self._by_name[name]
+        return None
+    
+    async def skill_name(self, db: AsyncClient, skill_id: Any, default: str = "Unknown") -> str:
+        """Skill name for a skill_id, or default if it is not in the catalog"""
+        skill = await self.get_by_id(db, skill_id)
+        return skill.skill_name if skill else default
+    
+    async def skill_names(self, db: AsyncClient, skill_ids: List[Any]) -> Dict[str, str]:
+        """Map of skill_id -> skill_name for the given ids"""
+        await self._ensure_loaded(db)
+        return {
+            str(skill_id): self._by_id[str(skill_id)].skill_name
+            for skill_id in skill_ids
+            if str(skill_id) in self._by_id
+        }
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "skills_cached": len(self._by_id),
+            "ttl_seconds": self.ttl_seconds,
+            "version": self._version,
+            "age_seconds": round(time.monotonic() - self._loaded_at, 1) if self._loaded_at is not None else None
+        }
+
+
+# Singleton instance
+skill_catalog = SkillCatalog(
+    ttl_seconds=settings.skill_catalog_ttl_seconds,
+    check_interval_seconds=settings.skill_catalog_check_interval_seconds
+)
+
+
+def get_skill_catalog() -> SkillCatalog:
+    """Dependency to get the shared skill catalog"""
+    return skill_catalog
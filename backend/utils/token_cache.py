@@ -0,0 +1,196 @@
+"""
+Verified Token Cache - decoded access tokens reused until they expire
+
+Every protected request used to re-check the token's HMAC, re-parse its
+claims and build a new TokenData, which adds up on the chatty proctoring and
+answer endpoints where one client sends the same token many times a minute.
+This bounded LRU maps the SHA-256 digest of a token (the raw token is never
+kept) to its TokenData and drops the entry at the token's exp.
+
+Revocation hooks:
+- revoke_token: the token is refused until it would have expired (logout)
+- revoke_user: every token of the user is refused for one token lifetime,
+  e.g. after the account is suspended; reinstate_user lifts it
+
+Revocations are kept per API worker and, with REDIS_URL set, also written
+to the shared cache backend: every worker consults it with one MGET per
+request (check_revoked), so a logout on one worker is honoured by all of them.
+Without Redis there is only one cache per worker and revocations stay local.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from config import settings
+from models.user import TokenData
+from utils.cache_backends import LocalCacheBackend, create_backend
+
+REVOKED_TOKEN_PREFIX = "revoked_token:"
+REVOKED_USER_PREFIX = "revoked_user:"
+
+
+class TokenRevokedError(Exception):
+    """The token or its user has been revoked"""
+
+
+class VerifiedTokenCache:
+    """LRU of token digest -> (exp, TokenData) with revocation"""
+    
+    def __init__(self, max_entries: int, revocation_seconds: int, revocations=None):
+        self.max_entries = max_entries
+        self.revocation_seconds = revocation_seconds
+        # Only a shared backend adds anything to the per-worker dicts below
+        self._shared = None if revocations is None or isinstance(revocations, LocalCacheBackend) else revocations
+        self._entries: "OrderedDict[bytes, Tuple[float, TokenData]]" = OrderedDict()
+        self._revoked_tokens: Dict[bytes, float] = {}  # digest -> exp
+        self._revoked_users: Dict[str, float] = {}  # user_id -> revoked until
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+    
+    def get(self, token: str) -> Optional[TokenData]:
+        """Cached TokenData of a still valid token, None if it must be verified"""
+        key = self.digest(token)
+        now = time.time()
+        
+        if key in self._revoked_tokens:
+            raise TokenRevokedError("Token has been revoked")
+        
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        expires_at, token_data = entry
+        if expires_at <= now:
+            del self._entries[key]
+            self.misses += 1
+            return None
+        
+        self._check_user(token_data, now)
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return token_data
+    
+    def put(self, token: str, token_data: TokenData, expires_at: Optional[float]):
+        """Remember a freshly verified token (tokens without exp are not cached)"""
+        now = time.time()
+        self._check_user(token_data, now)
+        if not expires_at or expires_at <= now:
+            return
+        
+        key = self.digest(token)
+        self._entries[key] = (float(expires_at), token_data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _check_user(self, token_data: TokenData, now: float):
+        revoked_until = self._revoked_users.get(str(token_data.user_id))
+        if revoked_until is None:
+            return
+        if revoked_until > now:
+            raise TokenRevokedError("Account access has been revoked")
+        del self._revoked_users[str(token_data.user_id)]
+    
+    async def check_revoked(self, token: str, token_data: TokenData):
+        """Raise TokenRevokedError if another worker revoked the token or its user"""
+        if self._shared is None:
+            return
+        try:
+            # Both keys in one round trip
+            token_revoked_until, user_revoked_until = await self._shared.get_many([
+                REVOKED_TOKEN_PREFIX + self.digest(token).hex(),
+                REVOKED_USER_PREFIX + str(token_data.user_id)
+            ])
+        except Exception as e:
+            print(f"Warning: Failed to read shared token revocations: {str(e)}")
+            return
+        
+        if token_revoked_until is not None:
+            # Final, so remember it here and refuse the token without a lookup next time
+            self._revoke_locally(token, float(token_revoked_until))
+            raise TokenRevokedError("Token has been revoked")
+        if user_revoked_until is not None:
+            # Not copied locally: reinstate_user on any worker must lift it everywhere
+            raise TokenRevokedError("Account access has been revoked")
+    
+    async def _share(self, key: str, revoked_until: float):
+        if self._shared is None:
+            return
+        try:
+            ttl_seconds = max(1, int(revoked_until - time.time()) + 1)
+            await self._shared.set(key, str(revoked_until), ttl_seconds)
+        except Exception as e:
+            print(f"Warning: Failed to share token revocation: {str(e)}")
+    
+    def _revoke_locally(self, token: str, expires_at: Optional[float]) -> float:
+        key = self.digest(token)
+        entry = self._entries.pop(key, None)
+        if expires_at is None:
+            expires_at = entry[0] if entry else time.time() + self.revocation_seconds
+        self._revoked_tokens[key] = float(expires_at)
+        self._prune()
+        return float(expires_at)
+    
+    async def revoke_token(self, token: str, expires_at: Optional[float] = None):
+        """Refuse one token from now on, on every worker"""
+        expires_at = self._revoke_locally(token, expires_at)
+        await self._share(REVOKED_TOKEN_PREFIX + self.digest(token).hex(), expires_at)
+    
+    async def revoke_user(self, user_id: Any):
+        """Refuse every token of a user, e.g. when account_status becomes Suspended"""
+        user_id = str(user_id)
+        revoked_until = time.time() + self.revocation_seconds
+        self._revoked_users[user_id] = revoked_until
+        for key in [key for key, (_, data) in self._entries.items() if str(data.user_id) == user_id]:
+            del self._entries[key]
+        await self._share(REVOKED_USER_PREFIX + user_id, revoked_until)
+    
+    async def reinstate_user(self, user_id: Any):
+        """Accept a user's tokens again"""
+        self._revoked_users.pop(str(user_id), None)
+        if self._shared is not None:
+            try:
+                await self._shared.delete(REVOKED_USER_PREFIX + str(user_id))
+            except Exception as e:
+                print(f"Warning: Failed to share token reinstatement: {str(e)}")
+    
+    def _prune(self):
+        now = time.time()
+        for key in [key for key, expires_at in self._revoked_tokens.items() if expires_at <= now]:
+            del self._revoked_tokens[key]
+    
+    def clear(self):
+        self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit rate for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "revoked_tokens": len(self._revoked_tokens),
+            "revoked_users": len(self._revoked_users),
+            "shared_revocations": self._shared is not None
+        }
+
+
+# Singleton instance
+verified_tokens = VerifiedTokenCache(
+    max_entries=settings.token_cache_max_entries,
+    revocation_seconds=settings.access_token_expire_minutes * 60,
+    revocations=create_backend(settings.token_cache_max_entries)
+)
+
+
+def get_verified_tokens() -> VerifiedTokenCache:
+    """Dependency to get the shared verified token cache"""
+    return verified_tokens
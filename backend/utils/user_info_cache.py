@@ -0,0 +1,85 @@
+"""
+User Info Cache - serialized GET /auth/me responses with ETags
+
+The frontend calls /auth/me on every page load. The response (user row plus
+role profile) is cached as its JSON body under the user_id, together with
+an ETag derived from the body, so a repeat call is a cache read and a
+client revalidating with If-None-Match gets a 304 with no body.
+
+Profile writes (routes/student.py, routes/profile.py) invalidate the entry.
+Storage is the same pluggable backend as the answer key cache, so with
+REDIS_URL set an invalidation on one worker is seen by all of them.
+"""
+
+import hashlib
+from typing import Any, Dict, Optional, Tuple
+from config import settings
+from utils.cache_backends import create_backend
+
+KEY_PREFIX = "user_info:"
+
+
+def compute_etag(body: str) -> str:
+    return '"' + hashlib.sha256(body.encode()).hexdigest()[:32] + '"'
+
+
+class UserInfoCache:
+    """/auth/me bodies and ETags keyed by user_id on top of a cache backend"""
+    
+    def __init__(self, backend, ttl_seconds: int):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+    
+    async def store(self, user_id: Any, body: str) -> str:
+        """Cache a serialized response; returns its ETag"""
+        etag = compute_etag(body)
+        try:
+            await self.backend.set(KEY_PREFIX + str(user_id), f"{etag} {body}", self.ttl_seconds)
+        except Exception as e:
+            print(f"Warning: Failed to cache user info: {str(e)}")
+        return etag
+    
+    async def get(self, user_id: Any) -> Optional[Tuple[str, str]]:
+        """Cached (etag, body) of a user, or None"""
+        try:
+            value = await self.backend.get(KEY_PREFIX + str(user_id))
+        except Exception as e:
+            print(f"Warning: Failed to read user info cache: {str(e)}")
+            value = None
+        
+        if value is None:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        etag, body = value.split(" ", 1)
+        return etag, body
+    
+    async def invalidate(self, user_id: Any):
+        """Drop a user's cached response after a write to their user or profile row"""
+        try:
+            await self.backend.delete(KEY_PREFIX + str(user_id))
+        except Exception as e:
+            print(f"Warning: Failed to invalidate user info: {str(e)}")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+
+# Singleton instance
+user_info_cache = UserInfoCache(create_backend(settings.user_info_cache_max_users), ttl_seconds=settings.user_info_cache_ttl_seconds)
+
+
+def get_user_info_cache() -> UserInfoCache:
+    """Dependency to get the shared /auth/me cache"""
+    return user_info_cache
@@ -22,10 +22,13 @@ export const AuthProvider = ({ children }) => {
   const login = async (email, password) => {
     try {
       const response = await api.post('/auth/login', { email, password });
-      const { access_token, token_type } = response.data;
+      const { access_token, refresh_token } = response.data;
       
-      // Store token
+      // Store tokens
       localStorage.setItem('access_token', access_token);
+      if (refresh_token) {
+        localStorage.setItem('refresh_token', refresh_token);
+      }
       
       // Get user info
       const userResponse = await api.get('/auth/me');
@@ -46,7 +49,18 @@ export const AuthProvider = ({ children }) => {
 
   // Logout function
   const logout = () => {
+    const accessToken = localStorage.getItem('access_token');
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (accessToken && refreshToken) {
+      // Revoke server-side; local state is cleared regardless
+      api.post(
+        '/auth/logout',
+        { refresh_token: refreshToken },
+        { headers: { Authorization: `Bearer ${accessToken}` } }
+      ).catch(() => {});
+    }
     localStorage.removeItem('access_token');
+    localStorage.removeItem('refresh_token');
     localStorage.removeItem('user');
     setUser(null);
   };
@@ -55,10 +69,13 @@ export const AuthProvider = ({ children }) => {
   const register = async (endpoint, userData) => {
     try {
       const response = await api.post(endpoint, userData);
-      const { access_token, user_id, email } = response.data;
+      const { access_token, refresh_token } = response.data;
       
-      // Store token
+      // Store tokens
       localStorage.setItem('access_token', access_token);
+      if (refresh_token) {
+        localStorage.setItem('refresh_token', refresh_token);
+      }
       
       // Get full user info
       const userResponse = await api.get('/auth/me');
@@ -115,9 +115,7 @@ const SkillVerificationTest = () => {
     if (videoStream) {
       videoStream.getTracks().forEach(track => track.stop());
     }
-    if (faceVerificationIntervalRef.current) {
-      clearInterval(faceVerificationIntervalRef.current);
-    }
+    stopFaceVerification();
   };
 
   const captureFrame = useCallback(() => {
@@ -134,20 +132,25 @@ const SkillVerificationTest = () => {
     return canvas.toDataURL('image/jpeg', 0.8);
   }, []);
 
-  const startFaceVerification = () => {
-    // Verify face every 30 seconds
-    faceVerificationIntervalRef.current = setInterval(async () => {
-      await verifyFace();
-    }, 30000);
+  const scheduleFaceVerification = (seconds) => {
+    faceVerificationIntervalRef.current = setTimeout(async () => {
+      const nextCheckSeconds = await verifyFace();
+      // Stopped while the check was in flight
+      if (faceVerificationIntervalRef.current === null) return;
+      scheduleFaceVerification(nextCheckSeconds || 30);
+    }, seconds * 1000);
+  };
 
-    // Initial verification
-    setTimeout(() => verifyFace(), 3000);
+  const startFaceVerification = () => {
+    // Initial verification; the server recommends when to check again
+    scheduleFaceVerification(3);
   };
 
   const stopFaceVerification = () => {
     if (faceVerificationIntervalRef.current) {
-      clearInterval(faceVerificationIntervalRef.current);
+      clearTimeout(faceVerificationIntervalRef.current);
     }
+    faceVerificationIntervalRef.current = null;
   };
 
   const verifyFace = async () => {
@@ -171,6 +174,8 @@ const SkillVerificationTest = () => {
         };
         setViolations(prev => [...prev, newViolation]);
       }
+
+      return response.data.next_check_seconds;
     } catch (error) {
       console.error('Face verification error:', error);
     }
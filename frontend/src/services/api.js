@@ -23,13 +23,64 @@ api.interceptors.request.use(
   }
 );
 
+// Auth calls whose 401 means bad credentials, not an expired access token
+const NO_REFRESH_PATHS = ['/auth/login', '/auth/refresh', '/auth/logout'];
+
+// Exchange the stored refresh token, unless another tab already did
+const exchangeRefreshToken = async (staleToken) => {
+  // Re-read both tokens: they may have changed while this tab waited for the lock
+  const accessToken = localStorage.getItem('access_token');
+  if (accessToken && accessToken !== staleToken) {
+    return accessToken;
+  }
+  const refreshToken = localStorage.getItem('refresh_token');
+  if (!refreshToken) {
+    throw new Error('No refresh token');
+  }
+  const response = await axios.post(`${api.defaults.baseURL}/auth/refresh`, { refresh_token: refreshToken });
+  localStorage.setItem('access_token', response.data.access_token);
+  localStorage.setItem('refresh_token', response.data.refresh_token);
+  return response.data.access_token;
+};
+
+// One refresh at a time: concurrent 401s in this tab wait for the same
+// exchange, and tabs take turns through a Web Lock so a second tab reuses
+// the tokens the first one stored instead of replaying the rotated refresh
+// token (the server also tolerates that during a short grace period)
+let refreshPromise = null;
+
+const refreshAccessToken = (staleToken) => {
+  if (!refreshPromise) {
+    const exchange = () => exchangeRefreshToken(staleToken);
+    refreshPromise = (navigator.locks ? navigator.locks.request('auth-refresh', exchange) : exchange())
+      .finally(() => {
+        refreshPromise = null;
+      });
+  }
+  return refreshPromise;
+};
+
 // Add response interceptor to handle errors
 api.interceptors.response.use(
   (response) => response,
-  (error) => {
+  async (error) => {
+    const original = error.config;
+    if (error.response?.status === 401 && original && !original._retried && !NO_REFRESH_PATHS.includes(original.url)) {
+      // Expired access token: get a new one with the refresh token and retry once
+      original._retried = true;
+      try {
+        const staleToken = original.headers.Authorization?.replace('Bearer ', '');
+        const token = await refreshAccessToken(staleToken);
+        original.headers.Authorization = `Bearer ${token}`;
+        return api(original);
+      } catch {
+        // Fall through to a fresh login
+      }
+    }
     if (error.response?.status === 401) {
       // Clear token and redirect to login
       localStorage.removeItem('access_token');
+      localStorage.removeItem('refresh_token');
       localStorage.removeItem('user');
       window.location.href = '/login';
     }